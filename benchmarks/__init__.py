@@ -0,0 +1,12 @@
+"""
+Benchmarks for Mancom Timer & Notes
+
+Times the storage, list refresh and tick paths against synthetic task sets
+and compares the results with a stored baseline:
+
+    python -m benchmarks                      # 1k/10k/100k tasks, compare with baseline.json
+    python -m benchmarks --counts 1000 --case store.
+    python -m benchmarks --save-baseline      # record this machine's numbers
+
+GUI cases run under Qt's offscreen platform, so no display is needed.
+"""
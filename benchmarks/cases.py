@@ -0,0 +1,185 @@
+"""
+Benchmark cases
+
+Each case is set up once per run and returns a callable that performs the
+operation being timed. Setup work (writing the data file, building the
+window) is not part of the timing.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import config
+from mancom_core import (DataStore, JournalDataStore, SqliteDataStore, TaskColumns, TaskData,
+                         TaskPager)
+
+CASES = {}
+# Cases whose time is mostly fsync; the runner gives them more room
+IO_BOUND = set()
+
+def case(name, io_bound=False):
+    """Register func(tasks, workdir, cleanup) under name.
+
+    cleanup is a contextlib.ExitStack for releasing whatever setup opened.
+    """
+    def register(func):
+        CASES[name] = func
+        if io_bound:
+            IO_BOUND.add(name)
+        return func
+    return register
+
+# The model cases build tasks from already-parsed JSON; their allocation
+# peak is the memory the in-memory representation adds on top of the
+# parsed strings
+
+@case('model.tasks')
+def model_tasks(tasks, workdir, cleanup):
+    records = json.loads(json.dumps([task.to_dict() for task in tasks]))
+    return lambda: [TaskData.from_dict(item) for item in records]
+
+@case('model.columns')
+def model_columns(tasks, workdir, cleanup):
+    records = json.loads(json.dumps([task.to_dict() for task in tasks]))
+    return lambda: TaskColumns.from_dicts(records)
+
+def _open_store(backend, workdir, cleanup):
+    if backend == 'sqlite':
+        store = SqliteDataStore(Path(workdir) / 'tasks_data.db')
+    elif backend == 'journal':
+        store = JournalDataStore(Path(workdir) / 'tasks_data.json')
+    else:
+        store = DataStore(Path(workdir) / 'tasks_data.json')
+    cleanup.callback(store.close)
+    return store
+
+@case('store.json.load')
+def json_load(tasks, workdir, cleanup):
+    store = _open_store('json', workdir, cleanup)
+    store.save(tasks)
+    return store.load
+
+@case('store.json.first_page')
+def json_first_page(tasks, workdir, cleanup):
+    store = _open_store('json', workdir, cleanup)
+    store.save(tasks)
+    return lambda: TaskPager(store).next_page()
+
+@case('store.json.save_all', io_bound=True)
+def json_save_all(tasks, workdir, cleanup):
+    store = _open_store('json', workdir, cleanup)
+    return lambda: store.save(tasks)
+
+@case('store.journal.load')
+def journal_load(tasks, workdir, cleanup):
+    store = _open_store('journal', workdir, cleanup)
+    store.save(tasks)
+    # A typical journal: a snapshot plus a few hundred edits on top
+    for task in tasks[:store.compact_records - 1]:
+        store.save(tasks, {task.id})
+    return store.load
+
+@case('store.journal.save_one', io_bound=True)
+def journal_save_one(tasks, workdir, cleanup):
+    store = _open_store('journal', workdir, cleanup)
+    store.save(tasks)
+    changed = {tasks[len(tasks) // 2].id}
+    return lambda: store.save(tasks, changed)
+
+@case('store.sqlite.load')
+def sqlite_load(tasks, workdir, cleanup):
+    store = _open_store('sqlite', workdir, cleanup)
+    store.save(tasks)
+    return store.load
+
+@case('store.sqlite.first_page')
+def sqlite_first_page(tasks, workdir, cleanup):
+    store = _open_store('sqlite', workdir, cleanup)
+    store.save(tasks)
+    return lambda: TaskPager(store).next_page()
+
+@case('store.sqlite.save_all', io_bound=True)
+def sqlite_save_all(tasks, workdir, cleanup):
+    store = _open_store('sqlite', workdir, cleanup)
+    return lambda: store.save(tasks)
+
+@case('store.sqlite.save_one', io_bound=True)
+def sqlite_save_one(tasks, workdir, cleanup):
+    store = _open_store('sqlite', workdir, cleanup)
+    store.save(tasks)
+    changed = {tasks[len(tasks) // 2].id}
+    return lambda: store.save(tasks, changed)
+
+def _open_window(tasks, workdir, cleanup):
+    """Return (app, window) with tasks loaded from a data file in workdir"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    # PyQt5 is imported here so store-only runs never load it
+    from PyQt5.QtCore import QThreadPool
+    from PyQt5.QtWidgets import QApplication
+    import main
+
+    config.SETTINGS['storage_backend'] = 'json'
+    config.SETTINGS['data_file'] = str(Path(workdir) / 'tasks_data.json')
+    config.SETTINGS['database_file'] = str(Path(workdir) / 'tasks_data.db')
+    config.SETTINGS['asset_cache_dir'] = str(Path(workdir) / 'cache')
+    # Archiving would move the synthetic tasks out from under the timings
+    config.SETTINGS['archive_after_days'] = 0
+    DataStore(config.SETTINGS['data_file']).save(tasks)
+
+    app = QApplication.instance() or QApplication(['benchmarks'])
+    window = main.TimerApp()
+    window.show()
+    # The GUI cases time work over every task, not just the first page
+    window.ensure_all_tasks()
+    # Let the deferred asset loading finish so it does not land in a timing
+    app.processEvents()
+    QThreadPool.globalInstance().waitForDone()
+    app.processEvents()
+
+    def close():
+        window.autosave.clear()
+        window.saver.wait()
+        window.data_store.close()
+        window.tray_icon.hide()
+        window.deleteLater()
+        app.processEvents()
+    cleanup.callback(close)
+    return app, window
+
+def _start_middle_task(window):
+    """Select and start the middle task, as a user would"""
+    task = window.tasks.at(len(window.tasks) // 2)
+    window.current_task = task
+    window.timer_manager.start_task(task.id)
+    return task
+
+@case('gui.refresh_task_list')
+def refresh_task_list(tasks, workdir, cleanup):
+    app, window = _open_window(tasks, workdir, cleanup)
+
+    def run():
+        window.refresh_task_list()
+        app.processEvents()
+    return run
+
+@case('gui.update_timer_display')
+def update_timer_display(tasks, workdir, cleanup):
+    app, window = _open_window(tasks, workdir, cleanup)
+    task = _start_middle_task(window)
+
+    def run():
+        window.update_timer_display(task.id, 42)
+        app.processEvents()
+    return run
+
+@case('gui.tick')
+def tick(tasks, workdir, cleanup):
+    app, window = _open_window(tasks, workdir, cleanup)
+    _start_middle_task(window)
+
+    def run():
+        # One ticker timeout: engine lookup, signal, label and row repaint
+        window.timer_manager._tick()
+        app.processEvents()
+    return run
@@ -0,0 +1,219 @@
+"""
+Benchmark runner
+
+Every case runs in a fresh interpreter so peak RSS belongs to that case
+alone. The child times the case (after one warm-up call), then repeats it
+once under tracemalloc to measure allocations, and prints one JSON line.
+The parent collects the lines, prints a table and compares it with the
+baseline.
+"""
+
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+BASELINE_FILE = Path(__file__).parent / 'baseline.json'
+DEFAULT_COUNTS = (1000, 10000, 100000)
+DEFAULT_THRESHOLD = 0.25  # fail when a metric grows by more than 25%
+# A case that looks regressed is re-run up to this many times in new
+# processes before it counts; GUI timings in particular vary per process
+CONFIRM_RUNS = 2
+
+# I/O-bound cases are gated on the median wall time, with this many times
+# the threshold; fsync latency varies far more than CPU time does
+IO_BOUND_FACTOR = 2
+
+# Differences below these are noise, whatever the ratio
+MIN_WALL_DELTA = 0.002  # seconds
+MIN_MEMORY_DELTA = 1 << 20  # bytes
+
+# Compared metric -> label
+METRICS = {
+    'wall_min': "wall time",
+    'alloc_peak': "allocations",
+    'peak_rss': "peak RSS",
+}
+
+def measure(name, count, notes, repeat):
+    """Run one case in this process and return its result dict"""
+    from .cases import CASES
+    from .synthetic import make_tasks
+
+    tasks = make_tasks(count, notes)
+    times = []
+    with tempfile.TemporaryDirectory() as workdir, contextlib.ExitStack() as cleanup:
+        # The app reports progress with print(); keep it out of our output
+        cleanup.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        run = CASES[name](tasks, workdir, cleanup)
+        run()
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - started)
+        tracemalloc.start()
+        run()
+        _, alloc_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        'wall_min': min(times),
+        'wall_median': statistics.median(times),
+        'alloc_peak': alloc_peak,
+        # ru_maxrss is in KiB on Linux
+        'peak_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+
+def run_case(name, count, notes, repeat):
+    """Run one case in a child interpreter; return its result dict"""
+    command = [sys.executable, '-m', 'benchmarks', '--child', name,
+               '--counts', str(count), '--notes', notes, '--repeat', str(repeat)]
+    proc = subprocess.run(command, cwd=Path(__file__).parent.parent,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{name} ({count} tasks) failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def best_of(first, second):
+    """Merge two results of the same case, keeping the best of each metric"""
+    best = first if first['wall_min'] <= second['wall_min'] else second
+    merged = dict(best)
+    for metric in ('wall_median', 'alloc_peak', 'peak_rss'):
+        merged[metric] = min(first[metric], second[metric])
+    return merged
+
+def result_key(name, count, notes):
+    return f"{name}/{count}/{notes}"
+
+def format_seconds(seconds):
+    if seconds < 1:
+        return f"{seconds * 1000:.2f} ms"
+    return f"{seconds:.2f} s"
+
+def format_bytes(size):
+    return f"{size / (1 << 20):.1f} MB"
+
+def compare(result, baseline, threshold, io_bound=False):
+    """Return a description for each metric that regressed past threshold"""
+    regressions = []
+    for metric, label in METRICS.items():
+        limit = threshold
+        if io_bound and metric == 'wall_min':
+            metric, label, limit = 'wall_median', "median wall time", threshold * IO_BOUND_FACTOR
+        old = baseline.get(metric)
+        if not old:
+            continue
+        new = result[metric]
+        floor = MIN_WALL_DELTA if metric.startswith('wall') else MIN_MEMORY_DELTA
+        if new > old * (1 + limit) and new - old > floor:
+            fmt = format_seconds if metric.startswith('wall') else format_bytes
+            regressions.append(f"{label} {fmt(old)} -> {fmt(new)} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+def load_baseline(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description="Mancom Timer & Notes benchmarks")
+    parser.add_argument('--counts', default=','.join(map(str, DEFAULT_COUNTS)),
+                        help="comma-separated task counts (default: %(default)s)")
+    parser.add_argument('--notes', default='mixed', choices=('none', 'small', 'large', 'mixed'),
+                        help="note sizes of the synthetic tasks (default: %(default)s)")
+    parser.add_argument('--case', action='append', default=[],
+                        help="only run cases matching this glob or prefix (repeatable)")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per case")
+    parser.add_argument('--baseline', default=str(BASELINE_FILE), help="baseline JSON file")
+    parser.add_argument('--threshold', type=float, default=None,
+                        help="allowed growth before failing, e.g. 0.25 for 25%%")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="write these results to the baseline instead of comparing")
+    parser.add_argument('--list', action='store_true', help="list the cases and exit")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    counts = [int(count) for count in args.counts.split(',')]
+
+    if args.child:
+        print(json.dumps(measure(args.child, counts[0], args.notes, args.repeat)))
+        return 0
+
+    from .cases import CASES, IO_BOUND
+    names = [name for name in CASES
+             if not args.case or any(name.startswith(pattern) or fnmatch.fnmatch(name, pattern)
+                                     for pattern in args.case)]
+    if args.list or not names:
+        for name in CASES:
+            print(name)
+        return 0 if args.list else 2
+
+    baseline = None if args.save_baseline else load_baseline(args.baseline)
+    if baseline is None and not args.save_baseline:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+    threshold = args.threshold
+    if threshold is None:
+        threshold = baseline.get('threshold', DEFAULT_THRESHOLD) if baseline else DEFAULT_THRESHOLD
+    previous = baseline['results'] if baseline else {}
+
+    results = {}
+    failures = 0
+    print(f"{'case':<28} {'tasks':>7} {'wall min':>10} {'median':>10} {'allocs':>9} {'peak RSS':>9}")
+    for count in counts:
+        for name in names:
+            key = result_key(name, count, args.notes)
+            result = run_case(name, count, args.notes, args.repeat)
+            io_bound = name in IO_BOUND
+            regressions = (compare(result, previous[key], threshold, io_bound)
+                           if key in previous else [])
+            for _ in range(CONFIRM_RUNS if regressions else 0):
+                result = best_of(result, run_case(name, count, args.notes, args.repeat))
+                regressions = compare(result, previous[key], threshold, io_bound)
+                if not regressions:
+                    break
+            results[key] = result
+            line = (f"{name:<28} {count:>7} {format_seconds(result['wall_min']):>10} "
+                    f"{format_seconds(result['wall_median']):>10} "
+                    f"{format_bytes(result['alloc_peak']):>9} {format_bytes(result['peak_rss']):>9}")
+            if regressions:
+                failures += 1
+                line += "  ✗ " + "; ".join(regressions)
+            print(line)
+
+    if args.save_baseline:
+        saved = load_baseline(args.baseline) or {}
+        saved.setdefault('results', {}).update(results)
+        saved['threshold'] = threshold
+        saved['machine'] = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'recorded': datetime.now().isoformat(timespec='seconds'),
+        }
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(saved, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"✓ Baseline saved to {args.baseline}")
+        return 0
+
+    if failures:
+        print(f"✗ {failures} result(s) regressed more than {threshold * 100:.0f}% against the baseline")
+        return 1
+    if previous:
+        print(f"✓ No regressions beyond {threshold * 100:.0f}%")
+    return 0
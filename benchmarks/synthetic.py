@@ -0,0 +1,45 @@
+"""
+Synthetic task sets for benchmarks
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from mancom_core import TaskData
+
+# Note length ranges in characters, each with the share of tasks using it
+NOTE_PROFILES = {
+    'none': [((0, 0), 1.0)],
+    'small': [((40, 400), 1.0)],
+    'large': [((4000, 16000), 1.0)],
+    'mixed': [((0, 0), 0.5), ((40, 400), 0.4), ((2000, 16000), 0.1)],
+}
+
+WORDS = ("client call review invoice design draft meeting report budget sprint "
+         "deploy server backup email support ticket roadmap audit training "
+         "migration schema release notes follow up estimate contract").split()
+
+def make_tasks(count, notes='mixed', seed=0):
+    """Return count TaskData objects with deterministic names, times and notes"""
+    rng = random.Random(seed)
+    ranges, weights = zip(*NOTE_PROFILES[notes])
+    started = datetime(2024, 1, 1)
+    tasks = []
+    for i in range(count):
+        task = TaskData(str(i + 1), f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i + 1}",
+                        (started + timedelta(minutes=i)).isoformat())
+        task.elapsed_seconds = rng.randrange(0, 8 * 3600)
+        low, high = rng.choices(ranges, weights)[0]
+        task.notes = make_text(rng, rng.randint(low, high)) if high else ""
+        tasks.append(task)
+    return tasks
+
+def make_text(rng, length):
+    """Return roughly length characters of word-like text"""
+    words = []
+    size = 0
+    while size < length:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)
@@ -2,6 +2,8 @@
 Configuration and theming for Mancom Timer & Notes App
 """
 
+from functools import lru_cache
+
 # Mancom, Inc color scheme
 COLORS = {
     'primary': '#2c3e50',      # Dark blue-gray
@@ -13,15 +15,45 @@ COLORS = {
     'text': '#2c3e50',          # Dark text
     'border': '#bdc3c7',        # Light gray border
     'highlight': '#d5f4e6',     # Light green highlight
+    'info': '#2980b9',          # Blue (save)
+    'display': '#ecf0f1',       # Timer display background
+}
+
+# Palettes the stylesheet is compiled from; 'light' is the brand scheme
+THEMES = {
+    'light': COLORS,
+    'dark': {
+        'primary': '#1f2a36',
+        'accent': '#2ecc71',
+        'warning': '#d35400',
+        'danger': '#c0392b',
+        'background': '#1e1f23',
+        'surface': '#2b2b2f',
+        'text': '#ecf0f1',
+        'border': '#3a3f44',
+        'highlight': '#274b3a',
+        'info': '#2471a3',
+        'display': '#25262a',
+    },
 }
 
 # Application settings
 SETTINGS = {
-    'auto_save_interval': 30000,  # milliseconds
+    'auto_save_interval': 30000,  # milliseconds; longest unsaved changes may wait
+    'auto_save_debounce': 2000,  # milliseconds of quiet after an edit before saving
     'window_width': 1000,
     'window_height': 600,
     'data_file': 'tasks_data.json',
+    'database_file': 'tasks_data.db',
+    'storage_backend': 'journal',  # 'json', 'journal' or 'sqlite'
     'timer_update_interval': 1000,  # milliseconds
+    'checkpoint_interval': 5000,  # milliseconds; running time a crash can lose
+    'archive_after_days': 180,  # move tasks untouched this long to the archive; 0 = never
+    'journal_compact_records': 500,  # journal lines before folding into the snapshot
+    'task_page_size': 200,  # tasks read from the data store per list page
+    'notes_cache_size': 200,  # tasks whose notes stay loaded (SQLite, or large notes)
+    'task_cache_size': 1000,  # search hits read from the data store before the list pages them in
+    'asset_cache_dir': '.mancom_cache',  # pre-scaled logo renders
 }
 
 # Brand information
@@ -52,30 +84,14 @@ LABELS = {
     'notes_placeholder': 'Add notes here...',
 }
 
-def get_stylesheet(mode='system'):
+@lru_cache(maxsize=None)
+def get_stylesheet(mode='light'):
     """Return the application stylesheet for 'light' or 'dark' mode.
-    Use 'system' to let the caller choose based on OS/Qt palette."""
 
-    light = {
-        **COLORS
-    }
-
-    dark = {
-        'primary': '#1f2a36',
-        'accent': '#2ecc71',
-        'warning': '#d35400',
-        'danger': '#c0392b',
-        'background': '#1e1f23',
-        'surface': '#2b2b2f',
-        'text': '#ecf0f1',
-        'border': '#3a3f44',
-        'highlight': '#274b3a',
-    }
+    Each stylesheet is built once and cached; resolving 'system' to light or
+    dark is left to the caller, which can see the Qt palette."""
 
-    if mode == 'dark':
-        C = dark
-    else:
-        C = light
+    C = THEMES.get(mode, THEMES['light'])
 
     return f"""
         QMainWindow {{
@@ -88,6 +104,7 @@ def get_stylesheet(mode='system'):
             font-weight: bold;
             border: none;
             color: white;
+            background-color: {C['primary']};
         }}
         
         QPushButton:hover {{
@@ -114,6 +131,14 @@ def get_stylesheet(mode='system'):
             background-color: {C['danger']};
         }}
         
+        QPushButton#saveBtn {{
+            background-color: {C['info']};
+        }}
+        
+        QPushButton:disabled {{
+            background-color: {C['border']};
+        }}
+        
         QLineEdit, QTextEdit {{
             border: 1px solid {C['border']};
             border-radius: 4px;
@@ -126,18 +151,18 @@ def get_stylesheet(mode='system'):
             border: 2px solid {C['primary']};
         }}
         
-        QListWidget {{
+        QListView {{
             border: 1px solid {C['border']};
             border-radius: 4px;
             background-color: {C['surface']};
         }}
         
-        QListWidget::item {{
+        QListView::item {{
             padding: 5px;
             margin: 2px 0px;
         }}
         
-        QListWidget::item:selected {{
+        QListView::item:selected {{
             background-color: {C['primary']};
             color: white;
         }}
@@ -145,4 +170,15 @@ def get_stylesheet(mode='system'):
         QLabel {{
             color: {C['text']};
         }}
+        
+        QLabel#titleLabel {{
+            padding: 5px;
+        }}
+        
+        QLabel#timerDisplay {{
+            color: {C['accent']};
+            background-color: {C['display']};
+            padding: 10px;
+            border-radius: 5px;
+        }}
     """
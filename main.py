@@ -1,173 +1,1305 @@
+import time
+_PROCESS_STARTED = time.perf_counter()
+
 import sys
-import json
 import os
-from datetime import datetime
+import argparse
+import hashlib
+import json
+import lzma
+import threading
+from collections import OrderedDict
+from datetime import date
 from pathlib import Path
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                             QHBoxLayout, QLabel, QPushButton, QListWidget, 
-                             QListWidgetItem, QLineEdit, QTextEdit, QSplitter,
-                             QMessageBox, QSystemTrayIcon, QMenu)
-from PyQt5.QtCore import QTimer, Qt, QSize, pyqtSignal, QObject
-from PyQt5.QtGui import QIcon, QFont, QColor, QPalette, QPixmap, QPainter
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QAction, 
+                             QHBoxLayout, QLabel, QPushButton, QListView, 
+                             QLineEdit, QTextEdit, QSplitter,
+                             QMessageBox, QSystemTrayIcon, QMenu, QDialog,
+                             QComboBox, QTableWidget, QTableWidgetItem,
+                             QHeaderView, QFileDialog, QProgressDialog)
+from PyQt5.QtCore import (QTimer, Qt, QSize, QEvent, pyqtSignal, QObject,
+                          QAbstractListModel, QModelIndex, QRunnable, QThreadPool)
+from PyQt5.QtGui import QIcon, QFont, QColor, QPalette, QPixmap, QPainter, QImage
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
 import config
+from mancom_core import (TaskData, create_data_store, format_duration,
+                         TimingEngine, monotonic_now, write_json_atomic)
+from mancom_core.archive import TaskArchive, archive_cold_records
+from mancom_core.cli import find_task
+from mancom_core.heartbeat import Heartbeat
+from mancom_core.ids import IdAllocator
+from mancom_core.locking import FileLock
+from mancom_core.registry import SortedTasks, TaskRegistry
+from mancom_core.search import SearchIndex, token_counts
+from mancom_core.storage import TaskPager, data_file_path
+from mancom_core.transfer import TaskImporter, detect_format, write_records
+from mancom_core.sessions import SessionLog
+from mancom_core.instrument import recorder
+
+LOGO_NAMES = ['mancominc.png', 'logo.png', 'logo.jpg', 'logo.jpeg', 'mancom.png', 'mancom.jpg', 'mancom.gif']
+LOGO_HEIGHT = 64
+
+def find_asset(*names):
+    """Return the first existing path for any of names, or None.
+
+    Looks in the working directory and then next to this file; the working
+    directory is tried first so a custom logo or icon can override the
+    bundled one.
+    """
+    folders = [Path.cwd()]
+    if Path(__file__).parent.resolve() != folders[0].resolve():
+        folders.append(Path(__file__).parent)
+    for name in names:
+        for folder in folders:
+            path = folder / name
+            if path.exists():
+                return path
+    return None
+
+class StartupProfile:
+    """Records how long each startup phase takes, for the console summary"""
+    def __init__(self, started=_PROCESS_STARTED):
+        self._last = self._started = started
+        self.phases = []  # (name, seconds)
+    
+    def mark(self, name):
+        """Close the current phase under name"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+    
+    def elapsed(self):
+        return time.perf_counter() - self._started
+    
+    def summary(self):
+        total = sum(seconds for _, seconds in self.phases)
+        parts = ", ".join(f"{name} {seconds * 1000:.0f}" for name, seconds in self.phases)
+        return f"{total * 1000:.0f} ms ({parts})"
+
+class _LogoSignals(QObject):
+    loaded = pyqtSignal(QImage, str)  # image, source file name
+
+class LogoLoader(QRunnable):
+    """Finds, composites and scales the logo off the GUI thread.
+
+    The finished image is cached as a PNG keyed by the source file's content
+    hash and mtime, so later launches only read one small file. Only QImage
+    is used here; QPixmap may not be touched outside the GUI thread.
+    """
+    CACHE_VERSION = 1
+    
+    def __init__(self, cache_dir, height=LOGO_HEIGHT):
+        super().__init__()
+        self.cache_dir = Path(cache_dir)
+        self.height = height
+        self.signals = _LogoSignals()
+    
+    def run(self):
+        path = find_asset(*LOGO_NAMES)
+        if path is None:
+            return
+        try:
+            data = path.read_bytes()
+            key = hashlib.sha1(data).hexdigest()[:16]
+            mtime = path.stat().st_mtime_ns
+        except OSError as e:
+            print(f"Warning: Error loading logo: {e}")
+            return
+        cached = self.cache_dir / f"logo-{key}-{mtime}-{self.height}-v{self.CACHE_VERSION}.png"
+        
+        image = QImage(str(cached)) if cached.exists() else QImage()
+        if image.isNull():
+            image = self.render(data)
+            if image is None:
+                print(f"Warning: Could not load image from {path}")
+                return
+            self.store(cached, image)
+        self.signals.loaded.emit(image, path.name)
+    
+    def render(self, data):
+        """Decode, flatten onto white and scale the logo; None if unreadable"""
+        image = QImage.fromData(data)
+        if image.isNull():
+            return None
+        # Handle transparency: composite onto white background if needed
+        if image.hasAlphaChannel():
+            background = QImage(image.size(), QImage.Format_RGB32)
+            background.fill(Qt.white)
+            painter = QPainter(background)
+            painter.drawImage(0, 0, image)
+            painter.end()
+            image = background
+        return image.scaledToHeight(self.height, Qt.SmoothTransformation)
+    
+    def store(self, cached, image):
+        """Write the rendered logo to the cache, dropping older renders"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            for stale in self.cache_dir.glob("logo-*.png"):
+                stale.unlink()
+            temp = cached.with_name(cached.name + ".tmp")
+            if image.save(str(temp), "PNG"):
+                os.replace(temp, cached)
+        except OSError as e:
+            print(f"Warning: Could not cache logo: {e}")
 
 class TimerManager(QObject):
-    """Manages timers for individual tasks"""
-    time_updated = pyqtSignal(str, int)  # task_id, elapsed_seconds
+    """Qt front end for the core TimingEngine.
+
+    Adds signals and one shared QTimer that drives UI refreshes while a task
+    is running; all timekeeping is done by the engine, so the ticker can be
+    stopped at any time without losing a second.
     
-    def __init__(self):
+    The ticker is a single-shot timer re-armed for the instant the running
+    task's elapsed time reaches its next whole interval, which is when the
+    displayed seconds change. It only runs while the UI is visible (see
+    set_ui_visible).
+    
+    With a Heartbeat set, the running task is also checkpointed every
+    checkpoint_interval, visible or not, so a killed process loses at most
+    that much time.
+    """
+    time_updated = pyqtSignal(str, int)  # task_id, unsaved elapsed_seconds
+    session_finished = pyqtSignal(str, float, float)  # task_id, wall start, wall end
+    
+    def __init__(self, clock=monotonic_now):
         super().__init__()
-        self.timers = {}
-        self.current_task_id = None
+        self.engine = TimingEngine(clock, on_session_finished=self.session_finished.emit)
+        self.ui_visible = True
+        self._step = config.SETTINGS['timer_update_interval'] / 1000
+        
+        self._ticker = QTimer(self)
+        self._ticker.setSingleShot(True)
+        # A coarse timer may fire a little early, before the display changes
+        self._ticker.setTimerType(Qt.PreciseTimer)
+        self._ticker.timeout.connect(self._tick)
+        
+        self.heartbeat = None
+        self._checkpointer = QTimer(self)
+        self._checkpointer.setInterval(config.SETTINGS['checkpoint_interval'])
+        self._checkpointer.timeout.connect(self.checkpoint)
+    
+    @property
+    def current_task_id(self):
+        return self.engine.current_task_id
         
     def start_task(self, task_id):
         """Start or resume a task timer"""
-        if self.current_task_id and self.current_task_id != task_id:
-            self.pause_task(self.current_task_id)
-        
-        self.current_task_id = task_id
-        
-        if task_id not in self.timers:
-            self.timers[task_id] = {'elapsed': 0, 'running': False, 'qt_timer': QTimer()}
-            self.timers[task_id]['qt_timer'].timeout.connect(
-                lambda: self._tick_task(task_id)
-            )
-        
-        self.timers[task_id]['running'] = True
-        self.timers[task_id]['qt_timer'].start(1000)  # Update every second
+        already_running = self.engine.is_running(task_id)
+        self.engine.start_task(task_id)
+        self._schedule_tick()
+        if self.heartbeat is not None and not already_running:
+            _, session_start, now = self.engine.running_session()
+            self.heartbeat.start(task_id, session_start, now)
+            self._checkpointer.start()
         
     def pause_task(self, task_id):
         """Pause a task timer"""
-        if task_id in self.timers:
-            self.timers[task_id]['running'] = False
-            self.timers[task_id]['qt_timer'].stop()
+        self.engine.pause_task(task_id)
+        if self.engine.current_task_id is None:
+            self._stopped()
+    
+    def remove_task(self, task_id):
+        """Stop a task (if running) and forget its unsaved time"""
+        self.engine.remove_task(task_id)
+        if self.engine.current_task_id is None:
+            self._stopped()
+    
+    def _stopped(self):
+        self._ticker.stop()
+        self._checkpointer.stop()
+        if self.heartbeat is not None:
+            self.heartbeat.stop()
+    
+    def checkpoint(self):
+        """Record in the heartbeat that the running task is still running"""
+        session = self.engine.running_session()
+        if session is not None and self.heartbeat is not None:
+            self.heartbeat.checkpoint(session[2])
+    
+    def is_running(self, task_id):
+        """Return True if task_id is the task currently being timed"""
+        return self.engine.is_running(task_id)
     
-    def _tick_task(self, task_id):
-        """Internal tick for a task"""
-        if task_id in self.timers:
-            self.timers[task_id]['elapsed'] += 1
-            self.time_updated.emit(task_id, self.timers[task_id]['elapsed'])
+    def running_session(self):
+        """Return (task_id, wall start, wall now) for the running task, or None"""
+        return self.engine.running_session()
     
     def get_elapsed_time(self, task_id):
-        """Get elapsed time in seconds"""
-        if task_id in self.timers:
-            return self.timers[task_id]['elapsed']
-        return 0
-    
-    def set_elapsed_time(self, task_id, seconds):
-        """Set elapsed time for a task"""
-        if task_id not in self.timers:
-            self.timers[task_id] = {'elapsed': seconds, 'running': False, 'qt_timer': QTimer()}
-            self.timers[task_id]['qt_timer'].timeout.connect(
-                lambda: self._tick_task(task_id)
-            )
+        """Get unsaved elapsed time in whole seconds"""
+        return self.engine.get_elapsed_time(task_id)
+    
+    def collect_elapsed(self):
+        """Return and clear the whole seconds accrued per task since the last call.
+
+        The second value is the running session as of now, to pass to
+        mark_saved() once the collected time has been written.
+        """
+        return self.engine.collect_elapsed(), self.engine.running_session()
+    
+    def mark_saved(self, session):
+        """Record in the heartbeat that session's time up to its end is on disk"""
+        running = self.engine.running_session()
+        # A later session of the same task has a different start
+        if running is not None and running[:2] == session[:2] and self.heartbeat is not None:
+            self.heartbeat.saved(session[2])
+    
+    def add_elapsed(self, task_id, seconds):
+        """Credit a task with time tracked elsewhere (e.g. recovered after a crash)"""
+        self.engine.add_elapsed(task_id, seconds)
+    
+    def set_ui_visible(self, visible):
+        """Tick only while the UI can be seen; catch up once when it reappears"""
+        if visible == self.ui_visible:
+            return
+        self.ui_visible = visible
+        if visible:
+            self._tick()
+        else:
+            self._ticker.stop()
+    
+    def _schedule_tick(self):
+        remaining = self.engine.time_to_next_step(self.current_task_id, self._step)
+        if remaining is None or not self.ui_visible:
+            self._ticker.stop()
+            return
+        # Round up so the tick lands just after the boundary, never before
+        self._ticker.start(int(remaining * 1000) + 1)
+    
+    @recorder.timed('tick')
+    def _tick(self):
+        """Shared UI ticker: report the running task's current total"""
+        if self.current_task_id is not None:
+            self.time_updated.emit(self.current_task_id, self.get_elapsed_time(self.current_task_id))
+        self._schedule_tick()
+
+class _SaveSignals(QObject):
+    finished = pyqtSignal(bool, object)  # True if the save was written, note hashes computed by id
+    failed = pyqtSignal(object, object, str)  # changed_ids, deleted_ids, error
+
+class _SaveJob(QRunnable):
+    """Runs one DataStore.save on a pool thread"""
+    def __init__(self, store, snapshots, changed_ids, deleted_ids, signals):
+        super().__init__()
+        self.store = store
+        self.snapshots = snapshots
+        self.changed_ids = changed_ids
+        self.deleted_ids = deleted_ids
+        self.signals = signals
+    
+    def run(self):
+        written = False
+        try:
+            with recorder.span('store.save'):
+                self.store.save(self.snapshots, self.changed_ids, self.deleted_ids)
+            written = True
+        except Exception as e:
+            self.signals.failed.emit(self.changed_ids, self.deleted_ids, str(e))
+        finally:
+            self.signals.finished.emit(written, self.store.notes.take_hashed())
+
+class BackgroundSaver(QObject):
+    """Runs DataStore saves on a worker thread, coalescing overlapping requests.
+
+    Callers hand over TaskSnapshots taken on the GUI thread. While a save is
+    in flight, further requests merge into a single pending one that is
+    written as soon as the current save finishes. A save may carry the
+    running session it includes time for; saved emits it, with the written
+    snapshots and the note hashes the store computed, once they are on disk.
+    """
+    save_failed = pyqtSignal(object, object, str)  # changed_ids, deleted_ids, error
+    # snapshots written by id, note hashes computed by id, the session passed to save()
+    saved = pyqtSignal(object, object, object)
+    
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._signals = _SaveSignals()
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self.save_failed)
+        self._busy = False
+        self._pending = None  # (snapshots by id, changed_ids, deleted_ids)
+        self._pending_session = None
+        self._saving = None  # (snapshots by id, session) being written
+    
+    def save(self, snapshots, changed_ids, deleted_ids, session=None):
+        """Queue a save of the given snapshots"""
+        if self._pending is None:
+            self._pending = ({}, set(), set())
+        if session is not None:
+            self._pending_session = session
+        pending_snapshots, pending_changed, pending_deleted = self._pending
+        if not self.store.incremental:
+            # Full stores receive every task each time; only the latest counts
+            pending_snapshots.clear()
+        pending_snapshots.update((snapshot.id, snapshot) for snapshot in snapshots)
+        pending_changed |= set(changed_ids)
+        pending_deleted |= set(deleted_ids)
+        for task_id in pending_deleted:
+            pending_snapshots.pop(task_id, None)
+        pending_changed -= pending_deleted
+        
+        if not self._busy:
+            self._start_pending()
+    
+    def wait(self):
+        """Block until every requested save has been written"""
+        self._pool.waitForDone()
+        if self._pending is not None:
+            snapshots, changed_ids, deleted_ids = self._pending
+            session, self._pending_session = self._pending_session, None
+            self._pending = None
+            self.store.save(list(snapshots.values()), changed_ids, deleted_ids)
+            self.saved.emit(snapshots, self.store.notes.take_hashed(), session)
+    
+    def _start_pending(self):
+        snapshots, changed_ids, deleted_ids = self._pending
+        self._saving = (snapshots, self._pending_session)
+        self._pending_session = None
+        self._pending = None
+        self._busy = True
+        self._pool.start(_SaveJob(self.store, list(snapshots.values()),
+                                  changed_ids, deleted_ids, self._signals))
+    
+    def _on_finished(self, written, hashed):
+        (snapshots, session), self._saving = self._saving, None
+        self._busy = False
+        if written:
+            self.saved.emit(snapshots, hashed, session)
+        if self._pending is not None:
+            self._start_pending()
+
+class _TransferSignals(QObject):
+    batch = pyqtSignal(object, object)  # imported TaskData, their search token counts
+    progress = pyqtSignal(float)  # 0.0 - 1.0
+    finished = pyqtSignal(str)  # summary
+    failed = pyqtSignal(str)
+
+class _ImportJob(QRunnable):
+    """Reads an archive on a pool thread and hands its tasks over in batches.
+    
+    At most MAX_QUEUED_BATCHES batches wait on the GUI thread at a time, so
+    a fast reader cannot queue up the whole archive in memory.
+    """
+    MAX_QUEUED_BATCHES = 2
+    
+    def __init__(self, importer, signals):
+        super().__init__()
+        self.importer = importer
+        self.signals = signals
+        self.cancelled = False
+        self._slots = threading.Semaphore(self.MAX_QUEUED_BATCHES)
+    
+    def cancel(self):
+        self.cancelled = True
+    
+    def batch_done(self):
+        """Called by the receiver once it has taken a batch in"""
+        self._slots.release()
+    
+    def run(self):
+        try:
+            for batch in self.importer.batches():
+                while not self._slots.acquire(timeout=0.1):
+                    if self.cancelled:
+                        break
+                if self.cancelled:
+                    self.signals.finished.emit("Import cancelled; " + self.importer.summary())
+                    return
+                # Tokenizing is the costly part of indexing; do it here
+                counts = [token_counts(task.name, task.notes) for task in batch]
+                self.signals.batch.emit(batch, counts)
+                self.signals.progress.emit(self.importer.bytes_read / max(self.importer.size, 1))
+        except (OSError, ValueError) as e:
+            self.signals.failed.emit(f"{e} ({self.importer.imported} task(s) were imported before the error)")
+            return
+        self.signals.finished.emit(self.importer.summary())
+
+class _ExportJob(QRunnable):
+    """Streams the saved tasks from the data store to a file on a pool thread"""
+    def __init__(self, store, path, total, signals):
+        super().__init__()
+        self.store = store
+        self.path = path
+        self.total = total
+        self.signals = signals
+        self.cancelled = False
+    
+    def cancel(self):
+        self.cancelled = True
+    
+    def run(self):
+        try:
+            count = write_records(self.path, self._records())
+        except InterruptedError:
+            self.signals.finished.emit("Export cancelled")
+        except (OSError, ValueError) as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(f"Exported {count} task(s) to {Path(self.path).name}")
+    
+    def _records(self):
+        for count, record in enumerate(self.store.iter_records(), 1):
+            yield record
+            if count % 1000 == 0:
+                if self.cancelled:
+                    # Unwinds write_records, which removes the partial file
+                    raise InterruptedError
+                self.signals.progress.emit(count / max(self.total, 1))
+
+class _ArchiveSignals(QObject):
+    finished = pyqtSignal()
+
+class _ArchiveJob(QRunnable):
+    """Copies long-untouched tasks into the archive on a pool thread.
+
+    The job reads the data store but never writes it: the app deletes the
+    archived tasks itself once it has seen which they are. archived (or
+    error) is set and done is signalled once the archive is written.
+    """
+    def __init__(self, store, days, keep_ids, signals):
+        super().__init__()
+        self.store = store
+        self.days = days
+        self.keep_ids = keep_ids
+        self.signals = signals
+        self.archived = []
+        self.error = None
+        self.done = threading.Event()
+    
+    def run(self):
+        try:
+            # Its own archive and session log, since the app uses theirs meanwhile
+            archive = TaskArchive(self.store.sidecar('.archive')).load()
+            session_log = SessionLog(self.store.sidecar('.sessions')).load()
+            self.archived = archive_cold_records(self.store, archive, session_log, self.days,
+                                                 keep_ids=self.keep_ids)
+        except (OSError, ValueError, KeyError, lzma.LZMAError) as e:
+            self.error = str(e)
+        self.done.set()
+        self.signals.finished.emit()
+
+class AutosaveScheduler(QObject):
+    """Decides when unsaved changes are written.
+
+    Nothing is scheduled while there is nothing to save. Each edit restarts
+    a short debounce timer so typing does not trigger writes, and the first
+    unsaved change arms a deadline so work is never left unsaved longer than
+    the maximum latency. flush() saves immediately at idle points.
+    """
+    def __init__(self, save_callback, debounce_ms=None, max_latency_ms=None, parent=None):
+        super().__init__(parent)
+        self.save_callback = save_callback
+        if debounce_ms is None:
+            debounce_ms = config.SETTINGS['auto_save_debounce']
+        if max_latency_ms is None:
+            max_latency_ms = config.SETTINGS['auto_save_interval']
+        
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(debounce_ms)
+        self._debounce.timeout.connect(self._fire)
+        
+        self._deadline = QTimer(self)
+        self._deadline.setSingleShot(True)
+        self._deadline.setInterval(max_latency_ms)
+        self._deadline.timeout.connect(self._fire)
+    
+    @property
+    def pending(self):
+        """True if a save is scheduled"""
+        return self._debounce.isActive() or self._deadline.isActive()
+    
+    def mark_changed(self, debounce=True):
+        """Schedule a save for a new change.
+
+        debounce=False only arms the deadline, for changes such as running
+        time that accrue continuously.
+        """
+        if debounce:
+            self._debounce.start()
+        if not self._deadline.isActive():
+            self._deadline.start()
+    
+    def flush(self):
+        """Save now if anything is scheduled"""
+        if self.pending:
+            self.save_callback()
+    
+    def clear(self):
+        """Forget scheduled saves after changes were written"""
+        self._debounce.stop()
+        self._deadline.stop()
+    
+    def _fire(self):
+        self.clear()
+        self.save_callback()
+
+class NotesCache:
+    """Keeps the notes of the most recently used tasks loaded.
+
+    Notes the store can read back on demand, by task id (SQLite) or by
+    hash from the note pack, are dropped again once more than capacity
+    tasks have been used since. Task ids passed to pin() keep their notes:
+    those were edited, and the store may not have them yet. saved() lets
+    them go again once the edited notes are on disk.
+    """
+    def __init__(self, loader, capacity, pack=None):
+        self.loader = loader
+        self.pack = pack
+        self.capacity = capacity
+        self._tasks = OrderedDict()
+        self._pinned = set()
+    
+    def touch(self, task):
+        """Record that task's notes were just read"""
+        self._tasks[task.id] = task
+        self._tasks.move_to_end(task.id)
+        while len(self._tasks) > self.capacity:
+            task_id, evicted = self._tasks.popitem(last=False)
+            if task_id in self._pinned or not evicted.notes_loaded:
+                continue
+            if evicted.notes_hash is not None and self.pack is not None:
+                self.pack.retain(evicted.notes_hash)
+                evicted.defer_notes(self.pack.read, evicted.notes_hash)
+            elif self.loader is not None:
+                evicted.defer_notes(self.loader)
+    
+    def pin(self, task_id):
+        self._pinned.add(task_id)
+    
+    def saved(self, snapshots, tasks):
+        """Unpin tasks whose notes were written, unless they changed again since"""
+        for task_id in [task_id for task_id in self._pinned if task_id in snapshots]:
+            task = tasks.get(task_id)
+            if task is not None and task.notes_loaded and task.notes is not snapshots[task_id].notes:
+                continue
+            self._pinned.discard(task_id)
+            if task is not None and task_id not in self._tasks:
+                # Dropped from the order while pinned; evict it first
+                self._tasks[task_id] = task
+                self._tasks.move_to_end(task_id, last=False)
+    
+    def discard(self, task_id):
+        self._tasks.pop(task_id, None)
+        self._pinned.discard(task_id)
+
+class TaskCache:
+    """LRU of tasks decoded straight from the data store, by id.
+    
+    Search hits the list has not paged in yet are read with the store's
+    get_tasks(); the capacity most recently shown stay decoded, so typing a
+    query does not read the same tasks again on every keystroke. Ids the
+    store did not have are remembered too.
+    """
+    def __init__(self, loader, capacity):
+        self.loader = loader
+        self.capacity = capacity
+        self._tasks = OrderedDict()  # task id -> TaskData, or None if not stored
+    
+    def get_many(self, task_ids):
+        """Return the stored tasks with the given ids, keyed by id; misses are read in one batch"""
+        found = {}
+        missing = []
+        for task_id in task_ids:
+            if task_id in self._tasks:
+                self._tasks.move_to_end(task_id)
+                if self._tasks[task_id] is not None:
+                    found[task_id] = self._tasks[task_id]
+            else:
+                missing.append(task_id)
+        if missing:
+            loaded = self.loader(missing)
+            for task_id in missing:
+                self._tasks[task_id] = loaded.get(task_id)
+            found.update(loaded)
+            while len(self._tasks) > self.capacity:
+                self._tasks.popitem(last=False)
+        return found
+    
+    def discard(self, task_id):
+        self._tasks.pop(task_id, None)
+    
+    def clear(self):
+        self._tasks.clear()
+
+class TaskListModel(QAbstractListModel):
+    """List model over a TaskRegistry with per-row change notification.
+
+    The model shares the application's registry, so rows are registry
+    positions and a timer tick can repaint just the running row (found by
+    id in O(log n)) instead of rebuilding the whole view.
+    
+    With a TaskPager set, rows are read from the data store a page at a
+    time as the view scrolls towards the end (canFetchMore/fetchMore).
+    Tasks appended before the pager is done stay last: later pages are
+    inserted ahead of them, so the list keeps the order they are stored in.
+    """
+    TaskRole = Qt.UserRole + 1
+    
+    def __init__(self, timer_manager, parent=None):
+        super().__init__(parent)
+        self.timer_manager = timer_manager
+        self._tasks = TaskRegistry()
+        self._pager = None
+        # Ids of tasks appended while the pager still had rows to read
+        self._appended = []
+        self._running_brush = QColor(config.COLORS['highlight'])
+    
+    def set_highlight(self, color):
+        """Change the running-task background, repainting only that row"""
+        self._running_brush = color
+        if self.timer_manager.current_task_id is not None:
+            self.refresh_task(self.timer_manager.current_task_id)
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._tasks)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        task = self._tasks.at(index.row())
+        if role == Qt.DisplayRole:
+            total_seconds = task.elapsed_seconds + self.timer_manager.get_elapsed_time(task.id)
+            status = "▶ " if self.timer_manager.is_running(task.id) else "⏸ "
+            return f"{status}{task.name} [{format_duration(total_seconds)}]"
+        if role == Qt.BackgroundRole:
+            if self.timer_manager.is_running(task.id):
+                return self._running_brush
+            return None
+        if role == self.TaskRole:
+            return task
+        return None
+    
+    def set_tasks(self, tasks):
+        """Replace the model contents with a (shared) TaskRegistry or a list of tasks"""
+        self.beginResetModel()
+        self._tasks = tasks if isinstance(tasks, TaskRegistry) else TaskRegistry(tasks)
+        self._appended = []
+        self.endResetModel()
+    
+    def set_pager(self, pager):
+        """Read further rows from pager when the view asks for more"""
+        self._pager = pager
+        self._appended = []
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._pager is None:
+            return False
+        return self._pager.has_more()
+    
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._pager is None:
+            return
+        self._append_new(self._pager.next_page())
+    
+    def fetch_all(self):
+        """Read every row the pager has left, in one insertion"""
+        if self._pager is not None and self._pager.has_more():
+            self._append_new(self._pager.read_all())
+    
+    def fetch_until(self, task_id):
+        """Read pages until task_id is listed; return its task, or None if not stored"""
+        while task_id not in self._tasks and self.canFetchMore():
+            self.fetchMore()
+        return self._tasks.get(task_id)
+    
+    def _append_new(self, tasks):
+        # The data file may list a task added here since paging started
+        tasks = [task for task in tasks if task.id not in self._tasks]
+        appended = [self._tasks.get(task_id) for task_id in self._appended
+                    if task_id in self._tasks]
+        self._appended = [task.id for task in appended] if self.canFetchMore() else []
+        if not tasks:
+            return
+        # Insert the page before the tasks appended here, which moves
+        # them back to the end of the registry
+        row = len(self._tasks) - len(appended)
+        self.beginInsertRows(QModelIndex(), row, row + len(tasks) - 1)
+        for task in tasks:
+            self._tasks.add(task)
+        for task in appended:
+            self._tasks.remove(task.id)
+            self._tasks.add(task)
+        self.endInsertRows()
+    
+    def append_task(self, task):
+        """Append a task to the shared registry and view"""
+        row = len(self._tasks)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._tasks.add(task)
+        self.endInsertRows()
+        if self.canFetchMore():
+            self._appended.append(task.id)
+    
+    def append_tasks(self, tasks):
+        """Append several tasks with a single row insertion"""
+        if not tasks:
+            return
+        row = len(self._tasks)
+        self.beginInsertRows(QModelIndex(), row, row + len(tasks) - 1)
+        for task in tasks:
+            self._tasks.add(task)
+        self.endInsertRows()
+    
+    def remove_task(self, task):
+        """Remove a task from the shared registry and view"""
+        row = self._tasks.position(task.id)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self._tasks.remove(task.id)
+        self.endRemoveRows()
+    
+    def task_at(self, row):
+        """Return the task shown at a view row"""
+        return self._tasks.at(row)
+    
+    def task_by_id(self, task_id):
+        """Return the task with the given id, or None"""
+        return self._tasks.get(task_id)
+    
+    def row_of(self, task_id):
+        """Return the view row showing task_id, or None"""
+        return self._tasks.position(task_id)
+    
+    def refresh_task(self, task_id):
+        """Notify views that one task's text/status changed"""
+        row = self._tasks.position(task_id)
+        if row is None:
+            return
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.BackgroundRole])
+
+class TaskSortFilterModel(TaskListModel):
+    """Sorted and filtered view of the rows of another TaskListModel.
+
+    Rows are held in a SortedTasks with each task's sort key computed once.
+    Rows the source inserts, removes or changes are applied one at a time:
+    a changed task (the running one, every tick when sorting by time) is
+    moved to its new row by binary search instead of re-sorting the rest.
+    The view only follows the source while active(), i.e. while a sort
+    other than the source order or a filter is selected.
+    Tasks the source has not paged in yet are sorted in as it reads them.
+    """
+    # name: (label, key(model, task), descending)
+    SORTS = {
+        'order': ("Order added", lambda model, task: model._sequence[task.id], False),
+        'name': ("Name", lambda model, task: task.name.casefold(), False),
+        'time': ("Most time", lambda model, task: model.total_seconds(task), True),
+        'created': ("Newest first", lambda model, task: task.created_at, True),
+    }
+    FILTERS = {
+        'all': "All tasks",
+        'running': "Running",
+        'today': "Worked on today",
+    }
+    
+    def __init__(self, source, session_log, parent=None):
+        super().__init__(source.timer_manager, parent)
+        self.source = source
+        self.session_log = session_log
+        self.sort = 'order'
+        self.filter = 'all'
+        # Source order, for the 'order' sort; ids are numbered as first seen
+        self._sequence = {}
+        self._next_sequence = 0
+        source.rowsInserted.connect(self._on_rows_inserted)
+        source.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+        source.modelReset.connect(self.rebuild)
+        source.dataChanged.connect(self._on_data_changed)
+    
+    def active(self):
+        return self.sort != 'order' or self.filter != 'all'
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        # Pages the source reads are sorted in as they arrive
+        return self.source.canFetchMore(parent)
+    
+    def fetchMore(self, parent=QModelIndex()):
+        self.source.fetchMore(parent)
+    
+    def set_view(self, sort, task_filter):
+        """Select a sort (a SORTS key) and filter (a FILTERS key) and rebuild"""
+        self.sort = sort
+        self.filter = task_filter
+        self.rebuild()
+    
+    def rebuild(self):
+        """Re-sort every row of the source; the only full sort"""
+        self.beginResetModel()
+        if self.active():
+            tasks = [self.source.task_at(row) for row in range(self.source.rowCount())]
+            self._sequence = {task.id: number for number, task in enumerate(tasks)}
+            self._next_sequence = len(tasks)
+            _, key, descending = self.SORTS[self.sort]
+            accept = None if self.filter == 'all' else self._accept
+            self._tasks = SortedTasks(lambda task: key(self, task), accept, descending, tasks)
         else:
-            self.timers[task_id]['elapsed'] = seconds
-
-class TaskData:
-    """Data model for a task"""
-    def __init__(self, task_id, name, created_at=None):
-        self.id = task_id
-        self.name = name
-        self.created_at = created_at or datetime.now().isoformat()
-        self.notes = ""
-        self.elapsed_seconds = 0
-        
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'created_at': self.created_at,
-            'notes': self.notes,
-            'elapsed_seconds': self.elapsed_seconds
-        }
+            self._sequence = {}
+            self._next_sequence = 0
+            self._tasks = TaskRegistry()
+        self.endResetModel()
+    
+    def total_seconds(self, task):
+        return task.elapsed_seconds + self.timer_manager.get_elapsed_time(task.id)
+    
+    def _accept(self, task):
+        if self.timer_manager.is_running(task.id):
+            return True
+        if self.filter != 'today':
+            return False
+        today = date.today()
+        return (task.created_date == today.isoformat()
+                or self.session_log.day_total(today, task.id) > 0)
+    
+    def update_task(self, task):
+        """Move, insert or remove task's row after its key or filter result changed"""
+        old, new = self._tasks.plan(task)
+        if old is None and new is None:
+            return
+        if old is None:
+            self.beginInsertRows(QModelIndex(), new, new)
+            self._tasks.update(task)
+            self.endInsertRows()
+        elif new is None:
+            self.beginRemoveRows(QModelIndex(), old, old)
+            self._tasks.discard(task.id)
+            self.endRemoveRows()
+        elif old == new:
+            self._tasks.update(task)
+            index = self.index(new)
+            self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.BackgroundRole])
+        else:
+            # Qt counts the destination as the row to insert before
+            self.beginMoveRows(QModelIndex(), old, old, QModelIndex(), new + 1 if new > old else new)
+            self._tasks.update(task)
+            self.endMoveRows()
+    
+    def _on_rows_inserted(self, parent, first, last):
+        if not self.active():
+            return
+        # Rows after the insertion are tasks added while the source was
+        # still paging; they are numbered again so they stay last
+        for row in range(first, self.source.rowCount()):
+            task = self.source.task_at(row)
+            # A counter, not len(): renumbered ids are already in _sequence
+            self._sequence[task.id] = self._next_sequence
+            self._next_sequence += 1
+            self.update_task(task)
+    
+    def _on_rows_about_to_be_removed(self, parent, first, last):
+        if not self.active():
+            return
+        for row in range(first, last + 1):
+            task_id = self.source.task_at(row).id
+            position = self._tasks.position(task_id)
+            if position is not None:
+                self.beginRemoveRows(QModelIndex(), position, position)
+                self._tasks.discard(task_id)
+                self.endRemoveRows()
+    
+    def _on_data_changed(self, top_left, bottom_right, roles=()):
+        if not self.active():
+            return
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            self.update_task(self.source.task_at(row))
+
+class ReportDialog(QDialog):
+    """Daily/weekly/monthly time totals per task with CSV/Markdown export"""
+    def __init__(self, app_window):
+        super().__init__(app_window)
+        self.app_window = app_window
+        self.report = None
+        self.setWindowTitle("Time Report")
+        self.resize(560, 480)
+        
+        # Imported here so startup never pays for NumPy
+        from mancom_core import reports
+        
+        layout = QVBoxLayout(self)
+        
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Group by:"))
+        self.period_combo = QComboBox()
+        for period in reports.PERIODS:
+            self.period_combo.addItem(period.title(), period)
+        self.period_combo.currentIndexChanged.connect(self.refresh)
+        controls.addWidget(self.period_combo)
+        controls.addStretch()
+        self.total_label = QLabel()
+        controls.addWidget(self.total_label)
+        layout.addLayout(controls)
+        
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["Period", "Task", "Time"])
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+        
+        buttons = QHBoxLayout()
+        csv_btn = QPushButton("Export CSV...")
+        csv_btn.clicked.connect(lambda: self.export('csv'))
+        buttons.addWidget(csv_btn)
+        markdown_btn = QPushButton("Export Markdown...")
+        markdown_btn.clicked.connect(lambda: self.export('md'))
+        buttons.addWidget(markdown_btn)
+        buttons.addStretch()
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+        
+        self.refresh()
+    
+    def refresh(self):
+        """Rebuild the report for the selected period"""
+        from mancom_core import reports
+        running = self.app_window.timer_manager.running_session()
+        self.app_window.ensure_all_tasks()
+        task_names = self.app_window.archive.names()
+        task_names.update((task.id, task.name) for task in self.app_window.tasks)
+        self.report = reports.build_report(
+            self.app_window.session_log, self.period_combo.currentData(),
+            task_names=task_names, extra_sessions=[running] if running else ()
+        )
+        rows = self.report.rows()
+        self.table.setUpdatesEnabled(False)
+        self.table.setRowCount(len(rows))
+        for row, (label, _, name, seconds) in enumerate(rows):
+            self.table.setItem(row, 0, QTableWidgetItem(label))
+            self.table.setItem(row, 1, QTableWidgetItem(name))
+            time_item = QTableWidgetItem(reports.format_hours(seconds))
+            time_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            self.table.setItem(row, 2, time_item)
+        self.table.setUpdatesEnabled(True)
+        self.total_label.setText(f"Total: {reports.format_hours(self.report.total())}")
+    
+    def export(self, fmt):
+        """Save the current report as CSV or Markdown"""
+        if fmt == 'csv':
+            path, _ = QFileDialog.getSaveFileName(self, "Export CSV", "time_report.csv",
+                                                  "CSV files (*.csv)")
+            content = self.report.to_csv() if path else None
+        else:
+            path, _ = QFileDialog.getSaveFileName(self, "Export Markdown", "time_report.md",
+                                                  "Markdown files (*.md)")
+            content = self.report.to_markdown() if path else None
+        if not path:
+            return
+        try:
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write(content)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Could not export report: {e}")
+
+class EventLoopProbe(QObject):
+    """Measures event-loop lag: how late a short repeating timer fires"""
+    INTERVAL_MS = 100
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.INTERVAL_MS)
+        self._timer.timeout.connect(self._check)
+        self._last = None
+    
+    def start(self):
+        self._last = time.perf_counter()
+        self._timer.start()
+    
+    def _check(self):
+        now = time.perf_counter()
+        recorder.observe('event_loop.lag', max(0.0, now - self._last - self.INTERVAL_MS / 1000))
+        self._last = now
+
+class DiagnosticsDialog(QDialog):
+    """Span timings, event-loop lag and recent slow operations"""
+    SPAN_COLUMNS = ["Span", "Count", "p50", "p95", "Max"]
+    
+    def __init__(self, app_window):
+        super().__init__(app_window)
+        self.app_window = app_window
+        self.setWindowTitle("Diagnostics")
+        self.resize(620, 520)
+        
+        layout = QVBoxLayout(self)
+        
+        self.lag_label = QLabel()
+        layout.addWidget(self.lag_label)
+        
+        self.span_table = QTableWidget(0, len(self.SPAN_COLUMNS))
+        self.span_table.setHorizontalHeaderLabels(self.SPAN_COLUMNS)
+        self.span_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.span_table.verticalHeader().setVisible(False)
+        self.span_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.span_table, 2)
+        
+        layout.addWidget(QLabel(f"Slow operations (≥ {recorder.slow_threshold * 1000:.0f} ms):"))
+        self.slow_table = QTableWidget(0, 3)
+        self.slow_table.setHorizontalHeaderLabels(["Time", "Span", "Duration"])
+        self.slow_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.slow_table.verticalHeader().setVisible(False)
+        self.slow_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.slow_table, 1)
+        
+        buttons = QHBoxLayout()
+        trace_btn = QPushButton("Save Trace...")
+        trace_btn.clicked.connect(self.save_trace)
+        buttons.addWidget(trace_btn)
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self.reset)
+        buttons.addWidget(reset_btn)
+        buttons.addStretch()
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+        
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setInterval(1000)
+        self._refresh_timer.timeout.connect(self.refresh)
+        self._refresh_timer.start()
+        self.refresh()
     
     @staticmethod
-    def from_dict(data):
-        task = TaskData(data['id'], data['name'], data['created_at'])
-        task.notes = data.get('notes', '')
-        task.elapsed_seconds = data.get('elapsed_seconds', 0)
-        return task
+    def _ms(seconds):
+        return f"{seconds * 1000:.1f} ms"
+    
+    def refresh(self):
+        """Redraw the tables from the recorder"""
+        spans = [row for row in recorder.summary() if row[0] != 'event_loop.lag']
+        lag = [row for row in recorder.summary() if row[0] == 'event_loop.lag']
+        if lag:
+            _, _, p50, p95, worst = lag[0]
+            self.lag_label.setText(f"Event-loop lag: p50 {self._ms(p50)}, "
+                                   f"p95 {self._ms(p95)}, max {self._ms(worst)}")
+        else:
+            self.lag_label.setText("Event-loop lag: no samples yet")
+        
+        self.span_table.setRowCount(len(spans))
+        for row, (name, count, p50, p95, worst) in enumerate(spans):
+            cells = [name, str(count), self._ms(p50), self._ms(p95), self._ms(worst)]
+            for column, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                if column:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.span_table.setItem(row, column, item)
+        
+        slow = recorder.slow_operations()
+        self.slow_table.setRowCount(len(slow))
+        for row, (when, name, duration) in enumerate(slow):
+            self.slow_table.setItem(row, 0, QTableWidgetItem(time.strftime('%H:%M:%S', time.localtime(when))))
+            self.slow_table.setItem(row, 1, QTableWidgetItem(name))
+            duration_item = QTableWidgetItem(self._ms(duration))
+            duration_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            self.slow_table.setItem(row, 2, duration_item)
+    
+    def reset(self):
+        recorder.reset()
+        self.refresh()
+    
+    def save_trace(self):
+        """Write the recorded spans as Chrome trace JSON"""
+        path, _ = QFileDialog.getSaveFileName(self, "Save Trace", "mancom_trace.json",
+                                              "Trace files (*.json)")
+        if not path:
+            return
+        try:
+            recorder.dump_chrome_trace(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Could not save trace: {e}")
 
-class DataStore:
-    """Handles data persistence"""
-    def __init__(self, filename='tasks_data.json'):
-        self.filepath = Path(filename)
-        
-    def save(self, tasks):
-        """Save tasks to file"""
-        data = [task.to_dict() for task in tasks]
-        with open(self.filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+class SingleInstance(QObject):
+    """Keeps one running app per data file.
+
+    The first launch holds an advisory lock on a .instance file next to the
+    data file and listens on a QLocalServer. A later launch connects, sends
+    its request as one JSON line, prints the reply and exits, without
+    building a window or touching the data file.
+    """
+    CONNECT_TIMEOUT_MS = 200
+    REPLY_TIMEOUT_MS = 2000
+    # How long a launch waits for an instance that holds the lock but is
+    # still starting up and not listening yet
+    STARTUP_WAIT = 10.0
     
-    def load(self):
-        """Load tasks from file"""
-        if not self.filepath.exists():
-            return []
-        
-        with open(self.filepath, 'r') as f:
-            data = json.load(f)
-        
-        return [TaskData.from_dict(item) for item in data]
+    def __init__(self, data_path):
+        super().__init__()
+        data_path = Path(data_path).resolve()
+        user = os.getuid() if hasattr(os, 'getuid') else os.environ.get('USERNAME', '')
+        key = hashlib.sha1(f"{user}:{data_path}".encode('utf-8')).hexdigest()[:16]
+        self.server_name = f"mancom-timer-{key}"
+        self.lock = FileLock(data_path.with_name(data_path.name + '.instance'))
+        self.server = None
+        self.handler = None
+    
+    def hand_off(self, request):
+        """Send request to the running instance and return its reply.
+        
+        Returns None if no instance is running; this process then holds the
+        instance lock and should call listen() once its window exists.
+        """
+        deadline = time.monotonic() + self.STARTUP_WAIT
+        while True:
+            reply = self._send(request)
+            if reply is not None:
+                return reply
+            if self.lock.acquire(blocking=False):
+                return None
+            if time.monotonic() >= deadline:
+                raise TimeoutError("another instance is running but not answering")
+            time.sleep(0.05)
+    
+    def listen(self, handler):
+        """Answer later launches with handler(request) -> reply text"""
+        self.handler = handler
+        # Only the lock holder gets here, so an existing socket is stale
+        QLocalServer.removeServer(self.server_name)
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        if not self.server.listen(self.server_name):
+            print(f"Warning: Other launches cannot reach this instance: {self.server.errorString()}")
+            return False
+        self.server.newConnection.connect(self._on_new_connection)
+        return True
+    
+    def _send(self, request):
+        socket = QLocalSocket()
+        socket.connectToServer(self.server_name)
+        if not socket.waitForConnected(self.CONNECT_TIMEOUT_MS):
+            return None
+        socket.write((json.dumps(request) + '\n').encode('utf-8'))
+        socket.waitForBytesWritten(self.REPLY_TIMEOUT_MS)
+        reply = b''
+        while not reply.endswith(b'\n') and socket.waitForReadyRead(self.REPLY_TIMEOUT_MS):
+            reply += bytes(socket.readAll())
+        socket.disconnectFromServer()
+        return reply.decode('utf-8', errors='replace').strip()
+    
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            socket.disconnected.connect(socket.deleteLater)
+            socket.readyRead.connect(lambda socket=socket: self._on_ready_read(socket))
+            # The request may have arrived before readyRead was connected
+            self._on_ready_read(socket)
+    
+    def _on_ready_read(self, socket):
+        if not socket.canReadLine():
+            return
+        line = bytes(socket.readLine()).decode('utf-8', errors='replace')
+        try:
+            request = json.loads(line)
+        except ValueError:
+            reply = "Warning: Ignored a malformed request"
+        else:
+            reply = self.handler(request)
+        socket.write((reply + '\n').encode('utf-8'))
+        socket.disconnectFromServer()
 
 class TimerApp(QMainWindow):
-    def __init__(self):
+    # Imported tasks added to the list per event loop turn; small enough
+    # that adding a batch stays well under a frame or two
+    IMPORT_BATCH_SIZE = 250
+    
+    def __init__(self, startup=None, trace_path=None):
         super().__init__()
+        # Chrome trace written on quit when diagnostics were enabled from the command line
+        self.trace_path = trace_path
+        self.diagnostics_dialog = None
+        self.loop_probe = EventLoopProbe(self)
+        # Import or export running on the thread pool, if any
+        self.transfer_job = None
+        self.transfer_progress = None
+        self.transfer_title = None
+        # Archiving run on the thread pool at startup, if any
+        self.archive_job = None
+        # Icons and the logo are loaded after the first paint (see
+        # load_assets) so the window appears without waiting on them
+        self.startup = startup or StartupProfile()
+        self.assets_loaded = False
         self.setWindowTitle("Mancom Timer & Notes")
         self.setGeometry(100, 100, 1000, 600)
         
-        # Set window icon if available (try multiple paths)
-        icon_path = None
-        for attempt in [Path("icon.ico"), Path(os.getcwd()) / "icon.ico", Path(__file__).parent / "icon.ico"]:
-            if attempt.exists():
-                icon_path = attempt
-                break
-        
-        if icon_path:
-            try:
-                self.setWindowIcon(QIcon(str(icon_path)))
-                print(f"✓ Window icon loaded from: {icon_path}")
-            except Exception as e:
-                print(f"Warning: Could not set window icon: {e}")
-        
         # Initialize managers
         self.timer_manager = TimerManager()
-        self.data_store = DataStore()
-        self.tasks = []
+        self.data_store = create_data_store()
+        self.saver = BackgroundSaver(self.data_store, self)
+        self.saver.save_failed.connect(self.on_save_failed)
+        self.saver.saved.connect(self.on_tasks_saved)
+        self.session_log = SessionLog(self.data_store.sidecar('.sessions')).load()
+        self.timer_manager.session_finished.connect(self.session_log.record)
+        self.heartbeat = self.open_heartbeat()
+        self.archive = TaskArchive(self.data_store.sidecar('.archive'))
+        try:
+            self.archive.load()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: Could not read the task archive: {e}")
+        self.tasks = TaskRegistry()
+        # Reads further tasks from the data store as the list scrolls
+        self.pager = None
+        self.notes_cache = NotesCache(getattr(self.data_store, 'load_notes', None),
+                                      config.SETTINGS['notes_cache_size'],
+                                      self.data_store.notes)
+        # Search hits the list has not paged in yet
+        self.task_cache = TaskCache(self.data_store.get_tasks, config.SETTINGS['task_cache_size'])
         self.current_task = None
-        self.task_counter = 0
+        self.id_allocator = IdAllocator()
         
-        # Dirty flag tracks whether there are unsaved changes
+        # Dirty flag tracks whether there are unsaved changes; the id sets
+        # record which tasks need writing on the next save
         self.dirty = False
+        self.dirty_task_ids = set()
+        self.deleted_task_ids = set()
+        # Every task saved this session; these are never archived at quit
+        self.touched_task_ids = set()
+        
+        # Auto-save only writes when something changed
+        self.autosave = AutosaveScheduler(self.save_tasks, parent=self)
         
         # Always on top flag
         self.always_on_top = False
+        
+        # Theme mode chosen by the user ('light', 'dark' or 'system') and the
+        # palette actually applied
+        self.current_theme = 'system'
+        self.applied_theme = None
 
         # Setup UI first (before loading tasks)
         self.setup_ui()
+        self.startup.mark("ui")
 
         # Apply initial theme (system)
-        self.current_theme = 'system'
         self.apply_theme('system')
+        self.startup.mark("theme")
 
         # Load saved tasks
         self.load_tasks()
+        self.startup.mark("tasks")
         
         # Connect signals
         self.timer_manager.time_updated.connect(self.update_timer_display)
         
-        # Setup system tray
+        # Setup system tray (its icon is set in load_assets)
         self.setup_tray()
-        
-        # Setup auto-save timer
-        self.auto_save_timer = QTimer()
-        self.auto_save_timer.timeout.connect(self.save_tasks)
-        self.auto_save_timer.start(30000)  # Save every 30 seconds
+        self.startup.mark("tray")
     
     def setup_ui(self):
         """Setup the user interface"""
         # Create menu bar for theme switching and window options
         menu_bar = self.menuBar()
+        file_menu = menu_bar.addMenu("File")
+        self.import_action = file_menu.addAction("Import Tasks...")
+        self.import_action.triggered.connect(self.import_tasks)
+        self.export_action = file_menu.addAction("Export Tasks...")
+        self.export_action.triggered.connect(self.export_tasks)
+        
         view_menu = menu_bar.addMenu("View")
         
         # Always on top toggle
@@ -178,6 +1310,23 @@ class TimerApp(QMainWindow):
         
         view_menu.addSeparator()
         
+        report_action = view_menu.addAction("Time Report...")
+        report_action.triggered.connect(self.show_report)
+        
+        # Diagnostics stay out of the menu until recording is switched on,
+        # either with --diagnostics or with the Ctrl+Shift+D shortcut
+        self.diagnostics_action = view_menu.addAction("Diagnostics...")
+        self.diagnostics_action.triggered.connect(self.show_diagnostics)
+        self.diagnostics_action.setVisible(recorder.enabled)
+        diagnostics_shortcut = QAction(self)
+        diagnostics_shortcut.setShortcut("Ctrl+Shift+D")
+        diagnostics_shortcut.triggered.connect(self.show_diagnostics)
+        self.addAction(diagnostics_shortcut)
+        if recorder.enabled:
+            self.loop_probe.start()
+        
+        view_menu.addSeparator()
+        
         theme_light = view_menu.addAction("Light Theme")
         theme_dark = view_menu.addAction("Dark Theme")
         theme_system = view_menu.addAction("System Theme")
@@ -200,7 +1349,7 @@ class TimerApp(QMainWindow):
         
         tasks_label = QLabel("MANCOM, INC - TASK TIMER")
         tasks_label.setFont(title_font)
-        tasks_label.setStyleSheet("color: #2c3e50; padding: 5px;")
+        tasks_label.setObjectName("titleLabel")
         tasks_label.setWordWrap(True)
         left_panel.addWidget(tasks_label)
         
@@ -212,20 +1361,56 @@ class TimerApp(QMainWindow):
         input_layout.addWidget(self.task_input)
         
         add_btn = QPushButton("Add")
+        add_btn.setObjectName("addBtn")
         add_btn.clicked.connect(self.add_task)
         add_btn.setMaximumWidth(70)
         input_layout.addWidget(add_btn)
         left_panel.addLayout(input_layout)
         
-        # Tasks list
-        self.tasks_list = QListWidget()
-        self.tasks_list.itemClicked.connect(self.on_task_selected)
+        # Search box
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search tasks and notes...")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.textChanged.connect(self.on_search_changed)
+        left_panel.addWidget(self.search_input)
+        
+        # Sort and filter for the task list (not for search results, which
+        # are ranked)
+        view_layout = QHBoxLayout()
+        self.sort_combo = QComboBox()
+        for name, (label, _, _) in TaskSortFilterModel.SORTS.items():
+            self.sort_combo.addItem(label, name)
+        view_layout.addWidget(self.sort_combo)
+        self.filter_combo = QComboBox()
+        for name, label in TaskSortFilterModel.FILTERS.items():
+            self.filter_combo.addItem(label, name)
+        view_layout.addWidget(self.filter_combo)
+        left_panel.addLayout(view_layout)
+        
+        # Tasks list; sorted/filtered rows and search results are shown
+        # through further models
+        self.task_model = TaskListModel(self.timer_manager, self)
+        self.view_model = TaskSortFilterModel(self.task_model, self.session_log, self)
+        self.search_model = TaskListModel(self.timer_manager, self)
+        # Reads the rest of the tasks a page per event loop turn while a
+        # sort or filter that looks at every task is selected
+        self.background_pager = QTimer(self)
+        self.background_pager.setInterval(0)
+        self.background_pager.timeout.connect(self.on_background_page)
+        self.tasks_list = QListView()
+        self.tasks_list.setUniformItemSizes(True)
+        # Lay rows out in batches so restyles and resets with thousands of
+        # tasks return to the event loop instead of walking every row at once
+        self.tasks_list.setLayoutMode(QListView.Batched)
+        self.tasks_list.setBatchSize(500)
+        self.tasks_list.setModel(self.task_model)
+        self.tasks_list.clicked.connect(self.on_task_selected)
         left_panel.addWidget(self.tasks_list)
         
         # Delete button
         delete_btn = QPushButton("Delete Selected")
         delete_btn.clicked.connect(self.delete_task)
-        delete_btn.setStyleSheet("background-color: #e74c3c; color: white;")
+        delete_btn.setObjectName("deleteBtn")
         left_panel.addWidget(delete_btn)
         
         left_widget = QWidget()
@@ -235,53 +1420,21 @@ class TimerApp(QMainWindow):
         # Right panel - Task details
         right_panel = QVBoxLayout()
         
-        # Add Mancom logo if image exists
+        # Mancom logo; the image is filled in by load_assets after first paint
         logo_layout = QHBoxLayout()
-        # Try multiple image formats: PNG, JPG, then GIF
-        logo_path = None
-        for ext in ['mancominc.png', 'logo.png', 'logo.jpg', 'logo.jpeg', 'mancom.png', 'mancom.jpg', 'mancom.gif']:
-            for attempt in [Path(ext), Path(os.getcwd()) / ext, Path(__file__).parent / ext]:
-                if attempt.exists():
-                    logo_path = attempt
-                    break
-            if logo_path:
-                break
-        
-        if logo_path:
-            try:
-                logo_label = QLabel()
-                pixmap = QPixmap(str(logo_path))
-                if not pixmap.isNull():
-                    # Handle transparency: composite onto white background if needed
-                    if pixmap.hasAlpha():
-                        # Create a white background
-                        background = QPixmap(pixmap.width(), pixmap.height())
-                        background.fill(Qt.white)
-                        # Composite the transparent image onto the white background
-                        painter = QPainter(background)
-                        painter.drawPixmap(0, 0, pixmap)
-                        painter.end()
-                        pixmap = background
-                    
-                    # Scale to 64px height maintaining aspect ratio
-                    pixmap = pixmap.scaledToHeight(64, Qt.SmoothTransformation)
-                    logo_label.setPixmap(pixmap)
-                    logo_label.setMaximumHeight(80)
-                    logo_label.setAlignment(Qt.AlignCenter)
-                    logo_layout.addStretch()
-                    logo_layout.addWidget(logo_label)
-                    logo_layout.addStretch()
-                    right_panel.addLayout(logo_layout)
-                    print(f"✓ Logo loaded: {logo_path.name}")
-                else:
-                    print(f"Warning: Could not load image from {logo_path}")
-            except Exception as e:
-                print(f"Warning: Error loading logo: {e}")
+        self.logo_label = QLabel()
+        self.logo_label.setMaximumHeight(80)
+        self.logo_label.setAlignment(Qt.AlignCenter)
+        self.logo_label.hide()
+        logo_layout.addStretch()
+        logo_layout.addWidget(self.logo_label)
+        logo_layout.addStretch()
+        right_panel.addLayout(logo_layout)
         
         # Task details label
         self.task_details_label = QLabel("Select a task to view details")
         self.task_details_label.setFont(title_font)
-        self.task_details_label.setStyleSheet("color: #2c3e50; padding: 5px;")
+        self.task_details_label.setObjectName("titleLabel")
         right_panel.addWidget(self.task_details_label)
         
         # Timer display
@@ -289,7 +1442,7 @@ class TimerApp(QMainWindow):
         timer_layout.addWidget(QLabel("Elapsed Time:"))
         self.timer_display = QLabel("00:00:00")
         self.timer_display.setFont(QFont("Courier", 16, QFont.Bold))
-        self.timer_display.setStyleSheet("color: #27ae60; background-color: #ecf0f1; padding: 10px; border-radius: 5px;")
+        self.timer_display.setObjectName("timerDisplay")
         timer_layout.addWidget(self.timer_display)
         timer_layout.addStretch()
         right_panel.addLayout(timer_layout)
@@ -308,19 +1461,19 @@ class TimerApp(QMainWindow):
         
         self.start_btn = QPushButton("Start")
         self.start_btn.clicked.connect(self.start_task)
-        self.start_btn.setStyleSheet("background-color: #27ae60; color: white;")
+        self.start_btn.setObjectName("startBtn")
         button_layout.addWidget(self.start_btn)
         
         self.stop_btn = QPushButton("Stop")
         self.stop_btn.clicked.connect(self.stop_task)
-        self.stop_btn.setStyleSheet("background-color: #e67e22; color: white;")
+        self.stop_btn.setObjectName("stopBtn")
         self.stop_btn.setEnabled(False)
         button_layout.addWidget(self.stop_btn)
         
         # Save button
         self.save_btn = QPushButton("Save")
         self.save_btn.clicked.connect(self.on_save_clicked)
-        self.save_btn.setStyleSheet("background-color: #2980b9; color: white;")
+        self.save_btn.setObjectName("saveBtn")
         self.save_btn.setEnabled(False)
         button_layout.addWidget(self.save_btn)
         
@@ -332,40 +1485,10 @@ class TimerApp(QMainWindow):
         # Add to main layout
         main_layout.addWidget(left_widget)
         main_layout.addWidget(right_widget, 1)
-        
-        # Apply modern styling
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #f5f5f5;
-            }
-            QPushButton {
-                padding: 8px;
-                border-radius: 4px;
-                font-weight: bold;
-            }
-            QLineEdit, QTextEdit {
-                border: 1px solid #bdc3c7;
-                border-radius: 4px;
-                padding: 5px;
-            }
-            QListWidget {
-                border: 1px solid #bdc3c7;
-                border-radius: 4px;
-            }
-        """)
     
     def setup_tray(self):
         """Setup system tray icon and menu"""
-        # Use a bundled icon if available, otherwise default
-        icon_path = Path("icon.ico")
-        if icon_path.exists():
-            tray_icon = QIcon(str(icon_path))
-            self.tray_icon = QSystemTrayIcon(tray_icon, self)
-        else:
-            self.tray_icon = QSystemTrayIcon(self)
-        
-        # Store the base icon for later updates
-        self.base_tray_icon = self.tray_icon.icon()
+        self.tray_icon = QSystemTrayIcon(self)
         
         tray_menu = QMenu()
         show_action = tray_menu.addAction("Show")
@@ -397,6 +1520,29 @@ class TimerApp(QMainWindow):
         system_action.triggered.connect(lambda: self.apply_theme('system'))
         
         self.tray_icon.setContextMenu(tray_menu)
+        self.tray_icon.activated.connect(self.on_tray_activated)
+    
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.assets_loaded:
+            self.assets_loaded = True
+            self.startup.mark("first paint")
+            # Let the first frame reach the screen before touching the disk
+            QTimer.singleShot(0, self.load_assets)
+    
+    def load_assets(self):
+        """Set the window/tray icon and start loading the logo"""
+        # Use a bundled icon if available, otherwise default
+        icon_path = find_asset("icon.ico")
+        if icon_path:
+            try:
+                icon = QIcon(str(icon_path))
+                self.setWindowIcon(icon)
+                self.tray_icon.setIcon(icon)
+                print(f"✓ Window icon loaded from: {icon_path}")
+            except Exception as e:
+                print(f"Warning: Could not set window icon: {e}")
+        
         # Show the tray icon; some environments may not support system tray
         try:
             self.tray_icon.show()
@@ -404,7 +1550,17 @@ class TimerApp(QMainWindow):
         except Exception as e:
             print(f"Warning: system tray unavailable: {e}")
         
-        self.tray_icon.activated.connect(self.on_tray_activated)
+        print(f"✓ Window shown in {self.startup.summary()}")
+        
+        loader = LogoLoader(config.SETTINGS['asset_cache_dir'])
+        loader.signals.loaded.connect(self.on_logo_loaded)
+        QThreadPool.globalInstance().start(loader)
+    
+    def on_logo_loaded(self, image, name):
+        """Show the logo rendered by LogoLoader"""
+        self.logo_label.setPixmap(QPixmap.fromImage(image))
+        self.logo_label.show()
+        print(f"✓ Logo loaded: {name} ({self.startup.elapsed() * 1000:.0f} ms after start)")
     
     def toggle_always_on_top(self):
         """Toggle always on top window flag"""
@@ -445,19 +1601,142 @@ class TimerApp(QMainWindow):
         except Exception:
             return 'light'
 
+    @recorder.timed('apply_theme')
     def apply_theme(self, mode):
-        """Apply the selected theme to the application."""
-        if mode == 'system':
-            chosen = self.detect_system_theme()
-        else:
-            chosen = mode
+        """Apply the selected theme to the application.
 
-        stylesheet = config.get_stylesheet(chosen)
-        # Apply to main window and ensure it cascades to all children
-        self.setStyleSheet(stylesheet)
-        # Force update of all widgets
-        QApplication.instance().setStyle(QApplication.instance().style())
+        The compiled stylesheet is set on the main window only; dialogs and
+        other children inherit it, so a switch costs one polish pass and
+        choosing the theme already applied costs nothing.
+        """
         self.current_theme = mode
+        chosen = self.detect_system_theme() if mode == 'system' else mode
+        if chosen == self.applied_theme:
+            return
+        self.applied_theme = chosen
+        self.setStyleSheet(config.get_stylesheet(chosen))
+        highlight = QColor(config.THEMES[chosen]['highlight'])
+        self.task_model.set_highlight(highlight)
+        self.view_model.set_highlight(highlight)
+        self.search_model.set_highlight(highlight)
+    
+    def changeEvent(self, event):
+        # Follow the OS light/dark setting while in system mode. Our own
+        # stylesheet changes the window palette too, but not the application
+        # palette that detect_system_theme reads, so this cannot loop.
+        if (event.type() in (QEvent.PaletteChange, QEvent.ApplicationPaletteChange)
+                and self.current_theme == 'system' and self.applied_theme is not None):
+            self.apply_theme('system')
+        if event.type() == QEvent.WindowStateChange:
+            self.update_ui_visibility()
+        super().changeEvent(event)
+    
+    def show_report(self):
+        """Open the time report dialog"""
+        ReportDialog(self).exec_()
+    
+    def show_diagnostics(self):
+        """Open the diagnostics panel, switching recording on if needed"""
+        if not recorder.enabled:
+            recorder.enable()
+            self.loop_probe.start()
+            self.diagnostics_action.setVisible(True)
+        if self.diagnostics_dialog is None:
+            self.diagnostics_dialog = DiagnosticsDialog(self)
+        self.diagnostics_dialog.show()
+        self.diagnostics_dialog.raise_()
+    
+    def import_tasks(self):
+        """Import tasks from an archive file in the background"""
+        path, _ = QFileDialog.getOpenFileName(self, "Import Tasks", "",
+                                              "Task archives (*.json *.jsonl *.ndjson *.csv)")
+        if not path:
+            return
+        # Duplicate ids are checked against every task, archived ones
+        # included, and imported tasks go last
+        self.ensure_all_tasks()
+        try:
+            importer = TaskImporter(path, self.tasks.ids() | self.archive.ids(), batch_size=self.IMPORT_BATCH_SIZE,
+                                    allocator=self.id_allocator)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Import Failed", str(e))
+            return
+        signals = _TransferSignals(self)
+        signals.batch.connect(self.on_import_batch)
+        self.start_transfer(_ImportJob(importer, signals), "Import", "Importing tasks...")
+    
+    def export_tasks(self):
+        """Export every saved task to a file in the background"""
+        path, _ = QFileDialog.getSaveFileName(self, "Export Tasks", "tasks_export.json",
+                                              "JSON (*.json);;JSON Lines (*.jsonl);;CSV (*.csv)")
+        if not path:
+            return
+        try:
+            detect_format(path)
+        except ValueError as e:
+            QMessageBox.warning(self, "Export Failed", str(e))
+            return
+        # The export reads the data store, so write pending changes first
+        self.ensure_all_tasks()
+        self.save_tasks()
+        self.saver.wait()
+        job = _ExportJob(self.data_store, path, len(self.tasks), _TransferSignals(self))
+        self.start_transfer(job, "Export", "Exporting tasks...")
+    
+    def start_transfer(self, job, title, label):
+        """Run an import/export job on the thread pool behind a progress dialog"""
+        self.transfer_job = job
+        self.transfer_title = title
+        self.import_action.setEnabled(False)
+        self.export_action.setEnabled(False)
+        self.transfer_progress = QProgressDialog(label, "Cancel", 0, 1000, self)
+        self.transfer_progress.setWindowTitle(title)
+        self.transfer_progress.setMinimumDuration(500)
+        self.transfer_progress.setValue(0)
+        self.transfer_progress.canceled.connect(job.cancel)
+        job.signals.progress.connect(self.on_transfer_progress)
+        job.signals.finished.connect(self.on_transfer_finished)
+        job.signals.failed.connect(self.on_transfer_failed)
+        QThreadPool.globalInstance().start(job)
+    
+    def on_import_batch(self, batch, counts):
+        """Add one batch of imported tasks to the list"""
+        # Skip ids created here while the archive was being read
+        added = [(task, task_counts) for task, task_counts in zip(batch, counts)
+                 if task.id not in self.tasks]
+        self.task_model.append_tasks([task for task, _ in added])
+        for task, task_counts in added:
+            self.search_index.update(task.id, task.name, task.notes, task_counts)
+            self.dirty_task_ids.add(task.id)
+        self.set_dirty(True)
+        self.transfer_job.batch_done()
+    
+    def on_transfer_progress(self, fraction):
+        if self.transfer_progress is not None:
+            self.transfer_progress.setValue(int(fraction * 1000))
+    
+    def on_transfer_finished(self, summary):
+        title = self.end_transfer()
+        print(f"✓ {summary}")
+        QMessageBox.information(self, title, summary)
+    
+    def on_transfer_failed(self, error):
+        title = self.end_transfer()
+        print(f"Warning: {title} failed: {error}")
+        QMessageBox.warning(self, f"{title} Failed", error)
+    
+    def end_transfer(self):
+        """Tear down the finished transfer; return its title"""
+        self.transfer_job.signals.deleteLater()
+        self.transfer_job = None
+        self.transfer_progress.canceled.disconnect()
+        self.transfer_progress.reset()
+        self.transfer_progress.deleteLater()
+        self.transfer_progress = None
+        self.import_action.setEnabled(True)
+        self.export_action.setEnabled(True)
+        self.refresh_search()
+        return self.transfer_title
     
     def show_window(self):
         """Show the application window"""
@@ -469,9 +1748,58 @@ class TimerApp(QMainWindow):
         """Hide to system tray"""
         self.hide()
     
+    def select_task(self, task):
+        """Select task in the full task list and show its details"""
+        self.search_input.clear()
+        model = self.list_model()
+        row = model.row_of(task.id)
+        if row is None:
+            # Filtered out of the current view; show every task
+            self.filter_combo.setCurrentIndex(self.filter_combo.findData('all'))
+            model = self.list_model()
+            row = model.row_of(task.id)
+        self.tasks_list.setCurrentIndex(model.index(row))
+        self.current_task = task
+        self.display_task_details()
+    
+    def handle_instance_request(self, request):
+        """Carry out a request forwarded by a later launch; return the reply"""
+        command = request.get('command')
+        if command == 'show':
+            self.show_window()
+            return "✓ Showed the running instance"
+        if command == 'start':
+            self.ensure_all_tasks()
+            task = find_task(self.tasks, str(request.get('task', '')))
+            if task is None:
+                return f"Warning: No task matching {request.get('task')!r}"
+            self.select_task(task)
+            self.start_task()
+            return f"▶ Started: {task.name}"
+        return f"Warning: Unknown request {command!r}"
+    
     def quit_app(self):
         """Quit the application"""
+        if self.transfer_job is not None:
+            self.transfer_job.cancel()
+        # Close the running session so it is logged and its time saved
+        if self.timer_manager.current_task_id is not None:
+            self.timer_manager.pause_task(self.timer_manager.current_task_id)
+        # Tasks it archived are deleted from the store by this save
+        self.wait_for_archiving()
         self.save_tasks()
+        self.saver.wait()
+        self.search_index.save(self.search_index_path)
+        self.record_touched_tasks()
+        self.data_store.close()
+        if self.heartbeat is not None:
+            self.heartbeat.close()
+        if self.trace_path:
+            try:
+                recorder.dump_chrome_trace(self.trace_path)
+                print(f"✓ Trace written to {self.trace_path}")
+            except OSError as e:
+                print(f"Warning: Could not write trace: {e}")
         QApplication.quit()
     
     def add_task(self):
@@ -481,13 +1809,14 @@ class TimerApp(QMainWindow):
             QMessageBox.warning(self, "Error", "Please enter a task name")
             return
         
-        self.task_counter += 1
-        task = TaskData(str(self.task_counter), task_name)
-        self.tasks.append(task)
+        # Listed after every stored task, even those not paged in yet
+        task = TaskData(self.id_allocator.next_id(), task_name)
+        self.task_model.append_task(task)
+        self.search_index.update(task.id, task.name, task.notes)
         self.task_input.clear()
+        self.refresh_search()
         
-        self.refresh_task_list()
-        self.set_dirty(True)
+        self.mark_task_dirty(task.id)
     
     def delete_task(self):
         """Delete the selected task"""
@@ -499,19 +1828,130 @@ class TimerApp(QMainWindow):
                                      QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            self.tasks.remove(self.current_task)
-            self.timer_manager.pause_task(self.current_task.id)
+            self.timer_manager.remove_task(self.current_task.id)
+            self.task_model.remove_task(self.current_task)
+            self.search_index.remove(self.current_task.id)
+            self.notes_cache.discard(self.current_task.id)
+            self.task_cache.discard(self.current_task.id)
+            self.refresh_search()
+            self.dirty_task_ids.discard(self.current_task.id)
+            self.deleted_task_ids.add(self.current_task.id)
             self.current_task = None
-            self.refresh_task_list()
             self.clear_task_details()
             self.set_dirty(True)
     
-    def on_task_selected(self, item):
+    def on_task_selected(self, index):
         """Handle task selection"""
-        task_index = self.tasks_list.row(item)
-        self.current_task = self.tasks[task_index]
+        task = index.model().task_at(index.row())
+        if task.id not in self.tasks:
+            if task.id in self.archive:
+                task = self.restore_archived_task(task.id)
+            else:
+                task = self.page_in_task(task.id)
+                if task is None:
+                    return
+        self.current_task = task
         self.display_task_details()
     
+    def page_in_task(self, task_id):
+        """Read the list up to a search hit that was read from the store by id.
+    
+        Edits have to go to the listed task rather than the copy in the
+        task cache; returns None if the task is no longer stored.
+        """
+        task = self.task_model.fetch_until(task_id)
+        self.task_cache.discard(task_id)
+        self.refresh_search()
+        return task
+    
+    def restore_archived_task(self, task_id):
+        """Move an archived task (opened from search results) back into the task list"""
+        # The archive index is written below
+        self.wait_for_archiving()
+        # Listed after every stored task, even those not paged in yet
+        task = self.archive.read(task_id)
+        self.task_model.append_task(task)
+        self.search_index.update(task.id, task.name, task.notes)
+        self.mark_task_dirty(task.id)
+        # Written to the store before it leaves the archive
+        self.save_tasks()
+        self.saver.wait()
+        self.archive.remove([task.id])
+        self.refresh_search()
+        return task
+    
+    def record_touched_tasks(self):
+        """Record in the archive index which tasks were changed this session"""
+        if not self.touched_task_ids:
+            return
+        try:
+            self.archive.touch(self.touched_task_ids)
+        except OSError as e:
+            print(f"Warning: Could not update the task archive: {e}")
+    
+    def start_archiving(self):
+        """Move long-untouched tasks to the archive on the thread pool, once a day"""
+        days = config.SETTINGS['archive_after_days']
+        if days <= 0 or not self.archive.due() or self.archive_job is not None:
+            return
+        keep_ids = self.touched_task_ids | self.dirty_task_ids
+        if self.timer_manager.current_task_id is not None:
+            keep_ids.add(self.timer_manager.current_task_id)
+        signals = _ArchiveSignals(self)
+        signals.finished.connect(self.on_archiving_done)
+        self.archive_job = _ArchiveJob(self.data_store, days, keep_ids, signals)
+        QThreadPool.globalInstance().start(self.archive_job)
+    
+    def wait_for_archiving(self):
+        """Let a running archive job finish, before the archive index is written here"""
+        if self.archive_job is not None:
+            self.archive_job.done.wait()
+            self.on_archiving_done()
+    
+    def on_archiving_done(self):
+        """Drop the tasks an archive job copied to the archive from the list and store.
+
+        Tasks used since the job started stay, and leave the archive again.
+        """
+        job, self.archive_job = self.archive_job, None
+        if job is None:
+            return
+        if job.error is not None:
+            print(f"Warning: Could not archive old tasks: {job.error}")
+            return
+        try:
+            self.archive.load()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: Could not read the task archive: {e}")
+            return
+        in_use = self.touched_task_ids | self.dirty_task_ids
+        if self.timer_manager.current_task_id is not None:
+            in_use.add(self.timer_manager.current_task_id)
+        if self.current_task is not None:
+            in_use.add(self.current_task.id)
+        kept = [task_id for task_id in job.archived if task_id in in_use]
+        moved = [task_id for task_id in job.archived if task_id not in in_use]
+        if kept:
+            try:
+                self.archive.remove(kept)
+            except OSError as e:
+                print(f"Warning: Could not update the task archive: {e}")
+        if not moved:
+            return
+        for task_id in moved:
+            task = self.tasks.get(task_id)
+            if task is not None:
+                self.task_model.remove_task(task)
+                self.notes_cache.discard(task_id)
+            self.task_cache.discard(task_id)
+        if self.pager is not None:
+            # Still in the data file until the next save
+            self.pager.skip(moved)
+        self.deleted_task_ids.update(moved)
+        self.set_dirty(True)
+        self.refresh_search()
+        print(f"✓ Archived {len(moved)} task(s) untouched for {job.days} days")
+    
     def display_task_details(self):
         """Display the selected task's details"""
         if not self.current_task:
@@ -519,15 +1959,17 @@ class TimerApp(QMainWindow):
             return
         
         self.task_details_label.setText(
-            f"Task: {self.current_task.name} | Created: {self.current_task.created_at[:10]}"
+            f"Task: {self.current_task.name} | Created: {self.current_task.created_date}"
         )
         self.notes_edit.blockSignals(True)
         self.notes_edit.setPlainText(self.current_task.notes)
         self.notes_edit.blockSignals(False)
-        self.update_timer_display(self.current_task.id, self.current_task.elapsed_seconds)
+        self.notes_cache.touch(self.current_task)
+        self.update_timer_display(self.current_task.id,
+                                  self.timer_manager.get_elapsed_time(self.current_task.id))
         
         # Enable start button
-        if self.timer_manager.current_task_id != self.current_task.id:
+        if not self.timer_manager.is_running(self.current_task.id):
             self.start_btn.setEnabled(True)
             self.stop_btn.setEnabled(False)
         else:
@@ -547,11 +1989,16 @@ class TimerApp(QMainWindow):
         if not self.current_task:
             return
         
+        previous_task_id = self.timer_manager.current_task_id
         self.timer_manager.start_task(self.current_task.id)
         self.start_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
-        self.refresh_task_list()
-        self.set_dirty(True)
+        self.refresh_task_row(previous_task_id)
+        self.refresh_task_row(self.current_task.id)
+        self.mark_task_dirty(self.current_task.id)
+        # Switching tasks is an idle point: write what the last task accrued
+        if previous_task_id is not None:
+            self.autosave.flush()
     
     def stop_task(self):
         """Stop the selected task's timer"""
@@ -561,14 +2008,18 @@ class TimerApp(QMainWindow):
         self.timer_manager.pause_task(self.current_task.id)
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
-        self.refresh_task_list()
-        self.set_dirty(True)
+        self.refresh_task_row(self.current_task.id)
+        self.mark_task_dirty(self.current_task.id)
+        self.autosave.flush()
     
     def on_notes_changed(self):
         """Handle notes text changes"""
         if self.current_task:
             self.current_task.notes = self.notes_edit.toPlainText()
-            self.set_dirty(True)
+            self.notes_cache.pin(self.current_task.id)
+            self.search_index.update(self.current_task.id, self.current_task.name,
+                                     self.current_task.notes)
+            self.mark_task_dirty(self.current_task.id)
     
     def update_timer_display(self, task_id, elapsed_seconds):
         """Update the timer display showing total time (stored + running)"""
@@ -576,81 +2027,272 @@ class TimerApp(QMainWindow):
         # Calculate total: stored + currently running
         if self.current_task and task_id == self.current_task.id:
             total_elapsed = self.current_task.elapsed_seconds + elapsed_seconds
-            hours = total_elapsed // 3600
-            minutes = (total_elapsed % 3600) // 60
-            seconds = total_elapsed % 60
-            self.timer_display.setText(f"{hours:02d}:{minutes:02d}:{seconds:02d}")
+            self.timer_display.setText(format_duration(total_elapsed))
         
-        self.refresh_task_list()
+        self.refresh_task_row(task_id)
     
+    @recorder.timed('refresh_task_list')
     def refresh_task_list(self):
-        """Refresh the task list display"""
-        self.tasks_list.clear()
-        
-        for task in self.tasks:
-            elapsed = self.timer_manager.get_elapsed_time(task.id)
-            total_seconds = task.elapsed_seconds + elapsed
-            
-            hours = total_seconds // 3600
-            minutes = (total_seconds % 3600) // 60
-            seconds = total_seconds % 60
-            
-            time_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-            
-            is_running = (self.timer_manager.current_task_id == task.id and 
-                         task.id in self.timer_manager.timers and 
-                         self.timer_manager.timers[task.id]['running'])
-            
-            status = "▶ " if is_running else "⏸ "
-            list_item_text = f"{status}{task.name} [{time_str}]"
-            
-            item = QListWidgetItem(list_item_text)
-            if is_running:
-                item.setBackground(QColor("#d5f4e6"))
-            self.tasks_list.addItem(item)
+        """Rebuild the task list display from the task registry"""
+        self.task_model.set_tasks(self.tasks)
+        self.refresh_search()
     
+    def refresh_task_row(self, task_id):
+        """Repaint one task's row in the task list and search results"""
+        self.task_model.refresh_task(task_id)
+        self.search_model.refresh_task(task_id)
+    
+    def on_search_changed(self, text):
+        """Show ranked search results, or every task when the query is empty"""
+        if not text.strip():
+            self.tasks_list.setModel(self.list_model())
+            return
+        if not self.search_index_complete:
+            # Tasks the index is missing are only indexed as they are read
+            self.ensure_all_tasks()
+        task_ids = self.search_index.search(text)
+        # Hits not paged in yet are read from the data store by id, and
+        # archived ones listed from the archive index
+        stored = self.task_cache.get_many(
+            [task_id for task_id in task_ids
+             if task_id not in self.tasks and task_id not in self.archive])
+        results = []
+        for task_id in task_ids:
+            task = self.tasks.get(task_id) or stored.get(task_id) or self.archive.get(task_id)
+            if task is not None:
+                results.append(task)
+        self.search_model.set_tasks(results)
+        self.tasks_list.setModel(self.search_model)
+    
+    def list_model(self):
+        """The model the task list shows when not searching"""
+        return self.view_model if self.view_model.active() else self.task_model
+    
+    def on_view_changed(self):
+        """Apply the sort and filter chosen in the combo boxes and remember them"""
+        sort = self.sort_combo.currentData()
+        task_filter = self.filter_combo.currentData()
+        if (sort, task_filter) == (self.view_model.sort, self.view_model.filter):
+            return
+        self.view_model.set_view(sort, task_filter)
+        if self.view_model.active():
+            # Sorting and filtering look at every task; the rest are read
+            # without holding up the window
+            self.background_pager.start()
+        if not self.search_input.text().strip():
+            self.tasks_list.setModel(self.list_model())
+        try:
+            write_json_atomic(self.view_state_path, {'sort': sort, 'filter': task_filter})
+        except OSError as e:
+            print(f"Warning: Could not save list view settings: {e}")
+    
+    def load_view_state(self):
+        """Restore the sort and filter chosen in the last session"""
+        self.view_state_path = self.data_store.sidecar('.view')
+        try:
+            with open(self.view_state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            state = {}
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not read list view settings: {e}")
+            state = {}
+        for combo, value in ((self.sort_combo, state.get('sort')),
+                             (self.filter_combo, state.get('filter'))):
+            index = combo.findData(value)
+            if index >= 0:
+                combo.setCurrentIndex(index)
+        self.on_view_changed()
+        self.sort_combo.currentIndexChanged.connect(self.on_view_changed)
+        self.filter_combo.currentIndexChanged.connect(self.on_view_changed)
+    
+    def refresh_search(self):
+        """Re-run the current search after tasks were added or removed"""
+        if self.search_input.text().strip():
+            self.on_search_changed(self.search_input.text())
+    
+    @recorder.timed('save_tasks')
     def save_tasks(self):
-        """Save tasks to file"""
-        # Update elapsed time in tasks from running timers
-        # Accumulate running time into stored time WITHOUT resetting counter
-        for task in self.tasks:
-            if task.id in self.timer_manager.timers:
-                running = self.timer_manager.timers[task.id]['elapsed']
-                if running > 0:
-                    task.elapsed_seconds += running
-                    # Move running back to base, but keep it accumulating properly
-                    # by storing the old base and resetting to 0 for next interval
-                    self.timer_manager.timers[task.id]['elapsed'] = 0
-        
-        self.data_store.save(self.tasks)
+        """Save changed tasks to file; does nothing if nothing changed"""
+        # Fold whole seconds accrued since the last save into stored time;
+        # the running task keeps running from the same instant
+        collected, session = self.timer_manager.collect_elapsed()
+        if collected:
+            for task_id, seconds in collected.items():
+                task = self.tasks.get(task_id)
+                if task is not None:
+                    task.elapsed_seconds += seconds
+            self.dirty_task_ids.update(collected)
+        
+        self.autosave.clear()
+        if self.timer_manager.current_task_id is not None:
+            # Running time keeps accruing; save it again within the max latency
+            self.autosave.mark_changed(debounce=False)
+        if not self.dirty_task_ids and not self.deleted_task_ids:
+            self.set_dirty(False)
+            return
+        
+        # Snapshot on the GUI thread; serialization and I/O run on the saver's worker.
+        # List order, so new tasks are stored (and load) in the order they were added
+        if self.data_store.incremental:
+            snapshots = [task.snapshot() for task in self.tasks.select(self.dirty_task_ids)]
+        else:
+            # The whole file is rewritten, so every task has to be in memory
+            self.ensure_all_tasks()
+            snapshots = [task.snapshot() for task in self.tasks]
+        # The heartbeat counts the running time as saved once this is written
+        self.saver.save(snapshots, self.dirty_task_ids, self.deleted_task_ids, session)
+        self.touched_task_ids |= self.dirty_task_ids
+        self.dirty_task_ids = set()
+        self.deleted_task_ids = set()
         self.set_dirty(False)
     
+    def on_tasks_saved(self, snapshots, hashed, session):
+        """Record what a save wrote: running time, note hashes, and edited notes that can be let go"""
+        if session is not None:
+            self.timer_manager.mark_saved(session)
+        # Large notes unchanged since are not hashed again on the next save
+        for task_id, notes_hash in hashed.items():
+            task = self.tasks.get(task_id)
+            if (task is not None and task.notes_loaded and task_id in snapshots
+                    and task.notes is snapshots[task_id].notes):
+                task.notes_stored(notes_hash)
+        self.notes_cache.saved(snapshots, self.tasks)
+    
+    def on_save_failed(self, changed_ids, deleted_ids, error):
+        """Re-mark tasks from a failed background save so the next save retries them"""
+        print(f"Warning: Could not save tasks: {error}")
+        self.dirty_task_ids |= changed_ids
+        self.deleted_task_ids |= deleted_ids
+        self.set_dirty(True)
+    
     def on_save_clicked(self):
         """Handler for Save button"""
         self.save_tasks()
 
+    def mark_task_dirty(self, task_id):
+        """Record that a task changed and needs writing on the next save"""
+        self.dirty_task_ids.add(task_id)
+        self.set_dirty(True)
+
     def set_dirty(self, value: bool = True):
-        """Set dirty flag and update Save button state"""
+        """Set dirty flag, update Save button state and schedule an autosave"""
         self.dirty = bool(value)
+        if self.dirty:
+            self.autosave.mark_changed()
         try:
             self.save_btn.setEnabled(self.dirty)
         except Exception:
             pass
 
+    @recorder.timed('load_tasks')
     def load_tasks(self):
-        """Load tasks from file"""
-        self.tasks = self.data_store.load()
-        
-        # Set counter to max task id
-        if self.tasks:
-            max_id = max(int(task.id) for task in self.tasks)
-            self.task_counter = max_id
-        
-        # Initialize timer manager with loaded times
-        for task in self.tasks:
-            self.timer_manager.set_elapsed_time(task.id, task.elapsed_seconds)
-        
+        """Load the first page of tasks; the rest is read as the list scrolls"""
+        self.tasks = TaskRegistry()
+        self.load_search_index()
+        self.pager = TaskPager(self.data_store, config.SETTINGS['task_page_size'],
+                               on_page=self.on_tasks_paged, on_done=self.on_tasks_loaded)
         self.refresh_task_list()
+        self.task_model.set_pager(self.pager)
+        self.task_model.fetchMore()
+        self.load_view_state()
+        self.recover_running_time()
+        self.timer_manager.heartbeat = self.heartbeat
+        # Once the window is up; the job only reads the store
+        QTimer.singleShot(0, self.start_archiving)
+    
+    def open_heartbeat(self):
+        """Map the running-timer checkpoint file, or return None if that fails"""
+        try:
+            return Heartbeat(self.data_store.sidecar('.heartbeat')).open()
+        except (OSError, ValueError) as e:
+            print(f"Warning: Running time will not be checkpointed: {e}")
+            return None
+    
+    def recover_running_time(self):
+        """Credit time from a task left running when the app last died.
+
+        The heartbeat holds the running task and its last checkpoint; the
+        time between the last save and that checkpoint was never written.
+        """
+        record = self.heartbeat.read() if self.heartbeat is not None else None
+        if record is None:
+            return
+        task = self.task_model.fetch_until(record.task_id)
+        lost = record.checkpoint - record.unsaved_since
+        if task is not None and lost > 0:
+            if record.checkpoint > record.session_start:
+                self.session_log.record(task.id, record.session_start, record.checkpoint)
+            self.timer_manager.add_elapsed(task.id, lost)
+            self.mark_task_dirty(task.id)
+            self.save_tasks()
+            print(f"✓ Recovered {format_duration(int(lost))} of running time for {task.name}")
+        self.heartbeat.stop()
+    
+    def ensure_all_tasks(self):
+        """Read every task the list has not paged in yet"""
+        self.task_model.fetch_all()
+    
+    def on_background_page(self):
+        """Read one more page while a sort or filter is selected"""
+        if self.view_model.active() and self.task_model.canFetchMore():
+            self.task_model.fetchMore()
+        else:
+            self.background_pager.stop()
+    
+    def hideEvent(self, event):
+        """Write pending changes and stop UI ticks when the window is hidden"""
+        super().hideEvent(event)
+        self.autosave.flush()
+        self.update_ui_visibility()
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_ui_visibility()
+    
+    def update_ui_visibility(self):
+        """Let the timer display tick only while the window can be seen"""
+        self.timer_manager.set_ui_visible(self.isVisible() and not self.isMinimized())
+    
+    def load_search_index(self):
+        """Load the saved search index; tasks it is missing are indexed as pages are read.
+
+        The index file is removed once read and written again on quit, so
+        after a crash the index is rebuilt rather than trusted stale.
+        """
+        self.search_index_path = self.data_store.sidecar('.search')
+        index = SearchIndex.load(self.search_index_path)
+        # A rebuilt index only knows the tasks read so far
+        self.search_index_complete = index is not None
+        if index is None:
+            index = SearchIndex()
+        else:
+            self.search_index_path.unlink()
+        self.search_index = index
+    
+    def on_tasks_paged(self, page):
+        """Index the tasks of a newly read page that the index is missing"""
+        index = self.search_index
+        for task in page:
+            if task.id not in index:
+                index.update(task.id, task.name, task.notes)
+                self.notes_cache.touch(task)
+    
+    def on_tasks_loaded(self, task_ids):
+        """Drop index entries for tasks that are no longer stored.
+
+        Archived tasks stay; any the index is missing (after a crash) are
+        indexed by name, since their notes are compressed away.
+        """
+        archived = self.archive.ids()
+        for task_id in set(self.search_index.task_ids()) - task_ids - self.tasks.ids() - archived:
+            self.search_index.remove(task_id)
+        for task_id, name in self.archive.names().items():
+            if task_id not in self.search_index:
+                self.search_index.update(task_id, name, "")
+        self.search_index_complete = True
+        # Every stored task is listed now
+        self.task_cache.clear()
     
     def closeEvent(self, event):
         """Handle window close event"""
@@ -672,9 +2314,40 @@ class TimerApp(QMainWindow):
         event.ignore()
 
 def main():
-    app = QApplication(sys.argv)
-    window = TimerApp()
+    startup = StartupProfile()
+    startup.mark("imports")
+    parser = argparse.ArgumentParser(description="Mancom Timer & Notes")
+    parser.add_argument('--diagnostics', action='store_true',
+                        help="record timings from startup and show View → Diagnostics")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="record timings and write a Chrome trace to FILE on quit")
+    parser.add_argument('--start', metavar='TASK',
+                        help="start the task with this id or name (in the running instance, if any)")
+    # Anything else is left for Qt (-style, -platform, ...)
+    args, qt_args = parser.parse_known_args(sys.argv[1:])
+    
+    # A second launch hands its request to the running instance and exits
+    request = {'command': 'start', 'task': args.start} if args.start else {'command': 'show'}
+    instance = SingleInstance(data_file_path())
+    try:
+        reply = instance.hand_off(request)
+    except TimeoutError as e:
+        print(f"Warning: Could not reach the running instance: {e}")
+        sys.exit(1)
+    if reply is not None:
+        print(reply)
+        sys.exit(0)
+    startup.mark("instance")
+    
+    if args.diagnostics or args.trace:
+        recorder.enable()
+    app = QApplication(sys.argv[:1] + qt_args)
+    startup.mark("qt")
+    window = TimerApp(startup, trace_path=args.trace)
+    instance.listen(window.handle_instance_request)
     window.show()
+    if args.start:
+        print(window.handle_instance_request(request))
     sys.exit(app.exec_())
 
 if __name__ == '__main__':
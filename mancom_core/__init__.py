@@ -0,0 +1,21 @@
+"""
+Headless core of Mancom Timer & Notes: task model, storage and timing.
+
+Nothing in this package imports PyQt5, so scripts, cron jobs and the
+command line interface (python -m mancom_core) can use it without a
+display. The GUI in main.py is a layer on top.
+"""
+
+from .ids import IdAllocator
+from .models import TaskColumns, TaskData, TaskSnapshot, format_duration
+from .registry import SortedTasks, TaskRegistry
+from .storage import (DataStore, JournalDataStore, SqliteDataStore, TaskPager,
+                      create_data_store, write_json_atomic)
+from .timing import TimingEngine, monotonic_now
+
+__all__ = [
+    'TaskData', 'TaskSnapshot', 'TaskColumns', 'TaskRegistry', 'SortedTasks', 'format_duration',
+    'DataStore', 'JournalDataStore', 'SqliteDataStore', 'TaskPager',
+    'create_data_store', 'write_json_atomic',
+    'TimingEngine', 'monotonic_now', 'IdAllocator',
+]
@@ -0,0 +1,236 @@
+"""
+Cold-task archive for Mancom Timer & Notes
+
+Tasks nobody has created, timed, edited or restored for
+config.SETTINGS['archive_after_days'] move out of the data store into immutable, lzma-compressed segment files,
+so the store (and every load and save of it) only holds the working set:
+
+    <data file>.archive/
+        segment-000001.jsonl.xz   up to SEGMENT_TASKS tasks, one per line
+        index.json                id -> [segment, line, name, created_at, elapsed_seconds],
+                                  and when recently touched tasks were last touched
+
+The index holds what lists, search results and reports show, so a segment
+is only decompressed when an archived task is opened. Opening one
+restores it to the data store and drops it from the index; a segment file
+is deleted once none of its tasks are left in the index.
+"""
+
+import itertools
+import json
+import lzma
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+from .models import TaskData
+from .storage import write_json_atomic
+from .transfer import write_json_lines
+
+SEGMENT_TASKS = 5000
+
+# Archiving scans the whole store, so it runs at most this often
+ARCHIVE_EVERY = 24 * 3600
+
+class TaskArchive:
+    """Index of archived tasks and reader of their segment files"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.index_path = self.directory / 'index.json'
+        self._entries = {}
+        self._segment_sizes = {}
+        # When tasks were last edited or restored; sessions are in the
+        # session log, and entries older than the cutoff are dropped
+        self._touched = {}
+        self.next_segment = 1
+        self.archived_at = 0.0
+
+    def load(self):
+        """Read the index, if there is one; returns self"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return self
+        self._entries = data['tasks']
+        self.next_segment = data['next_segment']
+        self.archived_at = data['archived_at']
+        self._touched = data.get('touched', {})
+        for entry in self._entries.values():
+            self._segment_sizes[entry[0]] = self._segment_sizes.get(entry[0], 0) + 1
+        return self
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, task_id):
+        return task_id in self._entries
+
+    def ids(self):
+        return self._entries.keys()
+
+    def names(self):
+        """Return {task id: name} for every archived task"""
+        return {task_id: entry[2] for task_id, entry in self._entries.items()}
+
+    def due(self, now=None):
+        """True once ARCHIVE_EVERY has passed since the last archiving run"""
+        return (time.time() if now is None else now) - self.archived_at >= ARCHIVE_EVERY
+
+    def get(self, task_id):
+        """Return an archived task from the index alone; notes are read on first use"""
+        entry = self._entries.get(task_id)
+        if entry is None:
+            return None
+        task = TaskData(task_id, entry[2], entry[3])
+        task.elapsed_seconds = entry[4]
+        task.defer_notes(self.load_notes)
+        return task
+
+    def read(self, task_id):
+        """Return an archived task with its notes, decompressing its segment"""
+        entry = self._entries.get(task_id)
+        if entry is None:
+            return None
+        segment, line = entry[0], entry[1]
+        with lzma.open(self._segment_path(segment), 'rt', encoding='utf-8') as f:
+            record = json.loads(next(itertools.islice(f, line, None)))
+        return TaskData.from_dict(record)
+
+    def load_notes(self, task_id):
+        task = self.read(task_id)
+        return task.notes if task is not None else ""
+
+    def add(self, records):
+        """Write task dicts to new segments and index them; return their ids"""
+        added = []
+        records = iter(records)
+        while True:
+            chunk = list(itertools.islice(records, SEGMENT_TASKS))
+            if not chunk:
+                break
+            segment = self.next_segment
+            self._write_segment(segment, chunk)
+            self.next_segment += 1
+            self._segment_sizes[segment] = len(chunk)
+            for line, record in enumerate(chunk):
+                self._entries[record['id']] = [segment, line, record['name'], record['created_at'],
+                                               record.get('elapsed_seconds', 0)]
+                added.append(record['id'])
+        if added:
+            self._save_index()
+        return added
+
+    def touched_at(self, task_id):
+        """When task_id was last edited or restored, or None if not recently"""
+        return self._touched.get(task_id)
+
+    def touch(self, task_ids, now=None):
+        """Record that task_ids were just edited, so they count as in use"""
+        now = time.time() if now is None else now
+        for task_id in task_ids:
+            self._touched[task_id] = now
+        self._save_index()
+
+    def remove(self, task_ids, now=None):
+        """Drop restored tasks from the index, deleting segments left without tasks"""
+        now = time.time() if now is None else now
+        emptied = []
+        for task_id in task_ids:
+            entry = self._entries.pop(task_id, None)
+            if entry is None:
+                continue
+            # A restored task is in use; do not archive it again straight away
+            self._touched[task_id] = now
+            self._segment_sizes[entry[0]] -= 1
+            if not self._segment_sizes[entry[0]]:
+                del self._segment_sizes[entry[0]]
+                emptied.append(entry[0])
+        self._save_index()
+        # Only once the index no longer points into them
+        for segment in emptied:
+            self._segment_path(segment).unlink(missing_ok=True)
+
+    def mark_archived(self, cutoff, now=None):
+        """Record that an archiving run finished; forget touches before cutoff"""
+        self.archived_at = time.time() if now is None else now
+        self._touched = {task_id: touched for task_id, touched in self._touched.items()
+                         if touched >= cutoff}
+        self._save_index()
+
+    def _segment_path(self, segment):
+        return self.directory / f"segment-{segment:06d}.jsonl.xz"
+
+    def _write_segment(self, segment, records):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._segment_path(segment)
+        tmp_path = path.with_name(path.name + '.tmp')
+        try:
+            with open(tmp_path, 'wb') as raw:
+                with lzma.open(raw, 'wt', encoding='utf-8') as f:
+                    write_json_lines(f, records)
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def _save_index(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        write_json_atomic(self.index_path, {
+            'next_segment': self.next_segment,
+            'archived_at': self.archived_at,
+            'touched': self._touched,
+            'tasks': self._entries,
+        }, separators=(',', ':'))
+
+def is_cold(record, session_log, cutoff, archive=None):
+    """True if the task was not created, timed, edited or restored since cutoff (Unix time)"""
+    last_active = session_log.last_active(record['id'])
+    if last_active is not None and last_active >= cutoff:
+        return False
+    touched = archive.touched_at(record['id']) if archive is not None else None
+    if touched is not None and touched >= cutoff:
+        return False
+    try:
+        created = datetime.fromisoformat(record['created_at']).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return created < cutoff
+
+def archive_cold_records(store, archive, session_log, days, keep_ids=(), now=None):
+    """Copy tasks untouched for days from store into archive; return their ids.
+
+    The store is left alone, so this can run beside a process that keeps
+    saving to it; the caller deletes the returned tasks from the store.
+    """
+    now = time.time() if now is None else now
+    cutoff = now - days * 86400
+    keep_ids = set(keep_ids)
+    archived = archive.add(record for record in store.iter_records()
+                           if record['id'] not in keep_ids
+                           and is_cold(record, session_log, cutoff, archive))
+    archive.mark_archived(cutoff, now)
+    return archived
+
+def archive_cold_tasks(store, archive, session_log, days, keep_ids=(), now=None):
+    """Move tasks untouched for days out of store into archive; return how many.
+
+    Tasks are written to the archive before they are deleted from the
+    store, so an interruption can leave a task in both, never in neither.
+    """
+    archived = archive_cold_records(store, archive, session_log, days, keep_ids, now)
+    if not archived:
+        return 0
+    if store.incremental:
+        with store.bulk_writes():
+            store.save([], set(), archived)
+    else:
+        # A full store is rewritten without them, streamed from its own file
+        archived_ids = set(archived)
+        store.save(task for page in store.iter_pages(SEGMENT_TASKS) for task in page
+                   if task.id not in archived_ids)
+    return len(archived)
@@ -0,0 +1,297 @@
+"""
+Command line interface for Mancom Timer & Notes
+
+    python -m mancom_core list
+    python -m mancom_core start "Client call" [--create]
+    python -m mancom_core stop
+    python -m mancom_core status
+    python -m mancom_core report [--period day|week|month] [--format table|csv|markdown]
+    python -m mancom_core import archive.json|archive.jsonl|archive.csv
+    python -m mancom_core export tasks.json|tasks.jsonl|tasks.csv
+    python -m mancom_core archive [--days N]
+    python -m mancom_core restore TASK
+
+Works on machines without a display: nothing here imports PyQt5. A task
+started from the command line stays running between invocations; its start
+time is kept in a small .running file next to the data file.
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import time
+from datetime import datetime
+
+import config
+from .archive import TaskArchive, archive_cold_tasks
+from .ids import IdAllocator
+from .models import TaskData, format_duration
+from .registry import TaskRegistry
+from .sessions import SessionLog
+from .storage import create_data_store, write_json_atomic
+from .transfer import TaskImporter, write_records
+
+def read_running(store):
+    """Return {'task_id', 'started_at'} for the task started from the CLI, or None"""
+    try:
+        with open(store.sidecar('.running'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def find_task(tasks, key):
+    """Find a task in a TaskRegistry by id, or by name ignoring case"""
+    task = tasks.get(key)
+    if task is not None:
+        return task
+    lowered = key.lower()
+    for task in tasks:
+        if task.name.lower() == lowered:
+            return task
+    return None
+
+class Cli:
+    """Runs one command against the configured data store"""
+
+    def __init__(self, data_file=None, out=sys.stdout):
+        self.store = create_data_store(data_file)
+        self.out = out
+        self._tasks = None
+
+    @property
+    def tasks(self):
+        if self._tasks is None:
+            self._tasks = TaskRegistry(self.store.load())
+        return self._tasks
+
+    def archive(self):
+        return TaskArchive(self.store.sidecar('.archive')).load()
+
+    def close(self):
+        self.store.close()
+
+    def echo(self, text=""):
+        print(text, file=self.out)
+
+    def cmd_list(self, args):
+        running = read_running(self.store)
+        running_id = running['task_id'] if running else None
+        # Read-only walk over every task: the columnar table is much smaller
+        # than a list of TaskData
+        table = self.store.load_columns()
+        for row in range(len(table)):
+            task_id = table.id_at(row)
+            total = table.elapsed_seconds[row]
+            if task_id == running_id:
+                total += int(time.time() - running['started_at'])
+            marker = "▶" if task_id == running_id else " "
+            self.echo(f"{marker} {task_id:>6}  {format_duration(total)}  {table.names[row]}")
+        return 0
+
+    def cmd_start(self, args):
+        task = find_task(self.tasks, args.task)
+        if task is None:
+            if not args.create:
+                self.echo(f"No task matching {args.task!r} (use --create to add it)")
+                return 1
+            task = TaskData(IdAllocator().next_id(), args.task)
+            self.tasks.add(task)
+            self.store.save(self.tasks, {task.id}, ())
+
+        running = read_running(self.store)
+        if running and running['task_id'] == task.id:
+            self.echo(f"Already running: {task.name}")
+            return 0
+        if running:
+            self._stop(running)
+        write_json_atomic(self.store.sidecar('.running'),
+                          {'task_id': task.id, 'started_at': time.time()})
+        self.echo(f"▶ Started: {task.name}")
+        return 0
+
+    def cmd_stop(self, args):
+        running = read_running(self.store)
+        if not running:
+            self.echo("No task is running")
+            return 1
+        self._stop(running)
+        return 0
+
+    def cmd_status(self, args):
+        running = read_running(self.store)
+        if not running:
+            self.echo("No task is running")
+            return 0
+        task = find_task(self.tasks, running['task_id'])
+        session = int(time.time() - running['started_at'])
+        if task is None:
+            self.echo(f"Running task {running['task_id']} no longer exists")
+            return 1
+        started = datetime.fromtimestamp(running['started_at']).strftime('%Y-%m-%d %H:%M')
+        self.echo(f"▶ {task.name}")
+        self.echo(f"  Session: {format_duration(session)} (since {started})")
+        self.echo(f"  Total:   {format_duration(task.elapsed_seconds + session)}")
+        return 0
+
+    def cmd_report(self, args):
+        # Imported here so other commands never pay for NumPy
+        from . import reports
+
+        start = end = None
+        if args.since:
+            start = datetime.fromisoformat(args.since).timestamp()
+        if args.until:
+            end = datetime.fromisoformat(args.until).timestamp()
+        extra = []
+        running = read_running(self.store)
+        if running:
+            extra.append((running['task_id'], running['started_at'], time.time()))
+        report = reports.build_report(
+            SessionLog(self.store.sidecar('.sessions')).load(), args.period, start, end,
+            task_names={**self.archive().names(), **{task.id: task.name for task in self.tasks}},
+            extra_sessions=extra
+        )
+        if args.format == 'csv':
+            self.out.write(report.to_csv())
+        elif args.format == 'markdown':
+            self.out.write(report.to_markdown())
+        else:
+            for label, _, name, seconds in report.rows():
+                self.echo(f"{label:<12} {reports.format_hours(seconds):>8}  {name}")
+            self.echo(f"{'Total':<12} {reports.format_hours(report.total()):>8}")
+        return 0
+
+    def cmd_import(self, args):
+        try:
+            # An archived task keeps its id, and restoring it must not clash
+            archived_ids = self.archive().ids()
+            if self.store.incremental:
+                # Append batch by batch; only the ids are kept in memory
+                existing_ids = {record['id'] for record in self.store.iter_records()}
+                existing_ids |= archived_ids
+                importer = TaskImporter(args.file, existing_ids, args.batch_size)
+                with self.store.bulk_writes():
+                    for batch in importer.batches():
+                        self.store.save(batch, {task.id for task in batch}, ())
+                        self._progress("Importing", importer.bytes_read, importer.size)
+            else:
+                # A full store rewrites its file once, streaming the new
+                # tasks after the existing ones
+                importer = TaskImporter(args.file, self.tasks.ids() | archived_ids, args.batch_size)
+                def imported():
+                    for batch in importer.batches():
+                        yield from batch
+                        self._progress("Importing", importer.bytes_read, importer.size)
+                self.store.save(itertools.chain(self.tasks, imported()))
+        except (OSError, ValueError) as e:
+            self._progress_done()
+            self.echo(f"Import failed: {e}")
+            return 1
+        self._progress_done()
+        self.echo(f"✓ {importer.summary()}")
+        return 0
+
+    def cmd_export(self, args):
+        try:
+            count = write_records(args.file, self.store.iter_records())
+        except (OSError, ValueError) as e:
+            self.echo(f"Export failed: {e}")
+            return 1
+        self.echo(f"✓ Exported {count} task(s) to {args.file}")
+        return 0
+
+    def cmd_archive(self, args):
+        days = config.SETTINGS['archive_after_days'] if args.days is None else args.days
+        if days <= 0:
+            self.echo("Archiving is switched off (archive_after_days is 0)")
+            return 1
+        running = read_running(self.store)
+        archive = self.archive()
+        count = archive_cold_tasks(self.store, archive,
+                                   SessionLog(self.store.sidecar('.sessions')).load(), days,
+                                   keep_ids=[running['task_id']] if running else ())
+        self.echo(f"✓ Archived {count} task(s) untouched for {days} days; {len(archive)} in the archive")
+        return 0
+
+    def cmd_restore(self, args):
+        archive = self.archive()
+        task = archive.read(args.task)
+        if task is None:
+            lowered = args.task.lower()
+            task_id = next((task_id for task_id, name in archive.names().items()
+                            if name.lower() == lowered), None)
+            task = archive.read(task_id) if task_id is not None else None
+        if task is None:
+            self.echo(f"No archived task matching {args.task!r}")
+            return 1
+        if task.id not in self.tasks:
+            self.tasks.add(task)
+            self.store.save(self.tasks, {task.id}, ())
+        archive.remove([task.id])
+        self.echo(f"✓ Restored: {task.name}")
+        return 0
+
+    def _progress(self, label, done, total):
+        if sys.stderr.isatty():
+            print(f"\r{label}... {done * 100 // max(total, 1):3d}%", end='', file=sys.stderr, flush=True)
+
+    def _progress_done(self):
+        if sys.stderr.isatty():
+            print(file=sys.stderr)
+
+    def _stop(self, running):
+        now = time.time()
+        task = find_task(self.tasks, running['task_id'])
+        if task is not None:
+            task.elapsed_seconds += int(now - running['started_at'])
+            SessionLog(self.store.sidecar('.sessions')).load().record(
+                task.id, running['started_at'], now)
+            self.store.save(self.tasks, {task.id}, ())
+            self.echo(f"⏸ Stopped: {task.name} [{format_duration(task.elapsed_seconds)}]")
+        self.store.sidecar('.running').unlink()
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m mancom_core',
+                                     description="Mancom Timer & Notes command line")
+    parser.add_argument('--data', help="data file to use instead of the configured one")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('list', help="list tasks with their total time")
+
+    start = commands.add_parser('start', help="start timing a task (stops the running one)")
+    start.add_argument('task', help="task id or name")
+    start.add_argument('--create', action='store_true', help="create the task if no task matches")
+
+    commands.add_parser('stop', help="stop the running task")
+    commands.add_parser('status', help="show the running task")
+
+    report = commands.add_parser('report', help="time totals per day, week or month")
+    report.add_argument('--period', choices=('day', 'week', 'month'), default='day')
+    report.add_argument('--format', choices=('table', 'csv', 'markdown'), default='table')
+    report.add_argument('--since', help="start date (YYYY-MM-DD)")
+    report.add_argument('--until', help="end date, exclusive (YYYY-MM-DD)")
+
+    import_ = commands.add_parser('import', help="add tasks from a .json, .jsonl or .csv archive")
+    import_.add_argument('file')
+    import_.add_argument('--batch-size', type=int, default=1000,
+                         help="tasks written per batch (default: %(default)s)")
+
+    export = commands.add_parser('export', help="write every task to a .json, .jsonl or .csv file")
+    export.add_argument('file')
+
+    archive = commands.add_parser('archive', help="move tasks untouched for a long time to the archive")
+    archive.add_argument('--days', type=int,
+                         help="archive tasks untouched for this many days (default: archive_after_days)")
+
+    restore = commands.add_parser('restore', help="move an archived task back into the task list")
+    restore.add_argument('task', help="task id or name")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    cli = Cli(args.data)
+    try:
+        return getattr(cli, 'cmd_' + args.command)(args)
+    finally:
+        cli.close()
@@ -0,0 +1,110 @@
+"""
+Running-timer heartbeat for Mancom Timer & Notes
+
+While a task runs, a small fixed-size record next to the data file says
+which task it is, when its session started, since when its time has not
+been saved, and when the app last checked in. The record is memory-mapped
+and updated in place: a checkpoint stores one 8-byte timestamp, with no
+serialization and no write() call, and survives the process being killed.
+On the next launch the unsaved time between the last save and the last
+checkpoint is recovered.
+
+Layout (little-endian, RECORD_SIZE bytes):
+
+    magic b'MHB1' | state u8 | pad u8 | id length u16 |
+    session start f8 | unsaved since f8 | checkpoint f8 | task id
+
+All times are Unix timestamps. state is written last when a task starts
+and first when it stops, so a half-written start is never replayed.
+"""
+
+import mmap
+import os
+import struct
+from collections import namedtuple
+from pathlib import Path
+
+MAGIC = b'MHB1'
+MAX_ID_BYTES = 128
+_HEADER = struct.Struct('<4sBxHddd')
+RECORD_SIZE = _HEADER.size + MAX_ID_BYTES
+
+IDLE = 0
+RUNNING = 1
+
+# Offsets of the fields updated on their own
+_STATE_OFFSET = 4
+_UNSAVED_SINCE_OFFSET = 16
+_CHECKPOINT_OFFSET = 24
+_TIME = struct.Struct('<d')
+
+HeartbeatRecord = namedtuple('HeartbeatRecord', 'task_id session_start unsaved_since checkpoint')
+
+class Heartbeat:
+    """Memory-mapped checkpoint of the running task"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._map = None
+        self._running = False
+
+    def open(self):
+        """Map the record file, creating it if needed; returns self"""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != RECORD_SIZE:
+                os.ftruncate(fd, RECORD_SIZE)
+            self._map = mmap.mmap(fd, RECORD_SIZE)
+        finally:
+            # The mapping keeps its own reference to the file
+            os.close(fd)
+        return self
+
+    def read(self):
+        """Return the HeartbeatRecord of a task that was left running, or None"""
+        magic, state, id_length, session_start, unsaved_since, checkpoint = \
+            _HEADER.unpack_from(self._map)
+        if magic != MAGIC or state != RUNNING or id_length > MAX_ID_BYTES:
+            return None
+        task_id = self._map[_HEADER.size:_HEADER.size + id_length].decode('utf-8', 'replace')
+        return HeartbeatRecord(task_id, session_start, unsaved_since, checkpoint)
+
+    def start(self, task_id, session_start, now):
+        """Record task_id as running since session_start with nothing unsaved"""
+        encoded = task_id.encode('utf-8')
+        self.stop()
+        if len(encoded) > MAX_ID_BYTES:
+            # Too long to record; this task simply is not checkpointed
+            return
+        self._map[_HEADER.size:_HEADER.size + len(encoded)] = encoded
+        _HEADER.pack_into(self._map, 0, MAGIC, IDLE, len(encoded), session_start, now, now)
+        self._map[_STATE_OFFSET] = RUNNING
+        self._running = True
+
+    def checkpoint(self, now):
+        """Record that the running task was still running at now"""
+        if self._running:
+            _TIME.pack_into(self._map, _CHECKPOINT_OFFSET, now)
+
+    def saved(self, now):
+        """Record that the running task's time up to now has been saved.
+
+        Saves finish after later checkpoints and possibly out of order, so
+        neither time is moved backwards.
+        """
+        if self._running:
+            _, _, _, _, unsaved_since, checkpoint = _HEADER.unpack_from(self._map)
+            if now > unsaved_since:
+                _TIME.pack_into(self._map, _UNSAVED_SINCE_OFFSET, now)
+            if now > checkpoint:
+                _TIME.pack_into(self._map, _CHECKPOINT_OFFSET, now)
+
+    def stop(self):
+        """Record that no task is running"""
+        self._map[_STATE_OFFSET] = IDLE
+        self._running = False
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
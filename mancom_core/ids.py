@@ -0,0 +1,58 @@
+"""
+Time-ordered task id allocation for Mancom Timer & Notes
+
+Ids are 63-bit integers in the spirit of ULIDs and Snowflake ids:
+
+    milliseconds since 2020 | random per-process node | sequence
+           41 bits                  10 bits               12 bits
+
+plus a fixed 10**18 offset, so every new id has exactly 19 digits and
+sorts by creation time both as a number and as a string. Allocation needs
+no shared state: two app instances, the command line, or a restored
+backup cannot collide unless they pick the same random node in the same
+millisecond. Nothing has to scan existing tasks at startup, and the old
+small counter ids ("1", "2", ...) keep working next to the new ones.
+"""
+
+import secrets
+import threading
+import time
+
+ID_OFFSET = 10 ** 18
+EPOCH_MS = 1577836800000  # 2020-01-01T00:00:00Z
+NODE_BITS = 10
+SEQUENCE_BITS = 12
+
+class IdAllocator:
+    """Hands out unique, creation-ordered task ids as strings"""
+
+    def __init__(self, clock=time.time, node=None):
+        self._clock = clock
+        self._node = secrets.randbits(NODE_BITS) if node is None else node
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def next_id(self):
+        """Return a new id, greater than every id this allocator returned before"""
+        with self._lock:
+            # Never step back, even if the wall clock does
+            ms = max(int(self._clock() * 1000) - EPOCH_MS, self._last_ms)
+            if ms == self._last_ms:
+                self._sequence += 1
+                if self._sequence >> SEQUENCE_BITS:
+                    # 4096 ids in one millisecond: borrow the next one
+                    ms += 1
+                    self._sequence = 0
+            else:
+                self._sequence = 0
+            self._last_ms = ms
+            value = (ms << (NODE_BITS + SEQUENCE_BITS)) | (self._node << SEQUENCE_BITS) | self._sequence
+            return str(ID_OFFSET + value)
+
+def id_created_at(task_id):
+    """Return the Unix time encoded in an allocated id, or None for legacy ids"""
+    if not task_id.isdigit() or int(task_id) < ID_OFFSET:
+        return None
+    ms = (int(task_id) - ID_OFFSET) >> (NODE_BITS + SEQUENCE_BITS)
+    return (ms + EPOCH_MS) / 1000
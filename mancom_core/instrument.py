@@ -0,0 +1,180 @@
+"""
+Lightweight hot-path instrumentation for Mancom Timer & Notes
+
+Spans, counters and per-span duration histories are kept in fixed-size
+ring buffers, so memory stays bounded however long the app runs. While
+disabled, a timed function costs one attribute check per call.
+
+    from mancom_core.instrument import recorder
+
+    @recorder.timed('save_tasks')
+    def save_tasks(self): ...
+
+    with recorder.span('store.save'):
+        ...
+
+The buffers can be written out in Chrome trace format and opened in
+chrome://tracing or https://ui.perfetto.dev.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+class SpanStats:
+    """Count, all-time maximum and a window of recent durations for one span"""
+    __slots__ = ('count', 'max', 'recent')
+
+    def __init__(self, history):
+        self.count = 0
+        self.max = 0.0
+        self.recent = deque(maxlen=history)
+
+    def add(self, duration):
+        self.count += 1
+        if duration > self.max:
+            self.max = duration
+        self.recent.append(duration)
+
+    def percentile(self, fraction):
+        """Return the given percentile (0..1) of the recent durations, in seconds"""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class Recorder:
+    """Collects spans and counters while enabled.
+
+    events holds the last max_events spans as (name, start_ns, duration_ns,
+    thread id) for trace export; slow keeps the last spans that took at
+    least slow_threshold seconds, with their wall-clock time.
+    """
+
+    def __init__(self, max_events=10000, history=512, slow_threshold=0.05, max_slow=50):
+        self.enabled = False
+        self.history = history
+        self.slow_threshold = slow_threshold
+        self.events = deque(maxlen=max_events)
+        self.slow = deque(maxlen=max_slow)
+        self.stats = {}
+        self.counters = {}
+        self._origin_ns = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self._lock:
+            self.events.clear()
+            self.slow.clear()
+            self.stats.clear()
+            self.counters.clear()
+
+    def timed(self, name):
+        """Decorator recording each call of the function as a span"""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter_ns()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self._add(name, start, time.perf_counter_ns() - start)
+            return wrapper
+        return decorate
+
+    def span(self, name):
+        """Context manager recording the enclosed block as a span"""
+        return _Span(self, name)
+
+    def record(self, name, duration):
+        """Record a span of duration seconds that ended now"""
+        if self.enabled:
+            duration_ns = int(duration * 1e9)
+            self._add(name, time.perf_counter_ns() - duration_ns, duration_ns)
+
+    def observe(self, name, value):
+        """Add a measurement in seconds to name's histogram without a trace event"""
+        if self.enabled:
+            with self._lock:
+                self._stats(name).add(value)
+
+    def count(self, name, amount=1):
+        """Add amount to a counter"""
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self):
+        """Return [(name, count, p50, p95, max)] in seconds, sorted by name"""
+        with self._lock:
+            return [(name, stats.count, stats.percentile(0.5), stats.percentile(0.95), stats.max)
+                    for name, stats in sorted(self.stats.items())]
+
+    def slow_operations(self):
+        """Return [(wall time, name, seconds)] for recent slow spans, newest first"""
+        with self._lock:
+            return list(reversed(self.slow))
+
+    def chrome_trace(self):
+        """Return the recorded spans and counters as a Chrome trace dict"""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+            counters = dict(self.counters)
+        trace = [{'name': name, 'cat': 'mancom', 'ph': 'X', 'pid': pid, 'tid': tid,
+                  'ts': (start - self._origin_ns) / 1000, 'dur': duration / 1000}
+                 for name, start, duration, tid in events]
+        if counters:
+            trace.append({'name': 'counters', 'ph': 'C', 'pid': pid, 'tid': 0,
+                          'ts': (time.perf_counter_ns() - self._origin_ns) / 1000,
+                          'args': counters})
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+    def dump_chrome_trace(self, path):
+        """Write the Chrome trace JSON to path"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+
+    def _add(self, name, start_ns, duration_ns):
+        duration = duration_ns / 1e9
+        with self._lock:
+            self.events.append((name, start_ns, duration_ns, threading.get_ident()))
+            self._stats(name).add(duration)
+            if duration >= self.slow_threshold:
+                self.slow.append((time.time() - duration, name, duration))
+
+    def _stats(self, name):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = SpanStats(self.history)
+        return stats
+
+class _Span:
+    __slots__ = ('recorder', 'name', 'start')
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if self.recorder.enabled:
+            self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.start is not None:
+            self.recorder._add(self.name, self.start, time.perf_counter_ns() - self.start)
+        return False
+
+# Shared recorder used by the app; disabled until something enables it
+recorder = Recorder()
@@ -0,0 +1,119 @@
+"""
+Advisory file locks for Mancom Timer & Notes
+"""
+
+import contextlib
+import os
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, fall back to thread locking only
+    fcntl = None
+
+class FileLock:
+    """Exclusive advisory lock on a lock file, shared between processes.
+
+    Uses flock(), which locks an open file description rather than the
+    process, so a thread lock is taken first to keep threads of one process
+    out of each other's way too. Other processes only see the lock if they
+    use it as well; nothing stops a plain open() of the data file.
+
+        with store.write_lock:
+            write the data file
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._thread_lock = threading.Lock()
+        self._fd = None
+
+    def acquire(self, blocking=True):
+        """Take the lock; with blocking=False return False instead of waiting"""
+        if not self._thread_lock.acquire(blocking):
+            return False
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            self._thread_lock.release()
+            raise
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                self._thread_lock.release()
+                if blocking:
+                    raise
+                return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+        return False
+
+class SharedUse:
+    """Shared advisory lock held by every process that uses a file.
+
+    hold() marks the file as in use by this process until release().
+    sole() is for work that must not happen under another process, such
+    as rewriting a file that others have mapped:
+
+        with pack_users.sole() as sole:
+            if sole:
+                rewrite the file
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._fd = None
+
+    def hold(self):
+        """Mark the file as in use by this process"""
+        if self._fd is None:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_SH)
+            self._fd = fd
+
+    def release(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    @contextlib.contextmanager
+    def sole(self):
+        """Yield True, with the file held exclusively, if no other process uses it.
+
+        Yields False where advisory locks are not available, since other
+        processes cannot be seen there.
+        """
+        if fcntl is None:
+            yield False
+            return
+        self.hold()
+        # Converting a flock() is not atomic and a failed conversion may
+        # drop the shared lock anyway, so give it up first
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            sole = True
+        except OSError:
+            sole = False
+        try:
+            yield sole
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_SH)
@@ -0,0 +1,294 @@
+"""
+Task data model for Mancom Timer & Notes
+"""
+
+import sys
+from array import array
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+def format_duration(total_seconds):
+    """Format seconds as HH:MM:SS"""
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    seconds = total_seconds % 60
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+_MICROSECOND = timedelta(microseconds=1)
+
+def pack_id(task_id):
+    """Return task_id as an int when str() gives it back exactly, else as a string"""
+    if type(task_id) is int:
+        return task_id
+    if task_id.isascii() and task_id.isdigit() and (task_id[0] != '0' or task_id == '0'):
+        return int(task_id)
+    return sys.intern(task_id)
+
+def pack_time(created_at):
+    """Return an ISO timestamp as integer microseconds since the epoch.
+
+    Naive timestamps are counted as-is, without a timezone, so the value
+    converts back to the identical string. Anything that would not
+    round-trip exactly (offsets, other layouts) is kept as the string.
+    """
+    if type(created_at) is int:
+        return created_at
+    # Only the layouts datetime.isoformat() produces can round-trip:
+    # YYYY-MM-DDTHH:MM:SS, optionally with a non-zero .ffffff
+    size = len(created_at)
+    if not (size == 19 or (size == 26 and created_at[19] == '.' and created_at[20:] != '000000')):
+        return created_at
+    if created_at[4] != '-' or created_at[7] != '-' or created_at[10] != 'T':
+        return created_at
+    try:
+        moment = datetime.fromisoformat(created_at)
+    except ValueError:
+        return created_at
+    if moment.tzinfo is not None:
+        return created_at
+    seconds = ((moment.toordinal() - _EPOCH_ORDINAL) * 86400
+               + moment.hour * 3600 + moment.minute * 60 + moment.second)
+    return seconds * 1000000 + moment.microsecond
+
+def unpack_time(value):
+    """Inverse of pack_time"""
+    if type(value) is str:
+        return value
+    return (_EPOCH + value * _MICROSECOND).isoformat()
+
+class TaskData:
+    """Data model for a task.
+
+    Slotted and compact: numeric ids are held as ints, creation times as
+    epoch microseconds and names are interned. The public attributes
+    (id, name, created_at) still read and write the same strings as the
+    JSON schema, so conversion stays lossless.
+    """
+    __slots__ = ('_id', '_name', '_created', '_notes', '_notes_loader', '_notes_hash',
+                 'elapsed_seconds')
+
+    def __init__(self, task_id, name, created_at=None):
+        self._id = pack_id(task_id)
+        self._name = sys.intern(name)
+        self._created = pack_time(created_at or datetime.now().isoformat())
+        self._notes = ""
+        self._notes_loader = None
+        self._notes_hash = None
+        self.elapsed_seconds = 0
+
+    @property
+    def id(self):
+        task_id = self._id
+        return str(task_id) if type(task_id) is int else task_id
+
+    @property
+    def numeric_id(self):
+        """The id as an int, or None for ids that are not plain numbers"""
+        return self._id if type(self._id) is int else None
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        self._name = sys.intern(value)
+
+    @property
+    def created_at(self):
+        """ISO creation timestamp"""
+        return unpack_time(self._created)
+
+    @created_at.setter
+    def created_at(self, value):
+        self._created = pack_time(value)
+
+    @property
+    def created_date(self):
+        """Creation date as YYYY-MM-DD"""
+        return self.created_at[:10]
+
+    @property
+    def notes(self):
+        """Task notes, fetched from the store on first access if deferred"""
+        if self._notes_loader is not None:
+            loader = self._notes_loader
+            self._notes_loader = None
+            self._notes = loader(self._notes_hash if self._notes_hash is not None else self.id)
+        return self._notes
+
+    @notes.setter
+    def notes(self, value):
+        self._notes = value
+        self._notes_loader = None
+        self._notes_hash = None
+
+    @property
+    def notes_hash(self):
+        """Content hash of the notes as stored in a note pack, or None"""
+        return self._notes_hash
+
+    @property
+    def notes_loaded(self):
+        """True once notes are in memory (always True unless deferred)"""
+        return self._notes_loader is None
+
+    def notes_stored(self, notes_hash):
+        """Record that the loaded notes are in a note pack under notes_hash"""
+        self._notes_hash = notes_hash
+
+    def defer_notes(self, loader, notes_hash=None):
+        """Drop the notes and load them lazily the first time they are read.
+
+        loader is called with notes_hash for notes stored by content hash,
+        otherwise with the task id.
+        """
+        self._notes = ""
+        self._notes_loader = loader
+        self._notes_hash = notes_hash
+
+    def snapshot(self):
+        """Return an immutable copy for saving off the GUI thread.
+
+        Deferred notes are not fetched; the snapshot records them as None.
+        """
+        notes = self._notes if self._notes_loader is None else None
+        return TaskSnapshot(self.id, self.name, self.created_at, notes, self.elapsed_seconds,
+                            self._notes_hash)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'created_at': self.created_at,
+            'notes': self.notes,
+            'elapsed_seconds': self.elapsed_seconds
+        }
+
+    @staticmethod
+    def from_dict(data):
+        # Fills the slots directly; this runs once per task on every load
+        task = TaskData.__new__(TaskData)
+        task._id = pack_id(data['id'])
+        task._name = sys.intern(data['name'])
+        task._created = pack_time(data['created_at'])
+        # Share one empty string instead of keeping each parsed ""
+        task._notes = data.get('notes') or ""
+        task._notes_loader = None
+        task._notes_hash = None
+        task.elapsed_seconds = data.get('elapsed_seconds', 0)
+        return task
+
+def tasks_with_ids(tasks, task_ids):
+    """Return the tasks whose ids are in task_ids, keeping their order.
+
+    TaskData ids are compared in packed form, so scanning many tasks does
+    not build an id string for each.
+    """
+    wanted = {pack_id(task_id) for task_id in task_ids}
+    return [task for task in tasks
+            if (task._id if type(task) is TaskData else pack_id(task.id)) in wanted]
+
+class TaskSnapshot(namedtuple('TaskSnapshot', 'id name created_at notes elapsed_seconds notes_hash',
+                              defaults=(None,))):
+    """Immutable TaskData copy accepted anywhere a store expects a task"""
+    __slots__ = ()
+
+    @property
+    def notes_loaded(self):
+        return self.notes is not None
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'created_at': self.created_at,
+            'notes': self.notes or '',
+            'elapsed_seconds': self.elapsed_seconds
+        }
+
+class TaskColumns:
+    """Column-oriented, array-backed task table for bulk read-only work.
+
+    Holds the same data as a list of TaskData in a handful of arrays, for
+    code that walks many tasks at once (listing, exporting, reports).
+    Ids, creation times and elapsed seconds are machine integers; the rare
+    value that is not a plain number is kept in a side table.
+    """
+    _ODD = -1 << 63  # marks a row whose id or time lives in the side table
+
+    def __init__(self):
+        self.ids = array('q')
+        self.created = array('q')
+        self.elapsed_seconds = array('q')
+        self.names = []
+        self.notes = []
+        self._odd_ids = {}  # row -> non-numeric id
+        self._odd_times = {}  # row -> timestamp kept as a string
+
+    @classmethod
+    def from_dicts(cls, records):
+        """Build from dicts in the JSON schema"""
+        table = cls()
+        for record in records:
+            table.append(record['id'], record['name'], record['created_at'],
+                         record.get('notes') or "", record.get('elapsed_seconds', 0))
+        return table
+
+    @classmethod
+    def from_tasks(cls, tasks):
+        table = cls()
+        for task in tasks:
+            table.append(task._id, task.name, task._created, task.notes, task.elapsed_seconds)
+        return table
+
+    def append(self, task_id, name, created_at, notes="", elapsed_seconds=0):
+        row = len(self.names)
+        task_id = pack_id(task_id)
+        if type(task_id) is int and task_id < 1 << 63:
+            self.ids.append(task_id)
+        else:
+            self.ids.append(self._ODD)
+            self._odd_ids[row] = task_id
+        created = pack_time(created_at)
+        if type(created) is int and self._ODD < created < 1 << 63:
+            self.created.append(created)
+        else:
+            self.created.append(self._ODD)
+            self._odd_times[row] = created
+        self.elapsed_seconds.append(elapsed_seconds)
+        self.names.append(sys.intern(name))
+        self.notes.append(notes)
+
+    def __len__(self):
+        return len(self.names)
+
+    def id_at(self, row):
+        task_id = self.ids[row]
+        return str(task_id) if task_id != self._ODD else str(self._odd_ids[row])
+
+    def created_at(self, row):
+        created = self.created[row]
+        return unpack_time(created) if created != self._ODD else self._odd_times[row]
+
+    def to_dict(self, row):
+        return {
+            'id': self.id_at(row),
+            'name': self.names[row],
+            'created_at': self.created_at(row),
+            'notes': self.notes[row],
+            'elapsed_seconds': self.elapsed_seconds[row]
+        }
+
+    def to_dicts(self):
+        return [self.to_dict(row) for row in range(len(self))]
+
+    def task(self, row):
+        """Return row as a TaskData"""
+        return TaskData.from_dict(self.to_dict(row))
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.task(row)
@@ -0,0 +1,294 @@
+"""
+Content-addressed note storage for Mancom Timer & Notes
+
+Notes of NOTE_BLOB_SIZE characters or more are not written into task
+records. Each distinct text is stored once in an append-only pack file
+next to the data file, and records refer to it by its SHA-256 hash:
+
+    {"id": ..., "notes_blob": "<sha256 hex>", "elapsed_seconds": ...}
+
+Identical notes (templates, pasted logs) share one entry, a save appends a
+note only when its hash is not in the pack yet, and the data file and
+journal stay small. The pack is memory-mapped, and a note is read from it
+the first time its task's notes are opened.
+
+Layout:
+
+    magic b'MNP1' | entries of: sha256 (32 bytes) | length u64 | UTF-8 text
+
+Entries that no record refers to any more are dropped when the pack is
+rewritten by collect(), which stores call after writing every record.
+Every process using the pack holds a shared lock on a .users file next to
+it, and collect() only rewrites the pack while no other process does: a
+task read by another process may point at any entry. Hashes that tasks
+in this process defer their notes to (see retain()) are always kept.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+
+from .locking import SharedUse
+
+MAGIC = b'MNP1'
+_ENTRY = struct.Struct('<32sQ')
+
+# Shorter notes stay inline in the task record
+NOTE_BLOB_SIZE = 512
+
+# collect() leaves packs smaller than this alone, and larger ones until at
+# least half of them is unreferenced
+COLLECT_MIN_SIZE = 1 << 20
+
+class NotePack:
+    """Append-only, memory-mapped store of note texts keyed by content hash.
+
+    Writing (task_record, sync, collect) must happen under the data store's
+    write lock; reading is safe from any thread.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._index = {}  # sha256 digest -> offset of its entry
+        self._scanned = 0  # end of the last complete entry indexed
+        self._identity = None  # inode of the file indexed
+        self._map = None
+        self._writer = None
+        self._users = SharedUse(self.path.with_name(self.path.name + '.users'))
+        # Hashes tasks in this process may still read; never collected
+        self._retained = set()
+        # Task id -> hash task_record() computed, until take_hashed()
+        self._hashed = {}
+
+    def task_record(self, task):
+        """Return task as a data file record, its notes moved into the pack if large.
+
+        Notes that were never loaded keep the hash they were stored under,
+        and loaded notes whose hash is known are not hashed again. Call
+        sync() before the record is written anywhere.
+        """
+        notes_hash = task.notes_hash
+        record = {'id': task.id, 'name': task.name, 'created_at': task.created_at}
+        if not task.notes_loaded and notes_hash is not None:
+            record['notes_blob'] = notes_hash
+        else:
+            notes = task.notes or ""
+            if len(notes) < NOTE_BLOB_SIZE:
+                record['notes'] = notes
+            elif notes_hash is not None and self.contains(notes_hash):
+                record['notes_blob'] = notes_hash
+            else:
+                record['notes_blob'] = self.add(notes)
+                with self._lock:
+                    self._hashed[task.id] = record['notes_blob']
+        record['elapsed_seconds'] = task.elapsed_seconds
+        return record
+
+    def take_hashed(self):
+        """Return {task id: hash} for notes task_record() hashed since the last call"""
+        with self._lock:
+            hashed, self._hashed = self._hashed, {}
+        return hashed
+
+    def retain(self, notes_hash):
+        """Keep notes_hash through collect(); call before deferring a task's notes to it"""
+        with self._lock:
+            self._users.hold()
+            self._retained.add(notes_hash)
+
+    def contains(self, notes_hash):
+        digest = bytes.fromhex(notes_hash)
+        with self._lock:
+            if digest not in self._index:
+                self._refresh()
+            return digest in self._index
+
+    def add(self, notes):
+        """Store notes unless identical text is stored already; return its hash"""
+        data = notes.encode('utf-8')
+        digest = hashlib.sha256(data).digest()
+        with self._lock:
+            if digest not in self._index:
+                self._refresh()
+            if digest not in self._index:
+                writer = self._open_writer()
+                offset = writer.tell()
+                writer.write(_ENTRY.pack(digest, len(data)))
+                writer.write(data)
+                self._index[digest] = offset
+                self._scanned = writer.tell()
+        return digest.hex()
+
+    def sync(self):
+        """Make everything added so far durable"""
+        with self._lock:
+            if self._writer is not None:
+                os.fsync(self._writer.fileno())
+                self._writer.close()
+                self._writer = None
+
+    def read(self, notes_hash):
+        """Return the notes stored under notes_hash ("" if the pack has none)"""
+        digest = bytes.fromhex(notes_hash)
+        with self._lock:
+            offset = self._index.get(digest)
+            # The offset is only used in the file it was indexed from
+            if offset is None or not self._map_to(self._scanned):
+                self._refresh()
+                offset = self._index.get(digest)
+                if offset is None or not self._map_to(self._scanned):
+                    print(f"Warning: Notes {notes_hash[:12]} are missing from {self.path}")
+                    return ""
+            return self._entry_data(offset).decode('utf-8')
+
+    def collect(self, referenced):
+        """Rewrite the pack without entries whose hash is not in referenced.
+
+        Only done once the pack is large and mostly unreferenced, so
+        edits to large notes do not rewrite it over and over, and only
+        while no other process uses the pack.
+        """
+        with self._lock:
+            self.sync()
+            self._refresh()
+            if self._scanned < COLLECT_MIN_SIZE:
+                return
+            with self._users.sole() as sole:
+                if not sole:
+                    return
+                # Index what other processes appended before they let go
+                self._refresh()
+                if not self._map_to(self._scanned):
+                    return
+                live = []
+                for notes_hash in set(referenced) | self._retained:
+                    offset = self._index.get(bytes.fromhex(notes_hash))
+                    if offset is not None:
+                        live.append(offset)
+                if len(live) == len(self._index):
+                    return
+                live.sort()
+                live_size = len(MAGIC) + sum(_ENTRY.size + self._entry_length(offset)
+                                             for offset in live)
+                if live_size * 2 > self._scanned:
+                    return
+                self._rewrite(live)
+            self._refresh()
+
+    def _rewrite(self, live):
+        """Replace the pack with a copy of the entries at the offsets in live"""
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(MAGIC)
+                for offset in live:
+                    f.write(self._map[offset:offset + _ENTRY.size + self._entry_length(offset)])
+                f.flush()
+                os.fsync(f.fileno())
+            # A mapped file cannot be replaced on Windows
+            self._close_map()
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Warning: Could not compact {self.path}: {e}")
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def close(self):
+        with self._lock:
+            self.sync()
+            self._close_map()
+            self._users.release()
+
+    def _open_writer(self):
+        if self._writer is None:
+            self._refresh()
+            if self._identity is None:
+                writer = open(self.path, 'wb', buffering=0)
+                writer.write(MAGIC)
+                self._reset(os.fstat(writer.fileno()).st_ino)
+                self._scanned = len(MAGIC)
+            else:
+                writer = open(self.path, 'r+b', buffering=0)
+                self._scanned = max(self._scanned, len(MAGIC))
+                if os.fstat(writer.fileno()).st_size > self._scanned:
+                    # Drop an entry torn by a crash mid-append
+                    self._close_map()
+                    writer.truncate(self._scanned)
+                writer.seek(self._scanned)
+            self._writer = writer
+        return self._writer
+
+    def _refresh(self):
+        """Index entries appended since the last call, by any process"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._reset(None)
+            return
+        if stat.st_ino != self._identity or stat.st_size < self._scanned:
+            # Replaced by collect(), here or in another process
+            self._reset(stat.st_ino)
+        size = stat.st_size
+        if size <= max(self._scanned, len(MAGIC)):
+            return
+        # Headers are read through a buffered file rather than the map, so
+        # indexing does not page the whole pack into memory
+        with open(self.path, 'rb') as f:
+            if self._scanned == 0:
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise ValueError(f"{self.path} is not a note pack")
+                self._scanned = len(MAGIC)
+            offset = self._scanned
+            f.seek(offset)
+            while offset + _ENTRY.size <= size:
+                digest, length = _ENTRY.unpack(f.read(_ENTRY.size))
+                end = offset + _ENTRY.size + length
+                if end > size:
+                    break
+                self._index.setdefault(digest, offset)
+                f.seek(end)
+                offset = end
+        self._scanned = offset
+
+    def _reset(self, identity):
+        self._close_map()
+        self._index = {}
+        self._scanned = 0
+        self._identity = identity
+
+    # Callers map every indexed entry first, with _map_to(self._scanned)
+    def _entry_length(self, offset):
+        return _ENTRY.unpack_from(self._map, offset)[1]
+
+    def _entry_data(self, offset):
+        start = offset + _ENTRY.size
+        return self._map[start:start + self._entry_length(offset)]
+
+    def _map_to(self, size):
+        """Map at least size bytes of the file indexed; False if it was replaced since"""
+        if self._map is not None and len(self._map) >= size:
+            return True
+        self._close_map()
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            self._reset(None)
+            return False
+        with f:
+            stat = os.fstat(f.fileno())
+            if stat.st_ino != self._identity or stat.st_size < size:
+                # Offsets in the index belong to the old file
+                self._reset(None)
+                return False
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return True
+
+    def _close_map(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
@@ -0,0 +1,254 @@
+"""
+Indexed task registry for Mancom Timer & Notes
+"""
+
+import bisect
+
+class TaskRegistry:
+    """Tasks in display order with an id index.
+
+    Lookup, insert and delete by id are O(1) dict operations; converting
+    between an id and its position in the order is O(log n). Positions come
+    from a Fenwick tree counting live slots: tasks are appended to a slot
+    list, deletion leaves a hole, and the slot list is compacted once holes
+    outnumber live tasks, so deletes stay amortized constant apart from the
+    O(log n) tree update.
+
+    Iterating yields tasks in order, so a registry can be passed anywhere
+    a list of tasks was accepted.
+    """
+
+    # Compaction is not worth it below this many holes
+    MIN_COMPACT_HOLES = 64
+
+    def __init__(self, tasks=()):
+        self._rebuild(list(tasks))
+
+    def _rebuild(self, tasks):
+        by_id = {}
+        slot_of = {}
+        for slot, task in enumerate(tasks):
+            task_id = task.id
+            by_id[task_id] = task
+            slot_of[task_id] = slot
+        if len(by_id) != len(tasks):
+            # Duplicate ids (e.g. a hand-merged data file): keep the first
+            # position and the last record, as a journal replay would
+            self._rebuild(list({task.id: task for task in tasks}.values()))
+            return
+        self._by_id = by_id
+        self._slot_of = slot_of
+        self._slots = tasks
+        self._holes = 0
+        # Without holes slot == position; the tree is built on first delete
+        self._tree = None
+
+    def _build_tree(self):
+        """Build the Fenwick tree over the slot list in O(n)"""
+        size = len(self._slots)
+        tree = [0] * (size + 1)
+        for slot, task in enumerate(self._slots):
+            if task is not None:
+                tree[slot + 1] += 1
+        for node in range(1, size + 1):
+            parent = node + (node & -node)
+            if parent <= size:
+                tree[parent] += tree[node]
+        self._tree = tree
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        if not self._holes:
+            return iter(self._slots)
+        return (task for task in self._slots if task is not None)
+
+    def __contains__(self, task_id):
+        return task_id in self._by_id
+
+    def get(self, task_id, default=None):
+        """Return the task with task_id, or default"""
+        return self._by_id.get(task_id, default)
+
+    def ids(self):
+        """Return a view of every task id (unordered)"""
+        return self._by_id.keys()
+
+    def add(self, task):
+        """Append task; return its position"""
+        if task.id in self._by_id:
+            raise ValueError(f"Duplicate task id {task.id!r}")
+        slot = len(self._slots)
+        self._slots.append(task)
+        self._by_id[task.id] = task
+        self._slot_of[task.id] = slot
+        if self._tree is not None:
+            # The new node covers slots (node - lowbit, node]: itself plus
+            # the live slots just before it
+            node = slot + 1
+            low = node - (node & -node)
+            self._tree.append(1 + self._prefix(slot) - self._prefix(low))
+        return len(self._by_id) - 1
+
+    def remove(self, task_id):
+        """Remove and return the task with task_id, or None if absent"""
+        task = self._by_id.pop(task_id, None)
+        if task is None:
+            return None
+        slot = self._slot_of.pop(task_id)
+        if self._tree is None:
+            self._build_tree()
+        self._slots[slot] = None
+        self._holes += 1
+        node = slot + 1
+        while node < len(self._tree):
+            self._tree[node] -= 1
+            node += node & -node
+        if self._holes >= self.MIN_COMPACT_HOLES and self._holes > len(self._by_id):
+            self._rebuild([task for task in self._slots if task is not None])
+        return task
+
+    def select(self, task_ids):
+        """Return the tasks with ids in task_ids, in registry order.
+
+        Costs O(k log k) for k ids, however many tasks there are; ids not
+        in the registry are skipped.
+        """
+        slot_of = self._slot_of
+        slots = sorted(slot_of[task_id] for task_id in task_ids if task_id in slot_of)
+        return [self._slots[slot] for slot in slots]
+
+    def position(self, task_id):
+        """Return the position of task_id in the order, or None if absent"""
+        slot = self._slot_of.get(task_id)
+        if slot is None:
+            return None
+        if not self._holes:
+            return slot
+        return self._prefix(slot)
+
+    def at(self, position):
+        """Return the task at position in the order"""
+        if not 0 <= position < len(self._by_id):
+            raise IndexError(position)
+        if not self._holes:
+            return self._slots[position]
+        # Walk down the tree for the slot holding the (position + 1)th live task
+        tree = self._tree
+        node = 0
+        remaining = position + 1
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            child = node + step
+            if child < len(tree) and tree[child] < remaining:
+                node = child
+                remaining -= tree[child]
+            step >>= 1
+        return self._slots[node]
+
+    def _prefix(self, slot):
+        """Number of live tasks in slots before slot"""
+        total = 0
+        node = slot
+        tree = self._tree
+        while node:
+            total += tree[node]
+            node -= node & -node
+        return total
+
+class SortedTasks:
+    """A sorted, filtered selection of tasks, kept in order incrementally.
+
+    Each task's sort key is computed once, when it is added or updated,
+    and kept next to its id in a sorted list; key(task) is not called
+    again for other tasks. Updating one task moves just that entry by
+    binary search, so a task whose key changes often (total time of the
+    running task) never causes a full re-sort. Ties are broken by id.
+
+    Positions are display positions, counted from the end of the sorted
+    list when reverse is true. It has the read interface of TaskRegistry
+    (len, iteration, get, position, at), so models can show either.
+    """
+
+    def __init__(self, key, accept=None, reverse=False, tasks=()):
+        self.key = key
+        self.accept = accept
+        self.reverse = reverse
+        self.rebuild(tasks)
+
+    def rebuild(self, tasks):
+        """Replace the contents with the accepted tasks of tasks, sorted"""
+        accept = self.accept
+        self._tasks = {task.id: task for task in tasks if accept is None or accept(task)}
+        self._key_of = {task_id: (self.key(task), task_id) for task_id, task in self._tasks.items()}
+        self._keys = sorted(self._key_of.values())
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        keys = reversed(self._keys) if self.reverse else self._keys
+        return (self._tasks[task_id] for _, task_id in keys)
+
+    def __contains__(self, task_id):
+        return task_id in self._tasks
+
+    def get(self, task_id, default=None):
+        return self._tasks.get(task_id, default)
+
+    def ids(self):
+        return self._tasks.keys()
+
+    def position(self, task_id):
+        """Return the position of task_id, or None if it is not shown"""
+        key = self._key_of.get(task_id)
+        if key is None:
+            return None
+        return self._display(bisect.bisect_left(self._keys, key), len(self._keys))
+
+    def at(self, position):
+        if not 0 <= position < len(self._keys):
+            raise IndexError(position)
+        return self._tasks[self._keys[self._display(position, len(self._keys))][1]]
+
+    def plan(self, task):
+        """Return (old, new) positions of task were update(task) called now.
+
+        old is None if the task is not shown now, new if it will not be;
+        new counts positions after the update. Nothing is changed.
+        """
+        old_key = self._key_of.get(task.id)
+        size = len(self._keys)
+        old = None if old_key is None else bisect.bisect_left(self._keys, old_key)
+        if self.accept is not None and not self.accept(task):
+            return (None if old is None else self._display(old, size)), None
+        new_key = (self.key(task), task.id)
+        new = bisect.bisect_left(self._keys, new_key)
+        if old is None:
+            return None, self._display(new, size + 1)
+        if old < new:
+            # The old entry is taken out before the new one goes in
+            new -= 1
+        return self._display(old, size), self._display(new, size)
+
+    def update(self, task):
+        """Re-key task, adding or removing it as the filter now decides"""
+        self.discard(task.id)
+        if self.accept is not None and not self.accept(task):
+            return
+        key = (self.key(task), task.id)
+        self._tasks[task.id] = task
+        self._key_of[task.id] = key
+        bisect.insort(self._keys, key)
+
+    def discard(self, task_id):
+        """Remove task_id if it is shown"""
+        key = self._key_of.pop(task_id, None)
+        if key is None:
+            return
+        del self._tasks[task_id]
+        del self._keys[bisect.bisect_left(self._keys, key)]
+
+    def _display(self, index, size):
+        return size - 1 - index if self.reverse else index
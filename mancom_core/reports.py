@@ -0,0 +1,260 @@
+"""
+Time reports for Mancom Timer & Notes
+
+Buckets logged sessions by day, week or month and by task. With NumPy
+installed the whole session log is processed as arrays (the SessionLog
+columns are shared, not copied); without it the same results come from a
+single pass over the stdlib arrays.
+"""
+
+import bisect
+import csv
+import io
+from datetime import date, datetime, timedelta
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PERIODS = ('day', 'week', 'month')
+
+# Above this many (period, task) cells the NumPy path groups with np.unique
+# instead of a dense bincount table
+DENSE_CELL_LIMIT = 5_000_000
+
+def format_hours(seconds):
+    """Format seconds as H:MM for reports"""
+    minutes = int(round(seconds / 60))
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+def _period_start(day, period):
+    if period == 'day':
+        return day
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+def _next_period(day, period):
+    if period == 'day':
+        return day + timedelta(days=1)
+    if period == 'week':
+        return day + timedelta(days=7)
+    if day.month == 12:
+        return date(day.year + 1, 1, 1)
+    return date(day.year, day.month + 1, 1)
+
+def period_label(day, period):
+    """Label for the period starting on day"""
+    if period == 'day':
+        return day.isoformat()
+    if period == 'week':
+        iso_year, iso_week, _ = day.isocalendar()
+        return f"{iso_year}-W{iso_week:02d}"
+    return f"{day.year}-{day.month:02d}"
+
+def period_edges(period, start, end):
+    """Return (labels, edges) for the local-time periods covering [start, end).
+
+    edges has one more entry than labels; period i spans edges[i]..edges[i+1].
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown report period: {period!r}")
+    day = _period_start(datetime.fromtimestamp(start).date(), period)
+    labels, edges = [], []
+    while True:
+        edge = datetime.combine(day, datetime.min.time()).timestamp()
+        if edge >= end and labels:
+            edges.append(edge)
+            return labels, edges
+        labels.append(period_label(day, period))
+        edges.append(edge)
+        day = _next_period(day, period)
+
+class Report:
+    """Seconds per (period, task) with CSV and Markdown output"""
+
+    def __init__(self, period, labels, cells, task_names=None):
+        self.period = period
+        self.labels = labels
+        # {(period_index, task_id): seconds}
+        self.cells = cells
+        self.task_names = task_names or {}
+
+    def task_name(self, task_id):
+        return self.task_names.get(task_id, f"(deleted task {task_id})")
+
+    def rows(self):
+        """Return (period_label, task_id, task_name, seconds) sorted by period then task name"""
+        rows = [(self.labels[period_index], task_id, self.task_name(task_id), seconds)
+                for (period_index, task_id), seconds in self.cells.items() if seconds > 0]
+        rows.sort(key=lambda row: (row[0], row[2].lower()))
+        return rows
+
+    def totals_by_period(self):
+        """Return {period_label: seconds}"""
+        totals = {}
+        for (period_index, _), seconds in self.cells.items():
+            label = self.labels[period_index]
+            totals[label] = totals.get(label, 0.0) + seconds
+        return totals
+
+    def totals_by_task(self):
+        """Return {task_id: seconds}"""
+        totals = {}
+        for (_, task_id), seconds in self.cells.items():
+            totals[task_id] = totals.get(task_id, 0.0) + seconds
+        return totals
+
+    def total(self):
+        return sum(self.cells.values())
+
+    def to_csv(self):
+        """Return the report as CSV text (one row per period and task)"""
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow([self.period, 'task_id', 'task', 'seconds', 'hours'])
+        for label, task_id, name, seconds in self.rows():
+            writer.writerow([label, task_id, name, int(round(seconds)), f"{seconds / 3600:.2f}"])
+        return out.getvalue()
+
+    def to_markdown(self):
+        """Return the report as a Markdown table with per-period subtotals"""
+        lines = [f"| {self.period.title()} | Task | Time |", "|---|---|---:|"]
+        period_totals = self.totals_by_period()
+        previous = None
+        for label, _, name, seconds in self.rows():
+            if previous is not None and label != previous:
+                lines.append(f"| {previous} | **Total** | **{format_hours(period_totals[previous])}** |")
+            name = name.replace('|', '\\|')
+            lines.append(f"| {label} | {name} | {format_hours(seconds)} |")
+            previous = label
+        if previous is not None:
+            lines.append(f"| {previous} | **Total** | **{format_hours(period_totals[previous])}** |")
+        lines.append(f"| | **Grand total** | **{format_hours(self.total())}** |")
+        return '\n'.join(lines) + '\n'
+
+def build_report(session_log, period='day', start=None, end=None,
+                 task_names=None, extra_sessions=()):
+    """Bucket logged time by period and task.
+
+    start/end (epoch seconds) default to the span of the log. extra_sessions
+    are (task_id, start, end) intervals not in the log yet, such as the
+    running session.
+    """
+    extra_sessions = list(extra_sessions)
+    if start is None:
+        candidates = [s for _, s, _ in extra_sessions]
+        if len(session_log):
+            candidates.append(session_log.starts[0])
+        start = min(candidates) if candidates else datetime.now().timestamp()
+    if end is None:
+        candidates = [e for _, _, e in extra_sessions]
+        if len(session_log):
+            candidates.append(session_log.ends[-1])
+        end = max(candidates) if candidates else start
+    labels, edges = period_edges(period, start, end)
+
+    if np is not None:
+        cells = _bucket_numpy(session_log, edges, start, end)
+    else:
+        cells = _bucket_arrays(session_log, edges, start, end)
+    for task_id, session_start, session_end in extra_sessions:
+        _add_split(cells, edges, task_id, max(session_start, start), min(session_end, end))
+    return Report(period, labels, cells, task_names)
+
+def _add_split(cells, edges, task_id, start, end):
+    """Add one interval to cells, split at period edges"""
+    if end <= start:
+        return
+    index = bisect.bisect_right(edges, start) - 1
+    while start < end:
+        boundary = min(end, edges[index + 1])
+        key = (index, task_id)
+        cells[key] = cells.get(key, 0.0) + (boundary - start)
+        start = boundary
+        index += 1
+
+def _bucket_arrays(session_log, edges, start, end):
+    """Stdlib fallback: one pass over the sessions in range"""
+    starts, ends, numbers = session_log.starts, session_log.ends, session_log.task_numbers
+    task_ids = session_log.task_ids
+    first = bisect.bisect_right(ends, start)
+    last = bisect.bisect_left(starts, end)
+    cells = {}
+    index = bisect.bisect_right(edges, start) - 1
+    next_edge = edges[index + 1]
+    for position in range(first, last):
+        session_start = max(starts[position], start)
+        session_end = min(ends[position], end)
+        while session_start >= next_edge:
+            index += 1
+            next_edge = edges[index + 1]
+        key = (index, task_ids[numbers[position]])
+        if session_end <= next_edge:
+            cells[key] = cells.get(key, 0.0) + (session_end - session_start)
+        else:
+            _add_split(cells, edges, key[1], session_start, session_end)
+    return cells
+
+def _bucket_numpy(session_log, edges, start, end):
+    """Vectorized bucketing over the SessionLog column buffers"""
+    cells = {}
+    if not len(session_log):
+        return cells
+    starts = np.frombuffer(session_log.starts, dtype=np.float64)
+    ends = np.frombuffer(session_log.ends, dtype=np.float64)
+    numbers = np.frombuffer(session_log.task_numbers, dtype=np.uint32)
+    first = int(np.searchsorted(ends, start, 'right'))
+    last = int(np.searchsorted(starts, end, 'left'))
+    if first >= last:
+        return cells
+    starts, ends, numbers = starts[first:last], ends[first:last], numbers[first:last]
+
+    # Only the first and last session can extend past the report range
+    durations = ends - starts
+    durations[0] -= max(0.0, start - starts[0])
+    durations[-1] -= max(0.0, ends[-1] - end)
+
+    # Sessions are sorted, so each period is a contiguous run of sessions;
+    # expanding run lengths avoids a per-session search
+    period_count = len(edges) - 1
+    inner_edges = np.asarray(edges[1:-1])
+    bounds = np.searchsorted(starts, inner_edges, 'left')
+    periods = np.repeat(np.arange(period_count, dtype=np.int64),
+                        np.diff(bounds, prepend=0, append=len(starts)))
+
+    task_ids = session_log.task_ids
+    task_count = len(task_ids)
+    if period_count * task_count <= DENSE_CELL_LIMIT:
+        keys = periods
+        keys *= task_count
+        keys += numbers
+        sums = np.bincount(keys, weights=durations, minlength=period_count * task_count)
+        occupied = np.flatnonzero(sums)
+        occupied_sums = sums[occupied]
+    else:
+        keys = periods
+        keys *= task_count
+        keys += numbers
+        occupied, inverse = np.unique(keys, return_inverse=True)
+        occupied_sums = np.bincount(inverse, weights=durations)
+    for key, seconds in zip(occupied.tolist(), occupied_sums.tolist()):
+        period_index, task_number = divmod(key, task_count)
+        cells[(period_index, task_ids[task_number])] = seconds
+
+    # Sessions never overlap, so at most one crosses each edge: the last
+    # one starting before it. Carry the part past the edge into the next
+    # period; a session spanning several edges is carried once per edge.
+    for period_index, (edge, bound) in enumerate(zip(inner_edges.tolist(), bounds.tolist())):
+        if bound == 0:
+            continue
+        session_end = min(float(ends[bound - 1]), end)
+        if session_end <= edge:
+            continue
+        task_id = task_ids[numbers[bound - 1]]
+        carried = session_end - edge
+        cells[(period_index, task_id)] -= carried
+        key = (period_index + 1, task_id)
+        cells[key] = cells.get(key, 0.0) + carried
+    return cells
@@ -0,0 +1,226 @@
+"""
+Full-text search index for Mancom Timer & Notes tasks
+"""
+
+import bisect
+import heapq
+import json
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from urllib.parse import quote, unquote
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Matches in a task name count this many times more than matches in notes
+NAME_WEIGHT = 3
+
+# A prefix expands to at most this many vocabulary tokens (shortest first)
+PREFIX_EXPANSION_LIMIT = 64
+
+def tokenize(text):
+    """Split text into lower-case word tokens"""
+    return TOKEN_RE.findall(text.lower())
+
+def token_counts(name, notes):
+    """Return the weighted token counts SearchIndex.update() indexes for a task"""
+    counts = Counter(tokenize(notes))
+    for token in tokenize(name):
+        counts[token] += NAME_WEIGHT
+    return counts
+
+# Task ids are free text (imports keep ids like "PROJ 12"), so whitespace
+# and '%' in a posting's id are percent-escaped; tokens never contain either
+_UNSAFE_ID = re.compile(r'[\s%]')
+
+def _encode_id(task_id):
+    if task_id.isalnum() or not _UNSAFE_ID.search(task_id):
+        return task_id
+    return quote(task_id, safe='')
+
+def _encode_counts(counts):
+    return ' '.join(f'{key}:{count}' for key, count in counts.items())
+
+def _encode_postings(postings):
+    return ' '.join(f'{_encode_id(task_id)}:{count}' for task_id, count in postings.items())
+
+def _decode_counts(raw):
+    counts = {}
+    for entry in raw.split():
+        key, _, count = entry.rpartition(':')
+        counts[unquote(key) if '%' in key else key] = int(count)
+    return counts
+
+class SearchIndex:
+    """In-memory inverted index over task names and notes.
+
+    Postings map token -> {task_id: weighted term frequency}. A sorted
+    vocabulary list gives prefix matches with bisect, so the last word of
+    a query matches as you type. Each task's token counts are kept so an
+    update only touches the postings whose counts changed.
+
+    A loaded index keeps postings and per-task counts as the encoded strings
+    read from disk and decodes an entry the first time it is used, so both
+    loading and saving cost little more than the entries actually touched.
+    """
+    VERSION = 3
+
+    def __init__(self):
+        self._postings = {}         # token -> {task_id: count}, decoded
+        self._raw_postings = {}     # token -> encoded postings not modified since load
+        self._doc_tokens = {}       # task_id -> {token: count}, decoded
+        self._raw_doc_tokens = {}   # task_id -> encoded counts not yet decoded
+        self._vocabulary = []
+
+    def __len__(self):
+        return len(self._doc_tokens) + len(self._raw_doc_tokens)
+
+    def __contains__(self, task_id):
+        return task_id in self._doc_tokens or task_id in self._raw_doc_tokens
+
+    def task_ids(self):
+        """Return the ids of all indexed tasks"""
+        return [*self._doc_tokens, *self._raw_doc_tokens]
+
+    def update(self, task_id, name, notes, counts=None):
+        """Index (or re-index) a task's name and notes.
+
+        counts may be passed in if token_counts() was already run, e.g. on
+        a worker thread.
+        """
+        if counts is None:
+            counts = token_counts(name, notes)
+        old_counts = self._task_counts(task_id) or {}
+
+        for token in old_counts.keys() - counts.keys():
+            self._remove_posting(token, task_id)
+        for token, count in counts.items():
+            if old_counts.get(token) != count:
+                self._mutable_postings(token)[task_id] = count
+        self._doc_tokens[task_id] = dict(counts)
+
+    def remove(self, task_id):
+        """Drop a task from the index"""
+        counts = self._task_counts(task_id)
+        if counts is None:
+            return
+        del self._doc_tokens[task_id]
+        for token in counts:
+            self._remove_posting(token, task_id)
+
+    def search(self, query, limit=200):
+        """Return up to limit task ids matching every word of query, best first.
+
+        The last query word also matches as a prefix. Scores sum weighted
+        term frequency times inverse document frequency.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        doc_count = len(self) or 1
+        scores = None
+        for position, term in enumerate(terms):
+            if position == len(terms) - 1:
+                tokens = self._prefix_tokens(term)
+            else:
+                tokens = [term]
+            term_scores = {}
+            for token in tokens:
+                postings = self._token_postings(token)
+                if not postings:
+                    continue
+                idf = math.log(1 + doc_count / len(postings))
+                if scores is not None and len(scores) < len(postings):
+                    # Only candidates from earlier terms can still match
+                    for task_id in scores:
+                        count = postings.get(task_id)
+                        if count:
+                            term_scores[task_id] = term_scores.get(task_id, 0.0) + count * idf
+                else:
+                    for task_id, count in postings.items():
+                        term_scores[task_id] = term_scores.get(task_id, 0.0) + count * idf
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {task_id: score + term_scores[task_id]
+                          for task_id, score in scores.items() if task_id in term_scores}
+            if not scores:
+                return []
+
+        return heapq.nlargest(limit, scores, key=scores.__getitem__)
+
+    def save(self, path):
+        """Write the index to path"""
+        postings = dict(self._raw_postings)
+        for token, token_postings in self._postings.items():
+            if token not in postings:
+                postings[token] = _encode_postings(token_postings)
+        docs = dict(self._raw_doc_tokens)
+        for task_id, counts in self._doc_tokens.items():
+            docs[task_id] = _encode_counts(counts)
+
+        path = Path(path)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'postings': postings, 'docs': docs}, f,
+                      separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save(); returns None if missing or unreadable"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get('version') != cls.VERSION:
+            return None
+
+        index = cls()
+        index._raw_postings = data['postings']
+        index._raw_doc_tokens = data['docs']
+        index._vocabulary = sorted(index._raw_postings)
+        return index
+
+    def _task_counts(self, task_id):
+        counts = self._doc_tokens.get(task_id)
+        if counts is None and task_id in self._raw_doc_tokens:
+            counts = self._doc_tokens[task_id] = _decode_counts(self._raw_doc_tokens.pop(task_id))
+        return counts
+
+    def _token_postings(self, token):
+        postings = self._postings.get(token)
+        if postings is None:
+            raw = self._raw_postings.get(token)
+            if raw is None:
+                return None
+            postings = self._postings[token] = _decode_counts(raw)
+        return postings
+
+    def _mutable_postings(self, token):
+        postings = self._token_postings(token)
+        if postings is None:
+            postings = self._postings[token] = {}
+            bisect.insort(self._vocabulary, token)
+        else:
+            self._raw_postings.pop(token, None)
+        return postings
+
+    def _prefix_tokens(self, prefix):
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + '\U0010ffff', start)
+        tokens = self._vocabulary[start:end]
+        if len(tokens) > PREFIX_EXPANSION_LIMIT:
+            tokens = heapq.nsmallest(PREFIX_EXPANSION_LIMIT, tokens, key=len)
+        return tokens
+
+    def _remove_posting(self, token, task_id):
+        postings = self._mutable_postings(token)
+        postings.pop(task_id, None)
+        if not postings:
+            del self._postings[token]
+            del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
@@ -0,0 +1,277 @@
+"""
+Session-interval time log for Mancom Timer & Notes
+
+Every start/stop of a task timer is recorded as a (task_id, start, end)
+interval in epoch seconds. Intervals are stored column-wise in append-only
+files so loading is a bulk array read and recording a session appends a
+few bytes.
+"""
+
+import bisect
+import itertools
+import operator
+from array import array
+from datetime import datetime, time, timedelta
+from pathlib import Path
+
+from .locking import FileLock
+
+def day_bounds(day):
+    """Return (start, end) epoch seconds of a local calendar day"""
+    start = datetime.combine(day, time.min)
+    return start.timestamp(), (start + timedelta(days=1)).timestamp()
+
+def week_bounds(day):
+    """Return (start, end) epoch seconds of the Monday-based local week containing day"""
+    monday = datetime.combine(day - timedelta(days=day.weekday()), time.min)
+    return monday.timestamp(), (monday + timedelta(days=7)).timestamp()
+
+class SessionLog:
+    """Sorted, non-overlapping task intervals with logarithmic range queries.
+
+    Only one task runs at a time, so sessions arrive in start order and
+    never overlap; both the start and end columns are therefore sorted and
+    bisect finds the sessions touching any instant or range. A running sum
+    of durations (global and per task, built on first use) turns range
+    totals into two lookups plus clipping of the boundary sessions.
+
+    Files under directory: start.f8 and end.f8 (float64 epoch seconds),
+    task.u4 (index into tasks.txt, one task id per line). The app and the
+    command line append to the same log; record() takes the lock file
+    there and reads in what the other appended first, so both number
+    tasks alike.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory) if directory else None
+        self.starts = array('d')
+        self.ends = array('d')
+        self.task_numbers = array('I')
+        self.task_ids = []
+        self._task_numbers_by_id = {}
+        self._ids_size = 0  # bytes of tasks.txt read so far
+        self._cumulative = None
+        self._by_task = None
+
+    def __len__(self):
+        return len(self.starts)
+
+    def load(self):
+        """Read the log from directory; a torn final record is dropped"""
+        if self.directory is None or not self.directory.exists():
+            return self
+        columns = [(self.starts, 'start.f8'), (self.ends, 'end.f8'), (self.task_numbers, 'task.u4')]
+        for column, filename in columns:
+            path = self.directory / filename
+            if path.exists():
+                data = path.read_bytes()
+                column.frombytes(data[:len(data) - len(data) % column.itemsize])
+        self._read_new_ids()
+
+        complete = min(len(column) for column, _ in columns)
+        while complete and self.task_numbers[complete - 1] >= len(self.task_ids):
+            complete -= 1
+        for column, filename in columns:
+            if len(column) > complete:
+                # Drop the torn record from memory and disk so appends stay aligned
+                del column[complete:]
+                with open(self.directory / filename, 'r+b') as f:
+                    f.truncate(complete * column.itemsize)
+        return self
+
+    def record(self, task_id, start, end):
+        """Append a finished session and persist it.
+
+        A start earlier than the previous session's end (e.g. after the
+        wall clock was set back) is clamped so intervals stay sorted.
+        """
+        if self.directory is None:
+            self._add(task_id, start, end)
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with FileLock(self.directory / 'lock'):
+            self._read_new_ids()
+            self._read_new_sessions()
+            self._add(task_id, start, end)
+
+    def _add(self, task_id, start, end):
+        if self.ends:
+            start = max(start, self.ends[-1])
+        end = max(start, end)
+        if end == start:
+            return
+
+        new_task = task_id not in self._task_numbers_by_id
+        if new_task:
+            self._task_numbers_by_id[task_id] = len(self.task_ids)
+            self.task_ids.append(task_id)
+        number = self._task_numbers_by_id[task_id]
+
+        position = len(self.starts)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.task_numbers.append(number)
+        if self._cumulative is not None:
+            self._cumulative.append(self._cumulative[-1] + (end - start))
+        if self._by_task is not None:
+            positions, cumulative = self._by_task.setdefault(number, (array('I'), array('d', [0.0])))
+            positions.append(position)
+            cumulative.append(cumulative[-1] + (end - start))
+
+        if self.directory is not None:
+            self._append(task_id if new_task else None, start, end, number)
+
+    def task_at(self, timestamp):
+        """Return the id of the task that was running at timestamp, or None"""
+        index = bisect.bisect_right(self.starts, timestamp) - 1
+        if index >= 0 and self.ends[index] > timestamp:
+            return self.task_ids[self.task_numbers[index]]
+        return None
+
+    def total(self, start, end, task_id=None):
+        """Seconds logged within [start, end), optionally for one task"""
+        if task_id is None:
+            starts, ends = self.starts, self.ends
+            cumulative = self._global_cumulative()
+            position = None
+        else:
+            number = self._task_numbers_by_id.get(task_id)
+            if number is None:
+                return 0.0
+            positions, cumulative = self._task_index().get(number, (array('I'), array('d', [0.0])))
+            starts = _Column(self.starts, positions)
+            ends = _Column(self.ends, positions)
+            position = positions
+
+        first = bisect.bisect_right(ends, start)
+        last = bisect.bisect_left(starts, end)
+        if first >= last:
+            return 0.0
+        seconds = cumulative[last] - cumulative[first]
+        # Clip sessions straddling the range boundaries
+        first_index = first if position is None else position[first]
+        last_index = last - 1 if position is None else position[last - 1]
+        seconds -= max(0.0, start - self.starts[first_index])
+        seconds -= max(0.0, self.ends[last_index] - end)
+        return seconds
+
+    def day_total(self, day, task_id=None):
+        """Seconds logged on a local calendar day"""
+        return self.total(*day_bounds(day), task_id=task_id)
+
+    def week_total(self, day, task_id=None):
+        """Seconds logged in the Monday-based week containing day"""
+        return self.total(*week_bounds(day), task_id=task_id)
+
+    def sessions(self, start, end, task_id=None):
+        """Yield (task_id, start, end) for sessions overlapping [start, end), clipped to it"""
+        first = bisect.bisect_right(self.ends, start)
+        last = bisect.bisect_left(self.starts, end)
+        number = None if task_id is None else self._task_numbers_by_id.get(task_id)
+        if task_id is not None and number is None:
+            return
+        for index in range(first, last):
+            if number is None or self.task_numbers[index] == number:
+                yield (self.task_ids[self.task_numbers[index]],
+                       max(self.starts[index], start), min(self.ends[index], end))
+
+    def last_active(self, task_id):
+        """Return when task_id's latest session ended, or None if it has none"""
+        number = self._task_numbers_by_id.get(task_id)
+        if number is None:
+            return None
+        positions, _ = self._task_index().get(number, (None, None))
+        if not positions:
+            return None
+        return self.ends[positions[-1]]
+
+    def rollup(self):
+        """Return total logged seconds per task id"""
+        totals = {}
+        for number, start, end in zip(self.task_numbers, self.starts, self.ends):
+            task_id = self.task_ids[number]
+            totals[task_id] = totals.get(task_id, 0.0) + (end - start)
+        return totals
+
+    def _global_cumulative(self):
+        if self._cumulative is None:
+            durations = map(operator.sub, self.ends, self.starts)
+            self._cumulative = array('d', itertools.accumulate(durations, initial=0.0))
+        return self._cumulative
+
+    def _task_index(self):
+        if self._by_task is None:
+            by_task = {}
+            for position, number in enumerate(self.task_numbers):
+                positions, cumulative = by_task.setdefault(number, (array('I'), array('d', [0.0])))
+                positions.append(position)
+                cumulative.append(cumulative[-1] + (self.ends[position] - self.starts[position]))
+            self._by_task = by_task
+        return self._by_task
+
+    def _read_new_ids(self):
+        """Read task ids appended to tasks.txt since the last read"""
+        path = self.directory / 'tasks.txt'
+        if not path.exists():
+            return
+        with open(path, 'rb') as f:
+            f.seek(self._ids_size)
+            data = f.read()
+        # A line without its newline is still being written
+        size = data.rfind(b'\n') + 1
+        for task_id in data[:size].decode('utf-8').splitlines():
+            self._task_numbers_by_id.setdefault(task_id, len(self.task_ids))
+            self.task_ids.append(task_id)
+        self._ids_size += size
+
+    def _read_new_sessions(self):
+        """Read sessions another process appended since this log was loaded"""
+        count = len(self.starts)
+        tails = []
+        for column, filename in ((self.starts, 'start.f8'), (self.ends, 'end.f8'),
+                                 (self.task_numbers, 'task.u4')):
+            tail = array(column.typecode)
+            path = self.directory / filename
+            if path.exists():
+                with open(path, 'rb') as f:
+                    f.seek(count * tail.itemsize)
+                    data = f.read()
+                tail.frombytes(data[:len(data) - len(data) % tail.itemsize])
+            tails.append(tail)
+        complete = min(len(tail) for tail in tails)
+        while complete and tails[2][complete - 1] >= len(self.task_ids):
+            complete -= 1
+        if not complete:
+            return
+        self.starts.extend(tails[0][:complete])
+        self.ends.extend(tails[1][:complete])
+        self.task_numbers.extend(tails[2][:complete])
+        # Rebuilt on next use
+        self._cumulative = None
+        self._by_task = None
+
+    def _append(self, new_task_id, start, end, number):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if new_task_id is not None:
+            line = (new_task_id + '\n').encode('utf-8')
+            with open(self.directory / 'tasks.txt', 'ab') as f:
+                f.write(line)
+            self._ids_size += len(line)
+        # Task column last: load() only trusts records whose task number exists
+        for filename, column, value in (('start.f8', 'd', start), ('end.f8', 'd', end),
+                                        ('task.u4', 'I', number)):
+            with open(self.directory / filename, 'ab') as f:
+                f.write(array(column, [value]).tobytes())
+
+class _Column:
+    """Read-only view of column values at the given positions, for bisect"""
+
+    def __init__(self, column, positions):
+        self.column = column
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, index):
+        return self.column[self.positions[index]]
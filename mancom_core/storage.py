@@ -0,0 +1,674 @@
+"""
+Task persistence backends for Mancom Timer & Notes
+"""
+
+import contextlib
+import itertools
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+import config
+from .locking import FileLock
+from .models import TaskColumns, TaskData, tasks_with_ids
+from .notepack import NotePack
+from .registry import TaskRegistry
+from .transfer import page_json_array, read_json_array, write_records
+
+def write_json_atomic(path, data, **dump_kwargs):
+    """Write JSON to a temp file, fsync it, then atomically replace path"""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, **dump_kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def select_tasks(tasks, task_ids):
+    """Return the tasks whose ids are in task_ids, in the order of tasks.
+
+    A TaskRegistry is probed id by id; a plain list has to be scanned.
+    Keeping the order matters: new tasks are appended to the journal or
+    table in the order they are saved, which is the order they load in.
+    """
+    if isinstance(tasks, TaskRegistry):
+        return tasks.select(task_ids)
+    return tasks_with_ids(tasks, task_ids)
+
+class DataStore:
+    """Handles data persistence.
+
+    Writes happen under write_lock, an advisory lock on a .lock file next to
+    the data file, so two processes (the app and the command line, say)
+    never write it at the same time. Large notes are kept in a NotePack
+    next to the data file and referenced from the records by hash.
+    """
+    # True if save() only needs the changed tasks rather than all of them
+    incremental = False
+
+    def __init__(self, filename='tasks_data.json'):
+        self.filepath = Path(filename)
+        self.write_lock = FileLock(self.sidecar('.lock'))
+        self.notes = NotePack(self.sidecar('.notes'))
+
+    def save(self, tasks, changed_ids=None, deleted_ids=()):
+        """Save tasks to file.
+
+        changed_ids/deleted_ids describe what changed since the last save;
+        this store always rewrites everything and ignores them.
+        """
+        with self.write_lock:
+            referenced = set()
+            write_records(self.filepath, self._stored_records(tasks, referenced), 'json')
+            self.notes.collect(referenced)
+
+    def load(self):
+        """Load tasks from file; notes kept in the note pack are deferred"""
+        return [self._task_from_record(item) for item in self._load_records()]
+
+    def load_columns(self):
+        """Load tasks into a TaskColumns table, for bulk read-only use"""
+        return TaskColumns.from_dicts(map(self._resolve_notes, self._load_records()))
+
+    def iter_pages(self, page_size):
+        """Yield the stored tasks in order as lists of at most page_size TaskData.
+
+        Only as much of the file is read as the caller asks for, so the
+        first page costs the same however many tasks there are.
+        """
+        records = self._stream_records()
+        while True:
+            page = [self._task_from_record(item) for item in itertools.islice(records, page_size)]
+            if not page:
+                return
+            yield page
+
+    def get_tasks(self, task_ids):
+        """Return the stored tasks whose ids are in task_ids, keyed by id.
+
+        The file is streamed only until every id was found, and only those
+        records are decoded into TaskData.
+        """
+        wanted = set(task_ids)
+        found = {}
+        if not wanted:
+            return found
+        with contextlib.closing(self._stream_records()) as records:
+            for record in records:
+                if record['id'] in wanted:
+                    found[record['id']] = self._task_from_record(record)
+                    if len(found) == len(wanted):
+                        break
+        return found
+
+    def _stream_records(self):
+        if self.filepath.exists():
+            yield from page_json_array(self.filepath)
+
+    def iter_records(self):
+        """Yield the stored tasks as dicts in the JSON schema, notes inline, for export"""
+        return map(self._resolve_notes, self._load_records())
+
+    def _load_records(self):
+        """Return the stored records, which may reference the note pack"""
+        if not self.filepath.exists():
+            return []
+        # Parsed one record at a time, so the document text and a list of
+        # every parsed dict are never in memory together
+        return read_json_array(self.filepath)
+
+    @contextlib.contextmanager
+    def bulk_writes(self):
+        """Group many incremental saves, such as an import written batch by batch"""
+        yield
+
+    def close(self):
+        """Release resources held by the store"""
+        self.notes.close()
+
+    def sidecar(self, suffix):
+        """Return the path of a file stored next to the data file"""
+        return self.filepath.with_name(self.filepath.name + suffix)
+
+    def _stored_records(self, tasks, referenced):
+        """Yield the records to write for tasks, adding their note hashes to referenced"""
+        for task in tasks:
+            record = self.notes.task_record(task)
+            if 'notes_blob' in record:
+                referenced.add(record['notes_blob'])
+            yield record
+        # The notes have to be on disk before the records that point to them
+        self.notes.sync()
+
+    def _task_from_record(self, record):
+        task = TaskData.from_dict(record)
+        notes_hash = record.get('notes_blob')
+        if notes_hash is not None:
+            self.notes.retain(notes_hash)
+            task.defer_notes(self.notes.read, notes_hash)
+        return task
+
+    def _resolve_notes(self, record):
+        """Return record with notes kept in the note pack read back inline"""
+        notes_hash = record.get('notes_blob')
+        if notes_hash is None:
+            return record
+        return {'id': record['id'], 'name': record['name'], 'created_at': record['created_at'],
+                'notes': self.notes.read(notes_hash),
+                'elapsed_seconds': record.get('elapsed_seconds', 0)}
+
+class TaskPager:
+    """Reads a store's tasks a page at a time, when asked for more.
+
+    on_page(page) is called for each page read, and on_done(task_ids) with
+    the ids of every task read once the store has no more. A task is never
+    returned twice, even if the data file is rewritten between pages.
+    """
+    PAGE_SIZE = 200
+
+    def __init__(self, store, page_size=PAGE_SIZE, on_page=None, on_done=None):
+        self._pages = store.iter_pages(page_size)
+        self._seen = set()
+        self.on_page = on_page
+        self.on_done = on_done
+
+    def has_more(self):
+        return self._pages is not None
+
+    def next_page(self):
+        """Return the next page of tasks, or [] once every task was read"""
+        while self._pages is not None:
+            page = next(self._pages, None)
+            if page is None:
+                seen = self._seen
+                self._pages = None
+                self._seen = None
+                if self.on_done is not None:
+                    self.on_done(seen)
+                return []
+            seen = self._seen
+            page = [task for task in page if task.id not in seen]
+            if not page:
+                continue
+            seen.update(task.id for task in page)
+            if self.on_page is not None:
+                self.on_page(page)
+            return page
+        return []
+
+    def skip(self, task_ids):
+        """Never return the tasks with these ids, e.g. ones archived meanwhile"""
+        if self._seen is not None:
+            self._seen.update(task_ids)
+
+    def read_all(self):
+        """Return every task not read yet"""
+        tasks = []
+        while self.has_more():
+            tasks.extend(self.next_page())
+        return tasks
+
+    def close(self):
+        """Stop reading; has_more() is False from now on"""
+        if self._pages is not None:
+            self._pages.close()
+            self._pages = None
+            self._seen = None
+
+class JournalDataStore(DataStore):
+    """Snapshot + append-only journal persistence.
+
+    The snapshot keeps the original tasks_data.json format. Each save appends
+    one JSON line per changed or deleted task to a sibling .journal file, so
+    save cost follows the size of the change. Once the journal grows past
+    config.SETTINGS['journal_compact_records'] it is rotated and folded into
+    a new snapshot on a background thread. Loading replays the snapshot, any
+    journal left mid-compaction, then the live journal.
+    """
+    incremental = True
+    # Records streamed between checks for a compaction or another writer
+    OVERLAY_CHECK_RECORDS = 200
+
+    def __init__(self, filename='tasks_data.json', compact_records=None):
+        super().__init__(filename)
+        self.journal_path = self.sidecar('.journal')
+        self.compacting_path = self.sidecar('.journal.compacting')
+        if compact_records is None:
+            compact_records = config.SETTINGS['journal_compact_records']
+        self.compact_records = compact_records
+        self._journal_records = 0
+        self._compactor = None
+        self._defer_compaction = False
+        self._lock = threading.Lock()
+
+    def save(self, tasks, changed_ids=None, deleted_ids=()):
+        """Append records for changed tasks; a full snapshot when changed_ids is None"""
+        if changed_ids is None:
+            self.wait_for_compaction()
+            with self.write_lock:
+                referenced = set()
+                write_records(self.filepath, self._stored_records(tasks, referenced), 'json')
+                for path in (self.journal_path, self.compacting_path):
+                    if path.exists():
+                        path.unlink()
+                self.notes.collect(referenced)
+            self._journal_records = 0
+            return
+
+        if not changed_ids and not deleted_ids:
+            return
+        with self.write_lock, self._lock:
+            lines = []
+            if changed_ids:
+                for task in select_tasks(tasks, changed_ids):
+                    lines.append(json.dumps({'op': 'put', 'task': self.notes.task_record(task)},
+                                            separators=(',', ':')))
+            for task_id in deleted_ids:
+                lines.append(json.dumps({'op': 'del', 'id': task_id}, separators=(',', ':')))
+            if not lines:
+                return
+            # The notes have to be on disk before the records that point to them
+            self.notes.sync()
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_records += len(lines)
+            if self._journal_records >= self.compact_records and not self._defer_compaction:
+                self._start_compaction()
+
+    @contextlib.contextmanager
+    def bulk_writes(self):
+        """Append without compacting, then compact once at the end.
+
+        Otherwise a large import would fold an ever larger journal into the
+        snapshot over and over.
+        """
+        self._defer_compaction = True
+        try:
+            yield
+        finally:
+            self._defer_compaction = False
+            with self.write_lock, self._lock:
+                if self._journal_records >= self.compact_records:
+                    self._start_compaction()
+
+    def _load_records(self):
+        """Load the snapshot and replay journal records on top of it"""
+        self.wait_for_compaction()
+        records = self._load_snapshot()
+        self._replay(self.compacting_path, records)
+        self._journal_records = self._replay(self.journal_path, records)
+        return records.values()
+
+    def _stream_records(self):
+        """Stream the snapshot with the journals laid over it.
+
+        Yields the same records in the same order as _load_records(), but
+        only the journals (bounded by compact_records) are read up front.
+        A put to a task in the snapshot replaces it in place; tasks that are
+        new, or were deleted and put again, come after the snapshot. If the
+        snapshot or a journal changes while streaming (a compaction, or a
+        save by another process), the journals are read again, so a stale
+        overlay never brings back a task deleted meanwhile.
+        """
+        self.wait_for_compaction()
+        state, changes, moved = self._read_overlay()
+        emitted = set()
+        if self.filepath.exists():
+            for count, item in enumerate(page_json_array(self.filepath), 1):
+                if count % self.OVERLAY_CHECK_RECORDS == 0 and self._files_state() != state:
+                    state, changes, moved = self._read_overlay()
+                task_id = item['id']
+                if task_id in moved:
+                    continue
+                if task_id in changes:
+                    item = changes[task_id]
+                    emitted.add(task_id)
+                yield item
+        if self._files_state() != state:
+            state, changes, moved = self._read_overlay()
+        for task_id, item in changes.items():
+            if item is not None and task_id not in emitted:
+                yield item
+
+    def _read_overlay(self):
+        """Return (file state, {id: record or None if deleted}, ids deleted) from the journals"""
+        state = self._files_state()
+        changes = {}
+        moved = set()
+        for path in (self.compacting_path, self.journal_path):
+            count = 0
+            for record in self._read_journal(path):
+                if record['op'] == 'put':
+                    task_id = record['task']['id']
+                    if task_id in changes and changes[task_id] is None:
+                        del changes[task_id]
+                    changes[task_id] = record['task']
+                elif record['op'] == 'del':
+                    changes.pop(record['id'], None)
+                    changes[record['id']] = None
+                    moved.add(record['id'])
+                count += 1
+        self._journal_records = count
+        return state, changes, moved
+
+    def _files_state(self):
+        """Identity of the snapshot and journals, which changes whenever one is written"""
+        state = []
+        for path in (self.filepath, self.compacting_path, self.journal_path):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                state.append(None)
+            else:
+                state.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+        return state
+
+    def close(self):
+        """Wait for any background compaction to finish"""
+        self.wait_for_compaction()
+        super().close()
+
+    def wait_for_compaction(self):
+        """Block until a running compaction has finished"""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    def _load_snapshot(self):
+        """Return the snapshot's records keyed by id"""
+        if not self.filepath.exists():
+            return {}
+        return {item['id']: item for item in read_json_array(self.filepath)}
+
+    @staticmethod
+    def _replay(path, records):
+        """Apply journal records from path to records; return the record count"""
+        count = 0
+        for record in JournalDataStore._read_journal(path):
+            if record['op'] == 'put':
+                records[record['task']['id']] = record['task']
+            elif record['op'] == 'del':
+                records.pop(record['id'], None)
+            count += 1
+        return count
+
+    @staticmethod
+    def _read_journal(path):
+        """Yield the records of the journal at path, if there is one"""
+        if not path.exists():
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn final line from an interrupted append
+                    return
+                yield record
+
+    def _start_compaction(self):
+        """Rotate the journal and fold it into the snapshot in the background.
+
+        Called with write_lock and self._lock held. New appends go to a fresh journal while
+        the rotated one is being compacted.
+        """
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        # If a previous compaction never finished, fold that file first and
+        # leave the live journal for the next round
+        if not self.compacting_path.exists():
+            os.replace(self.journal_path, self.compacting_path)
+            self._journal_records = 0
+        self._compactor = threading.Thread(target=self._compact, name='journal-compactor')
+        self._compactor.start()
+
+    def _compact(self):
+        with self.write_lock:
+            if not self.compacting_path.exists():
+                # Another process folded it in while we waited for the lock
+                return
+            records = self._load_snapshot()
+            self._replay(self.compacting_path, records)
+            write_records(self.filepath, records.values(), 'json')
+            self.compacting_path.unlink()
+            referenced = {record['notes_blob'] for record in records.values()
+                          if 'notes_blob' in record}
+            referenced.update(record['task']['notes_blob']
+                              for record in self._read_journal(self.journal_path)
+                              if record['op'] == 'put' and 'notes_blob' in record['task'])
+            self.notes.collect(referenced)
+
+class SqliteDataStore(DataStore):
+    """SQLite persistence with row-level writes and lazily loaded notes.
+
+    Task headers live in the tasks table (indexed by id, name and
+    created_at); notes live in a separate table and are only read when a
+    task's notes are first accessed. On first use an existing JSON data
+    file is migrated into the database once. SQLite locks the database
+    itself, so write_lock is not used, and notes are never put in a note
+    pack.
+    """
+    incremental = True
+    # Rows fetched per query by iter_records
+    PAGE_SIZE = 1000
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            elapsed_seconds INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_tasks_name ON tasks(name);
+        CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at);
+        CREATE TABLE IF NOT EXISTS notes (
+            task_id TEXT PRIMARY KEY REFERENCES tasks(id) ON DELETE CASCADE,
+            body TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, filename='tasks_data.db', migrate_from=None):
+        super().__init__(filename)
+        self.migrate_from = Path(migrate_from) if migrate_from else None
+        self._migrated = False
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.filepath), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(self.SCHEMA)
+        self._conn.commit()
+
+    def load(self):
+        """Load task headers; notes are deferred until first accessed"""
+        self._migrate_json()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, name, created_at, elapsed_seconds FROM tasks ORDER BY rowid"
+            ).fetchall()
+        tasks = []
+        load_notes = self.load_notes  # one bound method shared by every task
+        for task_id, name, created_at, elapsed_seconds in rows:
+            task = TaskData(task_id, name, created_at)
+            task.elapsed_seconds = elapsed_seconds
+            task.defer_notes(load_notes)
+            tasks.append(task)
+        return tasks
+
+    def load_columns(self):
+        """Load every task, notes included, into a TaskColumns table"""
+        self._migrate_json()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, name, created_at, COALESCE(body, ''), elapsed_seconds "
+                "FROM tasks LEFT JOIN notes ON notes.task_id = tasks.id ORDER BY tasks.rowid"
+            ).fetchall()
+        table = TaskColumns()
+        for row in rows:
+            table.append(*row)
+        return table
+
+    def iter_pages(self, page_size):
+        """Yield task headers in order, one indexed query per page; notes are deferred"""
+        self._migrate_json()
+        load_notes = self.load_notes
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT rowid, id, name, created_at, elapsed_seconds FROM tasks "
+                    "WHERE rowid > ? ORDER BY rowid LIMIT ?", (last_rowid, page_size)
+                ).fetchall()
+            if not rows:
+                return
+            page = []
+            for _, task_id, name, created_at, elapsed_seconds in rows:
+                task = TaskData(task_id, name, created_at)
+                task.elapsed_seconds = elapsed_seconds
+                task.defer_notes(load_notes)
+                page.append(task)
+            last_rowid = rows[-1][0]
+            yield page
+
+    def get_tasks(self, task_ids):
+        """Return task headers for task_ids, keyed by id, by primary key lookups"""
+        self._migrate_json()
+        task_ids = list(task_ids)
+        load_notes = self.load_notes
+        found = {}
+        # Kept well under SQLite's limit on query parameters
+        for start in range(0, len(task_ids), 500):
+            batch = task_ids[start:start + 500]
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, name, created_at, elapsed_seconds FROM tasks "
+                    f"WHERE id IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+            for task_id, name, created_at, elapsed_seconds in rows:
+                task = TaskData(task_id, name, created_at)
+                task.elapsed_seconds = elapsed_seconds
+                task.defer_notes(load_notes)
+                found[task_id] = task
+        return found
+
+    def iter_records(self):
+        """Yield every task, notes included, a page of rows at a time"""
+        self._migrate_json()
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT tasks.rowid, id, name, created_at, COALESCE(body, ''), elapsed_seconds "
+                    "FROM tasks LEFT JOIN notes ON notes.task_id = tasks.id "
+                    "WHERE tasks.rowid > ? ORDER BY tasks.rowid LIMIT ?",
+                    (last_rowid, self.PAGE_SIZE)
+                ).fetchall()
+            if not rows:
+                return
+            for rowid, task_id, name, created_at, notes, elapsed_seconds in rows:
+                yield {'id': task_id, 'name': name, 'created_at': created_at,
+                       'notes': notes, 'elapsed_seconds': elapsed_seconds}
+            last_rowid = rows[-1][0]
+
+    def load_notes(self, task_id):
+        """Fetch one task's notes"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body FROM notes WHERE task_id = ?", (task_id,)
+            ).fetchone()
+        return row[0] if row else ""
+
+    def save(self, tasks, changed_ids=None, deleted_ids=()):
+        """Upsert changed tasks and delete removed ones in one transaction.
+
+        With changed_ids=None every task is written. Notes are only written
+        for tasks whose notes have been loaded, since others cannot have
+        changed.
+        """
+        if changed_ids is None:
+            changed = list(tasks)
+        elif changed_ids:
+            changed = select_tasks(tasks, changed_ids)
+        else:
+            changed = []
+        if not changed and not deleted_ids:
+            return
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO tasks (id, name, created_at, elapsed_seconds) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET name = excluded.name, "
+                "created_at = excluded.created_at, elapsed_seconds = excluded.elapsed_seconds",
+                # Rows are built as SQLite asks for them, so the id and
+                # timestamp strings of every task are never held at once
+                ((task.id, task.name, task.created_at, task.elapsed_seconds) for task in changed)
+            )
+            self._conn.executemany(
+                "INSERT INTO notes (task_id, body) VALUES (?, ?) "
+                "ON CONFLICT(task_id) DO UPDATE SET body = excluded.body",
+                ((task.id, task.notes) for task in changed if task.notes_loaded)
+            )
+            self._conn.executemany(
+                "DELETE FROM tasks WHERE id = ?", [(task_id,) for task_id in deleted_ids]
+            )
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+        super().close()
+
+    def _migrate_json(self):
+        """Import the JSON data file once, the first time the database is used"""
+        if self._migrated or self.migrate_from is None or not self.migrate_from.exists():
+            return
+        with self._lock:
+            done = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'migrated_from'"
+            ).fetchone()
+        if done:
+            self._migrated = True
+            return
+        # Notes inline, since tasks with deferred notes are saved without them
+        with contextlib.closing(JournalDataStore(self.migrate_from)) as source:
+            tasks = [TaskData.from_dict(record) for record in source.iter_records()]
+        self.save(tasks)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('migrated_from', ?)",
+                (str(self.migrate_from),)
+            )
+        self._migrated = True
+        print(f"✓ Migrated {len(tasks)} tasks from {self.migrate_from} to {self.filepath}")
+
+def create_data_store(filename=None):
+    """Create the DataStore selected by config.SETTINGS['storage_backend'].
+
+    filename overrides the configured data file (or database file).
+    """
+    backend = config.SETTINGS['storage_backend']
+    configured = data_file_path()  # raises for an unknown backend
+    filename = filename or configured
+    if backend == 'sqlite':
+        return SqliteDataStore(filename, migrate_from=config.SETTINGS['data_file'])
+    if backend == 'journal':
+        return JournalDataStore(filename)
+    return DataStore(filename)
+
+def data_file_path():
+    """Return the file the configured storage backend keeps its data in"""
+    backend = config.SETTINGS['storage_backend']
+    if backend == 'sqlite':
+        return Path(config.SETTINGS['database_file'])
+    if backend in ('journal', 'json'):
+        return Path(config.SETTINGS['data_file'])
+    raise ValueError(f"Unknown storage backend: {backend!r}")
@@ -0,0 +1,127 @@
+"""
+Monotonic-clock timing engine for Mancom Timer & Notes
+"""
+
+import time
+
+_BOOTTIME = getattr(time, 'CLOCK_BOOTTIME', None)
+
+def monotonic_now():
+    """Return a monotonic timestamp in seconds that keeps counting during sleep.
+
+    CLOCK_BOOTTIME is preferred where available because CLOCK_MONOTONIC on Linux
+    stops while the machine is suspended; elsewhere time.monotonic() already
+    includes suspended time.
+    """
+    if _BOOTTIME is not None:
+        return time.clock_gettime(_BOOTTIME)
+    return time.monotonic()
+
+class TimingEngine:
+    """Tracks task time from monotonic start timestamps.
+
+    Only one task runs at a time, so the engine keeps a single start
+    timestamp plus a small dict of seconds accrued since the last save.
+    Elapsed time is computed on demand, never counted per tick, so a stalled
+    event loop or a suspended machine cannot make it drift.
+
+    on_session_finished(task_id, wall_start, wall_end) is called whenever
+    a running task is paused.
+    """
+
+    def __init__(self, clock=monotonic_now, on_session_finished=None):
+        self._clock = clock
+        self.on_session_finished = on_session_finished
+        self._pending = {}  # task_id -> seconds accrued but not yet saved
+        self._started_at = None
+        self._session_started_at = None
+        self._session_started_wall = None
+        self.current_task_id = None
+
+    def start_task(self, task_id):
+        """Start or resume a task timer"""
+        if self.current_task_id == task_id and self._started_at is not None:
+            return
+        if self.current_task_id is not None:
+            self.pause_task(self.current_task_id)
+
+        self.current_task_id = task_id
+        self._started_at = self._session_started_at = self._clock()
+        self._session_started_wall = time.time()
+
+    def pause_task(self, task_id):
+        """Pause a task timer"""
+        if task_id != self.current_task_id or self._started_at is None:
+            return
+        now = self._clock()
+        self._pending[task_id] = self._pending.get(task_id, 0.0) + (now - self._started_at)
+        self._started_at = None
+        self.current_task_id = None
+        if self.on_session_finished is not None:
+            # Wall-clock end is derived from the monotonic duration so clock
+            # changes during the session do not distort it
+            self.on_session_finished(task_id, self._session_started_wall,
+                                     self._session_started_wall + (now - self._session_started_at))
+
+    def remove_task(self, task_id):
+        """Stop a task (if running) and forget its unsaved time"""
+        self.pause_task(task_id)
+        self._pending.pop(task_id, None)
+
+    def is_running(self, task_id):
+        """Return True if task_id is the task currently being timed"""
+        return task_id == self.current_task_id and self._started_at is not None
+
+    def running_session(self):
+        """Return (task_id, wall start, wall now) for the running task, or None"""
+        if self._started_at is None:
+            return None
+        duration = self._clock() - self._session_started_at
+        return (self.current_task_id, self._session_started_wall,
+                self._session_started_wall + duration)
+
+    def get_elapsed_time(self, task_id):
+        """Get unsaved elapsed time in whole seconds"""
+        return int(self._elapsed(task_id, self._clock()))
+
+    def add_elapsed(self, task_id, seconds):
+        """Add seconds to task_id's unsaved time"""
+        self._pending[task_id] = self._pending.get(task_id, 0.0) + seconds
+
+    def time_to_next_step(self, task_id, step=1.0):
+        """Seconds until task_id's elapsed time next reaches a multiple of step.
+
+        A display of whole seconds changes exactly then. None if task_id is
+        not running.
+        """
+        if not self.is_running(task_id):
+            return None
+        return step - self._elapsed(task_id, self._clock()) % step
+
+    def collect_elapsed(self):
+        """Return and clear the whole seconds accrued per task since the last call.
+
+        Sub-second remainders stay in the engine (and the running task keeps
+        running), so repeated collection never loses or double-counts time.
+        """
+        now = self._clock()
+        collected = {}
+        for task_id in set(self._pending) | ({self.current_task_id} - {None}):
+            elapsed = self._elapsed(task_id, now)
+            whole = int(elapsed)
+            if whole:
+                collected[task_id] = whole
+            remainder = elapsed - whole
+            if self.is_running(task_id):
+                self._started_at = now
+            if remainder or self.is_running(task_id):
+                self._pending[task_id] = remainder
+            else:
+                self._pending.pop(task_id, None)
+        return collected
+
+    def _elapsed(self, task_id, now):
+        elapsed = self._pending.get(task_id, 0.0)
+        if self.is_running(task_id):
+            elapsed += now - self._started_at
+        return elapsed
@@ -0,0 +1,310 @@
+"""
+Streaming task import and export for Mancom Timer & Notes
+
+Archives are read and written one record at a time, so memory does not
+grow with the size of the file. Supported formats, chosen by extension:
+
+    .json            an array of task objects, one per line (the
+                     tasks_data.json layout)
+    .jsonl, .ndjson  one task object per line
+    .csv             columns id, name, created_at, elapsed_seconds, notes
+
+Only name is required when importing; a missing id, creation time or
+elapsed time is filled in.
+"""
+
+import csv
+import json
+import os
+from pathlib import Path
+
+from .ids import IdAllocator
+from .models import TaskData
+
+FORMATS = {'.json': 'json', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.csv': 'csv'}
+CSV_FIELDS = ('id', 'name', 'created_at', 'elapsed_seconds', 'notes')
+
+# read_json_array() parses files up to this size in one go
+WHOLE_READ_LIMIT = 32 << 20
+
+# A single JSON record larger than this is treated as a corrupt file rather
+# than buffered in full
+MAX_RECORD_SIZE = 64 << 20
+
+def detect_format(path):
+    """Return 'json', 'jsonl' or 'csv' from path's extension"""
+    fmt = FORMATS.get(Path(path).suffix.lower())
+    if fmt is None:
+        raise ValueError(f"Unsupported file type {Path(path).suffix!r}; use .json, .jsonl or .csv")
+    return fmt
+
+def iter_json_array(f, chunk_size=1 << 16):
+    """Yield the elements of the JSON array in text file f one at a time.
+
+    Only the element being parsed is buffered, not the whole document.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill(size=chunk_size):
+        # Drop what has been parsed and read the next chunk; False at EOF
+        nonlocal buffer, pos, eof
+        chunk = f.read(size)
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        eof = not chunk
+        return not eof
+
+    def skip_space():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return
+
+    skip_space()
+    if buffer[pos:pos + 1] != '[':
+        raise ValueError("Expected a JSON array")
+    pos += 1
+    skip_space()
+    if buffer[pos:pos + 1] == ']':
+        return
+    while True:
+        skip_space()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                # Most likely the element continues in the next chunk; read
+                # at least as much again so a large element is not re-parsed
+                # once per chunk
+                pending = len(buffer) - pos
+                if pending > MAX_RECORD_SIZE or not fill(max(chunk_size, pending)):
+                    raise
+                continue
+            if not eof and (end == len(buffer)
+                            or type(item) in (int, float) and len(buffer) - end <= 2):
+                # A number or literal can also end at a chunk boundary, and
+                # a number split there ("2." | "5", "1e" | "3") decodes short
+                fill()
+                continue
+            break
+        pos = end
+        yield item
+        skip_space()
+        separator = buffer[pos:pos + 1]
+        pos += 1
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError(f"Expected ',' or ']' in JSON array, found {separator!r}")
+
+def read_json_array(path):
+    """Yield the elements of the JSON array stored in path.
+
+    Files up to WHOLE_READ_LIMIT are parsed in one json.load call, which is
+    faster; larger ones are streamed so memory stays bounded.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if os.fstat(f.fileno()).st_size <= WHOLE_READ_LIMIT:
+            yield from json.load(f)
+        else:
+            yield from iter_json_array(f)
+
+def page_json_array(path, chunk_size=200):
+    """Yield the elements of the JSON array stored in path, reading lazily.
+
+    Files in write_json_array's layout (one element per line) are read
+    chunk_size lines at a time, and the file is closed between chunks, so
+    a slow consumer never keeps it open while a writer replaces it. If the
+    file is replaced mid-way, reading starts over from the top of the new
+    file and the caller has to drop elements it has already seen. Other
+    layouts are read in one go.
+    """
+    offset = None
+    identity = None
+    while True:
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            current = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if current != identity:
+                offset = None
+                identity = current
+            chunk, done = _read_array_lines(f, offset, chunk_size)
+            offset = f.tell()
+        yield from chunk
+        if done:
+            return
+
+def _read_array_lines(f, offset, count):
+    """Read up to count elements from binary file f; return (elements, at_end).
+
+    With offset None reading starts at the top of the file, and a file not
+    in the one-element-per-line layout is parsed whole instead.
+    """
+    if offset is None:
+        if f.readline().strip() != b'[':
+            f.seek(0)
+            return json.load(f), True
+    else:
+        f.seek(offset)
+    elements = []
+    while len(elements) < count:
+        line = f.readline().strip()
+        if line in (b']', b''):
+            return elements, True
+        try:
+            elements.append(json.loads(line[:-1] if line.endswith(b',') else line))
+        except ValueError:
+            if offset is not None or elements:
+                raise
+            # The first element spans several lines (e.g. indented)
+            f.seek(0)
+            return json.load(f), True
+    return elements, False
+
+def iter_json_lines(f):
+    """Yield one JSON value per non-blank line of text file f"""
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+def iter_csv(f):
+    """Yield a dict per CSV row, keyed by the header row"""
+    return iter(csv.DictReader(f))
+
+READERS = {'json': iter_json_array, 'jsonl': iter_json_lines, 'csv': iter_csv}
+
+# One C-accelerated encoder call per record; indent= would fall back to the
+# pure-Python encoder
+_line_encoder = json.JSONEncoder(separators=(', ', ': '))
+
+def write_json_array(f, records):
+    """Write records as a JSON array with one record per line"""
+    count = 0
+    for record in records:
+        f.write(',\n  ' if count else '[\n  ')
+        f.write(_line_encoder.encode(record))
+        count += 1
+    f.write('\n]\n' if count else '[]\n')
+    return count
+
+def write_json_lines(f, records):
+    count = 0
+    for record in records:
+        f.write(json.dumps(record, separators=(',', ':')) + '\n')
+        count += 1
+    return count
+
+def write_csv(f, records):
+    writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    count = 0
+    for record in records:
+        writer.writerow(record)
+        count += 1
+    return count
+
+WRITERS = {'json': write_json_array, 'jsonl': write_json_lines, 'csv': write_csv}
+
+def write_records(path, records, fmt=None):
+    """Stream records (task dicts) to path; return how many were written.
+
+    The file is written under a temporary name, fsynced and moved into
+    place once complete, so a failure never leaves a half-written file.
+    """
+    path = Path(path)
+    fmt = fmt or detect_format(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            count = WRITERS[fmt](f, records)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return count
+
+class TaskImporter:
+    """Reads an archive and yields its tasks in batches of batch_size.
+
+    Ids already in existing_ids, or seen earlier in the same file, are
+    replaced with newly allocated ones, so an import never overwrites a
+    task. Records without a usable name are skipped. Progress is available
+    as bytes_read / size while batches() is running.
+    """
+
+    def __init__(self, path, existing_ids=(), batch_size=1000, fmt=None, allocator=None):
+        self.path = Path(path)
+        self.fmt = fmt or detect_format(self.path)
+        self.batch_size = batch_size
+        self.allocator = allocator or IdAllocator()
+        # Ids are the only per-task state kept, to catch duplicates
+        self.seen_ids = set(existing_ids)
+        self.size = self.path.stat().st_size
+        self.bytes_read = 0
+        self.imported = 0
+        self.renamed = 0
+        self.skipped = 0
+
+    def batches(self):
+        """Yield lists of new TaskData"""
+        with open(self.path, 'r', encoding='utf-8-sig', newline='') as f:
+            raw = f.buffer
+            batch = []
+            for record in READERS[self.fmt](f):
+                task = self._task_from_record(record)
+                if task is None:
+                    continue
+                batch.append(task)
+                if len(batch) >= self.batch_size:
+                    self.bytes_read = raw.tell()
+                    yield batch
+                    batch = []
+            self.bytes_read = self.size
+            if batch:
+                yield batch
+
+    def _task_from_record(self, record):
+        if not isinstance(record, dict):
+            self.skipped += 1
+            return None
+        name = record.get('name')
+        if not isinstance(name, str) or not name.strip():
+            self.skipped += 1
+            return None
+        try:
+            # CSV gives strings, and other trackers may store fractions
+            elapsed_seconds = int(float(record.get('elapsed_seconds') or 0))
+        except (TypeError, ValueError, OverflowError):
+            self.skipped += 1
+            return None
+        task_id = record.get('id')
+        task_id = str(task_id).strip() if task_id is not None else ''
+        if not task_id or task_id in self.seen_ids:
+            if task_id:
+                self.renamed += 1
+            task_id = self.allocator.next_id()
+        self.seen_ids.add(task_id)
+        created_at = record.get('created_at')
+        if not isinstance(created_at, str) or not created_at:
+            created_at = None
+        task = TaskData(task_id, name.strip(), created_at)
+        task.notes = record.get('notes') or ""
+        task.elapsed_seconds = elapsed_seconds
+        self.imported += 1
+        return task
+
+    def summary(self):
+        """One line describing the finished import"""
+        text = f"Imported {self.imported} task(s) from {self.path.name}"
+        if self.renamed:
+            text += f"; {self.renamed} duplicate id(s) were given new ids"
+        if self.skipped:
+            text += f"; skipped {self.skipped} record(s) without a name or time"
+        return text